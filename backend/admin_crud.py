@@ -1,38 +1,15 @@
 from fastapi import HTTPException, status
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 from datetime import datetime, timezone, timedelta
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
 import uuid
 from audit_system import AuditSystem, AuditAction
-
-# Utility function to convert ObjectIds and datetime objects to strings
-def convert_objectids_to_strings(data):
-    """Recursively convert MongoDB ObjectIds and datetime objects to strings for JSON serialization"""
-    from datetime import datetime, date
-    
-    if isinstance(data, list):
-        return [convert_objectids_to_strings(item) for item in data]
-    elif isinstance(data, dict):
-        converted = {}
-        for key, value in data.items():
-            if hasattr(value, '__class__') and value.__class__.__name__ == 'ObjectId':
-                converted[key] = str(value)
-            elif isinstance(value, datetime):
-                converted[key] = value.isoformat()
-            elif isinstance(value, date):
-                converted[key] = value.isoformat()
-            elif isinstance(value, (dict, list)):
-                converted[key] = convert_objectids_to_strings(value)
-            else:
-                converted[key] = value
-        return converted
-    elif isinstance(data, datetime):
-        return data.isoformat()
-    elif isinstance(data, date):
-        return data.isoformat()
-    else:
-        return data
+from pagination import decode_cursor, encode_cursor, keyset_query, keyset_sort, next_cursor, next_position
+from search_index import RELEVANCE_FIELD, SEARCH_FIELD, relevance_stage, search_query, search_tokens
+from serialization import convert_objectids_to_strings
+from ride_queries import HIDDEN_MATCH_FIELDS, HIDDEN_REQUEST_FIELDS
+from user_directory import HIDDEN_USER_FIELDS, UserDirectory
 
 class AdminUserUpdate(BaseModel):
     name: Optional[str] = None
@@ -69,13 +46,64 @@ class DataFilter(BaseModel):
     user_role: Optional[str] = None
     limit: int = 50
     offset: int = 0
-    sort_by: str = "created_at"
+    sort_by: str = "created_at"  # or "relevance" to rank search_term matches
     sort_order: str = "desc"  # asc or desc
+    cursor: Optional[str] = None  # continuation token from page_info.next_cursor; replaces offset
+    include_total: bool = True
 
 class AdminCRUDOperations:
-    def __init__(self, db: AsyncIOMotorDatabase, audit_system: AuditSystem):
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        audit_system: AuditSystem,
+        user_directory: Optional[UserDirectory] = None,
+        read_db: Optional[AsyncIOMotorDatabase] = None
+    ):
         self.db = db
+        # Listings, counts and totals; may read from secondaries
+        self.read_db = read_db if read_db is not None else db
         self.audit = audit_system
+        self.users = user_directory or UserDirectory(db.users)
+    
+    @staticmethod
+    def _cursor_position(filters: DataFilter, keys: Optional[Sequence[str]] = None) -> Any:
+        if not filters.cursor:
+            return None
+        try:
+            return decode_cursor(filters.cursor, keys)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    @staticmethod
+    async def _count(collection, query: Dict[str, Any], include_total: bool) -> Optional[int]:
+        """Total matching documents; unfiltered totals use the collection estimate"""
+        if not include_total:
+            return None
+        if not query:
+            return await collection.estimated_document_count()
+        return await collection.count_documents(query)
+    
+    def _page(self, collection, query: Dict[str, Any], filters: DataFilter, position: Any, projection: Optional[Dict[str, int]] = None):
+        """Sorted page of query, continuing after position or else skipping offset"""
+        sort_direction = -1 if filters.sort_order == "desc" else 1
+        projection = {**(projection or {}), SEARCH_FIELD: 0}
+        if filters.sort_by == RELEVANCE_FIELD and filters.search_term:
+            # Ranked search: the score is computed, so the keyset applies after it
+            pipeline = [
+                {"$match": query},
+                relevance_stage(filters.search_term),
+                {"$match": keyset_query({}, RELEVANCE_FIELD, sort_direction, position)},
+                {"$sort": dict(keyset_sort(RELEVANCE_FIELD, sort_direction))}
+            ]
+            if not filters.cursor:
+                pipeline.append({"$skip": filters.offset})
+            pipeline += [{"$limit": filters.limit}, {"$project": projection}]
+            return collection.aggregate(pipeline)
+        cursor = collection.find(keyset_query(query, filters.sort_by, sort_direction, position), projection)
+        cursor = cursor.sort(keyset_sort(filters.sort_by, sort_direction))
+        if not filters.cursor:
+            cursor = cursor.skip(filters.offset)
+        return cursor.limit(filters.limit)
     
     # ========== USER MANAGEMENT ==========
     
@@ -88,13 +116,9 @@ class AdminCRUDOperations:
         
         query = {}
         
-        # Search across multiple fields
+        # Prefix search across id, name, email and phone
         if filters.search_term:
-            query["$or"] = [
-                {"name": {"$regex": filters.search_term, "$options": "i"}},
-                {"email": {"$regex": filters.search_term, "$options": "i"}},
-                {"phone": {"$regex": filters.search_term, "$options": "i"}}
-            ]
+            query.update(search_query(filters.search_term))
         
         if filters.user_role:
             query["role"] = filters.user_role
@@ -112,15 +136,14 @@ class AdminCRUDOperations:
             query["created_at"] = date_filter
         
         # Get total count for pagination
-        total_count = await self.db.users.count_documents(query)
+        total_count = await self._count(self.read_db.users, query, filters.include_total)
         
-        # Execute query with pagination and sorting
-        sort_direction = -1 if filters.sort_order == "desc" else 1
-        cursor = self.db.users.find(query, {"password": 0})  # Exclude password
-        cursor = cursor.sort(filters.sort_by, sort_direction)
-        cursor = cursor.skip(filters.offset).limit(filters.limit)
+        # Execute query with keyset pagination and sorting
+        position = self._cursor_position(filters)
+        cursor = self._page(self.read_db.users, query, filters, position, HIDDEN_USER_FIELDS)  # Exclude password
         
         users = await cursor.to_list(None)
+        users_next_cursor = next_cursor(users, filters.sort_by, filters.limit)
         
         # Convert MongoDB ObjectIds to strings for JSON serialization
         users = convert_objectids_to_strings(users)
@@ -144,7 +167,8 @@ class AdminCRUDOperations:
             "page_info": {
                 "offset": filters.offset,
                 "limit": filters.limit,
-                "has_more": (filters.offset + len(users)) < total_count
+                "has_more": users_next_cursor is not None,
+                "next_cursor": users_next_cursor
             }
         }
     
@@ -170,17 +194,18 @@ class AdminCRUDOperations:
         
         update_data["updated_at"] = datetime.now(timezone.utc)
         
-        # Perform update
+        # Perform update, keeping the search tokens in step with name/email/phone
         result = await self.db.users.update_one(
             {"id": user_id},
-            {"$set": update_data}
+            {"$set": {**update_data, SEARCH_FIELD: search_tokens("users", {**current_user, **update_data})}}
         )
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
+        self.users.invalidate(user_id)
         
         # Get updated user data
-        updated_user = await self.db.users.find_one({"id": user_id}, {"password": 0})
+        updated_user = await self.db.users.find_one({"id": user_id}, HIDDEN_USER_FIELDS)
         
         # Create audit log
         await self.audit.log_action(
@@ -264,12 +289,8 @@ class AdminCRUDOperations:
         query = {}
         
         if filters.search_term:
-            # Search in pickup/dropoff addresses and ride IDs
-            query["$or"] = [
-                {"id": {"$regex": filters.search_term, "$options": "i"}},
-                {"pickup_location.address": {"$regex": filters.search_term, "$options": "i"}},
-                {"dropoff_location.address": {"$regex": filters.search_term, "$options": "i"}}
-            ]
+            # Prefix search in pickup/dropoff addresses and ride IDs
+            query.update(search_query(filters.search_term))
         
         if filters.status:
             query["status"] = filters.status
@@ -282,48 +303,48 @@ class AdminCRUDOperations:
                 date_filter["$lte"] = filters.end_date
             query["created_at"] = date_filter
         
+        # Both collections are paged independently; the cursor holds one
+        # position per collection and null once a collection is exhausted
+        positions = self._cursor_position(filters, keys=("requests", "matches")) or {}
+        
         # Get pending requests
         pending_query = query.copy()
-        pending_count = await self.db.ride_requests.count_documents(pending_query)
-        
-        sort_direction = -1 if filters.sort_order == "desc" else 1
-        pending_cursor = self.db.ride_requests.find(pending_query)
-        pending_cursor = pending_cursor.sort(filters.sort_by, sort_direction)
-        pending_cursor = pending_cursor.skip(filters.offset).limit(filters.limit)
-        pending_requests = await pending_cursor.to_list(None)
+        pending_count = await self._count(self.read_db.ride_requests, pending_query, filters.include_total)
+        pending_requests = []
+        if not filters.cursor or positions.get("requests"):
+            pending_cursor = self._page(self.read_db.ride_requests, pending_query, filters, positions.get("requests"), HIDDEN_REQUEST_FIELDS)
+            pending_requests = await pending_cursor.to_list(None)
         
         # Get completed matches
         matches_query = query.copy()
-        matches_count = await self.db.ride_matches.count_documents(matches_query)
-        
-        matches_cursor = self.db.ride_matches.find(matches_query)
-        matches_cursor = matches_cursor.sort(filters.sort_by, sort_direction)
-        matches_cursor = matches_cursor.skip(filters.offset).limit(filters.limit)
-        completed_matches = await matches_cursor.to_list(None)
+        matches_count = await self._count(self.read_db.ride_matches, matches_query, filters.include_total)
+        completed_matches = []
+        if not filters.cursor or positions.get("matches"):
+            matches_cursor = self._page(self.read_db.ride_matches, matches_query, filters, positions.get("matches"), HIDDEN_MATCH_FIELDS)
+            completed_matches = await matches_cursor.to_list(None)
+        
+        next_positions = {
+            "requests": next_position(pending_requests, filters.sort_by, filters.limit),
+            "matches": next_position(completed_matches, filters.sort_by, filters.limit)
+        }
+        rides_next_cursor = encode_cursor(next_positions) if any(next_positions.values()) else None
         
         # Convert MongoDB ObjectIds to strings for JSON serialization
         pending_requests = convert_objectids_to_strings(pending_requests)
         completed_matches = convert_objectids_to_strings(completed_matches)
         
-        # Populate driver names for both pending requests and completed matches
-        all_driver_ids = set()
-        for request in pending_requests:
-            if request.get('driver_id'):
-                all_driver_ids.add(request['driver_id'])
-        for match in completed_matches:
-            if match.get('driver_id'):
-                all_driver_ids.add(match['driver_id'])
-        
-        # Batch fetch driver information
-        drivers = {}
-        if all_driver_ids:
-            driver_cursor = self.db.users.find({"id": {"$in": list(all_driver_ids)}})
-            driver_list = await driver_cursor.to_list(None)
-            for driver in driver_list:
-                drivers[driver['id']] = {
-                    'name': driver.get('name', 'Unknown Driver'),
-                    'email': driver.get('email', 'Unknown Email')
-                }
+        # Batch fetch driver and rider information for both pending requests and completed matches
+        users = await self.users.summaries(
+            [ride.get(field) for ride in pending_requests + completed_matches for field in ('driver_id', 'rider_id')]
+        )
+        drivers = {
+            user_id: {'name': user.get('name', 'Unknown Driver'), 'email': user.get('email', 'Unknown Email')}
+            for user_id, user in users.items()
+        }
+        riders = {
+            user_id: {'name': user.get('name', 'Unknown Rider'), 'email': user.get('email', 'Unknown Email')}
+            for user_id, user in users.items()
+        }
         
         # Add driver names to pending requests
         for request in pending_requests:
@@ -343,26 +364,6 @@ class AdminCRUDOperations:
                 match['driver_name'] = 'Unassigned'
                 match['driver_email'] = 'N/A'
         
-        # Populate rider names for both pending requests and completed matches
-        all_ride_ids = set()
-        for ride in pending_requests:
-            if ride.get('rider_id'):
-                all_ride_ids.add(ride['rider_id'])
-        for match in completed_matches:
-            if match.get('rider_id'):
-                all_ride_ids.add(match['rider_id'])
-        
-        # Batch fetch rider information
-        riders = {}
-        if all_ride_ids:
-            rider_cursor = self.db.users.find({"id": {"$in": list(all_ride_ids)}})
-            rider_list = await rider_cursor.to_list(None)
-            for rider in rider_list:
-                riders[rider['id']] = {
-                    'name': rider.get('name', 'Unknown Rider'),
-                    'email': rider.get('email', 'Unknown Email')
-                }
-        
         # Add rider names to pending requests
         for request in pending_requests:
             if request.get('rider_id') and request['rider_id'] in riders:
@@ -381,7 +382,7 @@ class AdminCRUDOperations:
                 match['rider_name'] = 'Rider Not Found'
                 match['rider_email'] = 'Unknown Email'
         
-        total_count = pending_count + matches_count
+        total_count = pending_count + matches_count if filters.include_total else None
         
         # Log audit event
         await self.audit.log_action(
@@ -407,7 +408,8 @@ class AdminCRUDOperations:
             "page_info": {
                 "offset": filters.offset,
                 "limit": filters.limit,
-                "has_more": (filters.offset + len(pending_requests) + len(completed_matches)) < total_count
+                "has_more": rides_next_cursor is not None,
+                "next_cursor": rides_next_cursor
             }
         }
     
@@ -440,7 +442,7 @@ class AdminCRUDOperations:
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Ride not found")
         
-        updated_ride = await self.db.ride_matches.find_one({"id": ride_id})
+        updated_ride = await self.db.ride_matches.find_one({"id": ride_id}, HIDDEN_MATCH_FIELDS)
         
         # Create audit log
         await self.audit.log_action(
@@ -477,12 +479,8 @@ class AdminCRUDOperations:
         query = {}
         
         if filters.search_term:
-            query["$or"] = [
-                {"transaction_id": {"$regex": filters.search_term, "$options": "i"}},
-                {"ride_id": {"$regex": filters.search_term, "$options": "i"}},
-                {"driver_id": {"$regex": filters.search_term, "$options": "i"}},
-                {"rider_id": {"$regex": filters.search_term, "$options": "i"}}
-            ]
+            # Prefix search in payment, transaction, ride and user IDs
+            query.update(search_query(filters.search_term))
         
         if filters.status:
             query["status"] = filters.status
@@ -495,36 +493,24 @@ class AdminCRUDOperations:
                 date_filter["$lte"] = filters.end_date
             query["created_at"] = date_filter
         
-        total_count = await self.db.payments.count_documents(query)
+        total_count = await self._count(self.read_db.payments, query, filters.include_total)
         
-        sort_direction = -1 if filters.sort_order == "desc" else 1
-        cursor = self.db.payments.find(query)
-        cursor = cursor.sort(filters.sort_by, sort_direction)
-        cursor = cursor.skip(filters.offset).limit(filters.limit)
+        position = self._cursor_position(filters)
+        cursor = self._page(self.read_db.payments, query, filters, position)
         
         payments = await cursor.to_list(None)
+        payments_next_cursor = next_cursor(payments, filters.sort_by, filters.limit)
         
         # Convert MongoDB ObjectIds to strings for JSON serialization
         payments = convert_objectids_to_strings(payments)
         
-        # Populate driver and rider names for payments
-        all_user_ids = set()
-        for payment in payments:
-            if payment.get('driver_id'):
-                all_user_ids.add(payment['driver_id'])
-            if payment.get('rider_id'):
-                all_user_ids.add(payment['rider_id'])
-        
-        # Batch fetch user information
-        users = {}
-        if all_user_ids:
-            user_cursor = self.db.users.find({"id": {"$in": list(all_user_ids)}})
-            user_list = await user_cursor.to_list(None)
-            for user in user_list:
-                users[user['id']] = {
-                    'name': user.get('name', 'Unknown User'),
-                    'email': user.get('email', 'Unknown Email')
-                }
+        # Batch fetch driver and rider information for payments
+        users = {
+            user_id: {'name': user.get('name', 'Unknown User'), 'email': user.get('email', 'Unknown Email')}
+            for user_id, user in (await self.users.summaries(
+                [payment.get(field) for payment in payments for field in ('driver_id', 'rider_id')]
+            )).items()
+        }
         
         # Add user names to payments
         for payment in payments:
@@ -543,7 +529,7 @@ class AdminCRUDOperations:
                 payment['rider_email'] = 'Unknown Email'
         
         # Calculate summary statistics
-        total_amount = await self.db.payments.aggregate([
+        total_amount = await self.read_db.payments.aggregate([
             {"$match": query},
             {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
         ]).to_list(None)
@@ -571,7 +557,8 @@ class AdminCRUDOperations:
             "page_info": {
                 "offset": filters.offset,
                 "limit": filters.limit,
-                "has_more": (filters.offset + len(payments)) < total_count
+                "has_more": payments_next_cursor is not None,
+                "next_cursor": payments_next_cursor
             }
         }
     
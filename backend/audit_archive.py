@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Cold storage for audit logs: monthly compressed NDJSON partitions.
+
+audit_logs holds the hot months. Months older than the hot window are
+compacted into audit-<YYYY-MM>.<part>.ndjson.zst files (gzip when the
+zstandard package is not installed), recorded in the audit_archives
+collection and then removed from audit_logs. AuditSystem.get_audit_logs
+continues into these files once the hot collection runs out of matches
+(for admins, or for other roles when a start date bounds the search),
+reading at most AUDIT_ARCHIVE_MAX_MONTHS months per request.
+
+Archiving is off unless AUDIT_ARCHIVE_DIR is set. Point it at storage every
+worker and host can read (a shared volume), since searches read the parts
+written by whichever worker compacted them.
+
+Run directly to compact eligible months or list the archive:
+
+    python audit_archive.py compact
+    python audit_archive.py list
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import asyncio
+import gzip
+import hashlib
+import io
+import logging
+import os
+import socket
+
+from bson import json_util
+from pymongo.errors import DuplicateKeyError
+from search_index import SEARCH_FIELD, search_query, search_tokens
+from streaming import iter_batches
+
+# zstandard is optional; archives fall back to gzip when it is missing
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Archived records read back with naive UTC datetimes, like Motor returns them
+_ARCHIVE_JSON_OPTIONS = json_util.JSONOptions(tz_aware=False)
+
+_EXTENSIONS = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz"}
+
+# Manifest document used as the compaction lease, and how long a lease lasts
+_LEASE_ID = "compaction_lease"
+_LEASE_SECONDS = 3600
+
+# Parts with more distinct users or entity types than this record none, and
+# are never skipped on those fields
+MAX_PART_VALUES = 10000
+
+# Bloom filter over each part's entity ids and search tokens: about 1% false
+# positives up to BLOOM_MAX_BYTES, more for larger parts
+BLOOM_BITS_PER_VALUE = 10
+BLOOM_HASHES = 7
+BLOOM_MAX_BYTES = 1 << 20
+
+def field_key(value: Optional[str]) -> str:
+    """Make an action/severity name safe to use as a field name"""
+    return str(value or "unknown").replace(".", "_").lstrip("$") or "unknown"
+
+def month_key(timestamp: datetime) -> str:
+    return timestamp.strftime("%Y-%m")
+
+def month_bounds(key: str) -> Tuple[datetime, datetime]:
+    """[start, end) of a YYYY-MM month in UTC"""
+    start = datetime.strptime(key, "%Y-%m").replace(tzinfo=timezone.utc)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+def shift_months(key: str, months: int) -> str:
+    start, _ = month_bounds(key)
+    index = start.year * 12 + start.month - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def as_utc(timestamp: datetime) -> datetime:
+    """Aware UTC datetime, whether Mongo returned it naive or aware"""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+def _bloom_positions(value: str, bits: int) -> List[int]:
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "big")
+    step = int.from_bytes(digest[8:], "big") | 1
+    return [(first + i * step) % bits for i in range(BLOOM_HASHES)]
+
+def bloom_filter(values: Iterable[str]) -> bytes:
+    values = list(values)
+    size = min(max(64, len(values) * BLOOM_BITS_PER_VALUE // 8 + 1), BLOOM_MAX_BYTES)
+    bloom = bytearray(size)
+    for value in values:
+        for position in _bloom_positions(value, size * 8):
+            bloom[position // 8] |= 1 << (position % 8)
+    return bytes(bloom)
+
+def bloom_may_contain(bloom: bytes, value: str) -> bool:
+    return all(bloom[position // 8] & (1 << (position % 8)) for position in _bloom_positions(value, len(bloom) * 8))
+
+def _entity_term(entity_id: Any) -> str:
+    return f"e:{entity_id}"
+
+def _token_term(token: str) -> str:
+    return f"t:{token}"
+
+def part_may_match(
+    manifest: Dict[str, Any],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    users: Iterable[str] = (),
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    search: Optional[str] = None
+) -> bool:
+    """False when the manifest proves no record of the part can match.
+
+    users must each appear as user_id or target_user_id of some record;
+    entity_id and every word of search are checked against the part's
+    Bloom filter. Manifests written before a summary existed never rule a
+    part out.
+    """
+    if manifest.get("min_timestamp") is not None:
+        if end and as_utc(manifest["min_timestamp"]) > as_utc(end):
+            return False
+        if start and as_utc(manifest["max_timestamp"]) < as_utc(start):
+            return False
+    if action and "actions" in manifest and field_key(action) not in manifest["actions"]:
+        return False
+    if severity and "severity" in manifest and field_key(severity) not in manifest["severity"]:
+        return False
+    if entity_type and manifest.get("entity_types") is not None and entity_type not in manifest["entity_types"]:
+        return False
+    if manifest.get("users") is not None and not set(users) <= set(manifest["users"]):
+        return False
+    bloom = manifest.get("bloom")
+    if bloom:
+        if entity_id and not bloom_may_contain(bloom, _entity_term(entity_id)):
+            return False
+        prefixes = search_query(search)[SEARCH_FIELD].get("$all", []) if search else []
+        if not all(bloom_may_contain(bloom, _token_term(prefix)) for prefix in prefixes):
+            return False
+    return True
+
+class _ArchiveWriter:
+    """One compressed stream per part file; close() fsyncs it"""
+
+    def __init__(self, path: Path, compression: str):
+        self.raw = open(path, "wb")
+        if compression == "zstd":
+            self.stream = zstandard.ZstdCompressor(level=10).stream_writer(self.raw, closefd=False)
+        else:
+            self.stream = gzip.GzipFile(fileobj=self.raw, mode="wb")
+
+    def write(self, chunk: bytes):
+        self.stream.write(chunk)
+
+    def close(self):
+        self.stream.close()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.raw.close()
+
+def _scan_archive(path: Path, predicate: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+    """Records of a part file matching predicate; the file is decompressed as a stream"""
+    if path.name.endswith(_EXTENSIONS["zstd"]):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        raw = open(path, "rb")
+        lines = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+    else:
+        raw = lines = gzip.open(path, "rb")
+    try:
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json_util.loads(line, json_options=_ARCHIVE_JSON_OPTIONS)
+            if predicate(record):
+                records.append(record)
+        return records
+    finally:
+        raw.close()
+
+class AuditArchive:
+    """Monthly cold partitions of audit_logs.
+
+    A compaction writes every hot record of an eligible month to a new part
+    file, fsyncs it, records a manifest (counts per action and severity, so
+    statistics can be rebuilt without the records, plus the time range,
+    users, entity types and a Bloom filter of entity ids and search tokens
+    that searches use to skip the part) and only then
+    deletes the archived ids from audit_logs. Records that reach an archived month later
+    (e.g. replayed from the audit spill) go to the next part. A crash between
+    manifest and delete can archive a record twice; reads drop duplicate ids.
+    """
+
+    def __init__(
+        self,
+        db,
+        archive_dir: str,
+        hot_months: int = 3,
+        compact_interval: float = 24 * 3600,
+        batch_size: int = 5000,
+        max_search_months: int = 12
+    ):
+        self.collection = db.audit_logs
+        self.manifests = db.audit_archives
+        self.archive_dir = Path(archive_dir)
+        self.hot_months = hot_months
+        self.compact_interval = compact_interval
+        self.batch_size = batch_size
+        # Most months whose files one search may read
+        self.max_search_months = max_search_months
+        self.compression = "zstd" if ZSTD_AVAILABLE else "gzip"
+        self._task: Optional[asyncio.Task] = None
+        self._holder = f"{socket.gethostname()}:{os.getpid()}"
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """Records before this instant belong to cold months"""
+        current = month_key(now or datetime.now(timezone.utc))
+        return month_bounds(shift_months(current, -(self.hot_months - 1)))[0]
+
+    async def archivable_months(self, now: Optional[datetime] = None) -> List[str]:
+        months = await self.collection.aggregate([
+            {"$match": {"timestamp": {"$lt": self.cutoff(now)}}},
+            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": "$timestamp"}}}},
+            {"$sort": {"_id": 1}}
+        ]).to_list(None)
+        return [month["_id"] for month in months]
+
+    async def archive_month(self, key: str) -> Optional[Dict[str, Any]]:
+        """Move the hot records of one month into a new archive part"""
+        start, end = month_bounds(key)
+        part = await self.manifests.count_documents({"month": key})
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self.archive_dir / f"audit-{key}.{part:03d}{_EXTENSIONS[self.compression]}"
+        temporary = path.with_name(path.name + ".tmp")
+
+        ids: List[str] = []
+        actions: Dict[str, Dict[str, Any]] = {}
+        severity: Dict[str, int] = {}
+        users = set()
+        entity_types = set()
+        terms = set()
+        earliest: Optional[datetime] = None
+        latest: Optional[datetime] = None
+        writer = _ArchiveWriter(temporary, self.compression)
+        try:
+            cursor = self.collection.find({"timestamp": {"$gte": start, "$lt": end}}, {"_id": 0}).sort([("timestamp", -1), ("id", -1)])
+            async for batch in iter_batches(cursor, self.batch_size):
+                for record in batch:
+                    ids.append(record["id"])
+                    action = actions.setdefault(field_key(record.get("action")), {
+                        "name": str(record.get("action") or "unknown"),
+                        "count": 0,
+                        "latest": record["timestamp"]
+                    })
+                    action["count"] += 1
+                    action["latest"] = max(action["latest"], record["timestamp"])
+                    level = field_key(record.get("severity"))
+                    severity[level] = severity.get(level, 0) + 1
+                    users.update(record[field] for field in ("user_id", "target_user_id") if record.get(field))
+                    entity_types.add(record.get("entity_type"))
+                    if record.get("entity_id"):
+                        terms.add(_entity_term(record["entity_id"]))
+                    tokens = record.get(SEARCH_FIELD) or search_tokens("audit_logs", record)
+                    terms.update(_token_term(token) for token in tokens)
+                    earliest = min(earliest or record["timestamp"], record["timestamp"])
+                    latest = max(latest or record["timestamp"], record["timestamp"])
+                chunk = "".join(json_util.dumps(record) + "\n" for record in batch).encode("utf-8")
+                # Compression runs off the event loop
+                await asyncio.to_thread(writer.write, chunk)
+        finally:
+            await asyncio.to_thread(writer.close)
+        if not ids:
+            temporary.unlink()
+            return None
+        temporary.rename(path)
+
+        manifest = {
+            "_id": f"{key}.{part:03d}",
+            "month": key,
+            "part": part,
+            "path": str(path),
+            "compression": self.compression,
+            "count": len(ids),
+            "bytes": path.stat().st_size,
+            "actions": actions,
+            "severity": severity,
+            # Lets searches skip parts without reading them
+            "min_timestamp": earliest,
+            "max_timestamp": latest,
+            "users": sorted(users) if len(users) <= MAX_PART_VALUES else None,
+            "entity_types": sorted(entity_types, key=str) if len(entity_types) <= MAX_PART_VALUES else None,
+            "bloom": bloom_filter(terms),
+            "created_at": datetime.now(timezone.utc)
+        }
+        await self.manifests.insert_one(manifest)
+        for offset in range(0, len(ids), self.batch_size):
+            # The month bounds keep each delete on the timestamp index
+            await self.collection.delete_many({
+                "timestamp": {"$gte": start, "$lt": end},
+                "id": {"$in": ids[offset:offset + self.batch_size]}
+            })
+        logger.info(f"Archived {len(ids)} audit records of {key} to {path}")
+        return manifest
+
+    async def _acquire_lease(self) -> bool:
+        """Let a single worker compact at a time; the lease expires if its holder dies"""
+        now = datetime.now(timezone.utc)
+        try:
+            await self.manifests.update_one(
+                {"_id": _LEASE_ID, "expires_at": {"$lt": now}},
+                {"$set": {"holder": self._holder, "expires_at": now + timedelta(seconds=_LEASE_SECONDS)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def compact(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Archive every month older than the hot window"""
+        if not await self._acquire_lease():
+            return []
+        archived = []
+        try:
+            for key in await self.archivable_months(now):
+                manifest = await self.archive_month(key)
+                if manifest:
+                    archived.append(manifest)
+        finally:
+            await self.manifests.delete_one({"_id": _LEASE_ID, "holder": self._holder})
+        return archived
+
+    async def search(
+        self,
+        predicate: Callable[[Dict[str, Any]], bool],
+        limit: int,
+        skip: int = 0,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Archived records matching predicate, newest first.
+
+        Only months in [start, end] are considered, parts whose manifest
+        rules out a match (see part_may_match; where holds its field
+        arguments) are not read, and at most max_search_months months are read.
+        """
+        months = await self.manifests.distinct("month")
+        results: List[Dict[str, Any]] = []
+        scanned = 0
+        for key in sorted(months, reverse=True):
+            month_start, month_end = month_bounds(key)
+            if (start and month_end <= as_utc(start)) or (end and month_start > as_utc(end)):
+                continue
+            parts = await self.manifests.find({"month": key}).sort("part", 1).to_list(None)
+            parts = [manifest for manifest in parts if part_may_match(manifest, start, end, **(where or {}))]
+            if not parts:
+                continue
+            if scanned >= self.max_search_months:
+                logger.info(f"Audit archive search stopped after {scanned} months")
+                break
+            scanned += 1
+            records: Dict[str, Dict[str, Any]] = {}
+            for manifest in parts:
+                path = Path(manifest["path"])
+                try:
+                    archived = await asyncio.to_thread(_scan_archive, path, predicate)
+                except Exception as e:
+                    # Missing (e.g. written on another host), corrupt, or zstd
+                    # without the zstandard package: serve what can be read
+                    logger.error(f"Skipping unreadable audit archive part {path}: {e}")
+                    continue
+                for record in archived:
+                    records[record["id"]] = record
+            ordered = sorted(records.values(), key=lambda r: (as_utc(r["timestamp"]), r["id"]), reverse=True)
+            if skip >= len(ordered):
+                skip -= len(ordered)
+                continue
+            results.extend(ordered[skip:skip + limit - len(results)])
+            skip = 0
+            if len(results) >= limit:
+                break
+        return results
+
+    async def totals(self) -> Dict[str, Any]:
+        """Per-action and per-severity counts of everything archived"""
+        actions: Dict[str, Dict[str, Any]] = {}
+        severity: Dict[str, int] = {}
+        async for manifest in self.manifests.find({"month": {"$exists": True}}, {"actions": 1, "severity": 1}):
+            for action, stats in manifest.get("actions", {}).items():
+                total = actions.setdefault(action, {"name": stats.get("name", action), "count": 0, "latest": stats["latest"]})
+                total["count"] += stats["count"]
+                total["latest"] = max(total["latest"], stats["latest"])
+            for level, count in manifest.get("severity", {}).items():
+                severity[level] = severity.get(level, 0) + count
+        return {"actions": actions, "severity": severity}
+
+    async def start(self):
+        if self._task is None and self.compact_interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.compact()
+            except Exception as e:
+                logger.error(f"Audit archive compaction failed: {e}")
+            await asyncio.sleep(self.compact_interval)
+
+def main():
+    import argparse
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("compact", "list"))
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    if not os.environ.get('AUDIT_ARCHIVE_DIR'):
+        parser.error("AUDIT_ARCHIVE_DIR is not set; audit archiving is disabled")
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    archive = AuditArchive(
+        client[os.environ['DB_NAME']],
+        os.environ['AUDIT_ARCHIVE_DIR'],
+        hot_months=int(os.environ.get('AUDIT_HOT_MONTHS', '3'))
+    )
+
+    async def run():
+        if args.command == "compact":
+            for manifest in await archive.compact():
+                print(f"{manifest['_id']}: {manifest['count']} records, {manifest['bytes']} bytes -> {manifest['path']}")
+        else:
+            async for manifest in archive.manifests.find({"month": {"$exists": True}}).sort("_id", 1):
+                print(f"{manifest['_id']}: {manifest['count']} records, {manifest['bytes']} bytes ({manifest['compression']})")
+
+    try:
+        asyncio.run(run())
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
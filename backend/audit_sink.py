@@ -0,0 +1,286 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import timezone
+from pathlib import Path
+import asyncio
+import logging
+import os
+import re
+import time
+from bson import json_util
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling the flusher to drain and exit
+_STOP = object()
+
+# Duplicate key: the record is already stored
+_DUPLICATE_KEY = 11000
+
+# Spilled timestamps are read back as aware UTC datetimes, like fresh records
+_SPILL_JSON_OPTIONS = json_util.JSONOptions(tz_aware=True, tzinfo=timezone.utc)
+
+# audit-spill-<writer pid>.jsonl, renamed to
+# audit-spill-<writer pid>.jsonl.<claiming pid>.<ns>.replaying while replayed
+_SPILL_NAME = re.compile(r"audit-spill-(\d+)\.jsonl(?:\.(\d+)\.\d+)?(?:\.replaying)?$")
+
+class AuditSink:
+    """Write-behind sink for audit records.
+
+    log_action() queues records without waiting on Mongo; a background task
+    writes them with insert_many(ordered=False) once batch_size records are
+    queued or flush_interval has passed. Records that cannot be written
+    (Mongo down, or slower than write_timeout) or that arrive while the
+    queue is full are appended to a JSON-lines spill file and fsynced. The
+    file I/O runs in a thread: the writer awaits it, and records overflowing
+    the queue are handed to a spill task so submit() never touches disk.
+    Spill files are replayed with idempotent upserts keyed by record id once
+    writes succeed again.
+
+    Each worker appends to its own spill file and replays only files it
+    owns: its own, and those of workers that have exited, which it first
+    claims with an atomic rename so no two workers read the same file.
+    """
+
+    def __init__(
+        self,
+        collection,
+        spill_dir: str,
+        after_write: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+        max_queue: int = 20000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        write_timeout: float = 2.0,
+        replay_interval: float = 30.0
+    ):
+        self.collection = collection
+        self.spill_dir = Path(spill_dir)
+        self.after_write = after_write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_timeout = write_timeout
+        self.replay_interval = replay_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._overflow: List[Dict[str, Any]] = []
+        self._overflow_task: Optional[asyncio.Task] = None
+        # Serializes appends to the spill file and claiming it for replay
+        self._spill_lock = asyncio.Lock()
+        self._spill_path = self.spill_dir / f"audit-spill-{os.getpid()}.jsonl"
+        self._stats = {
+            "written": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write everything still queued, then stop the background task"""
+        if self._task is not None:
+            await self.queue.put(_STOP)
+            await self._task
+            self._task = None
+        if self._overflow_task is not None:
+            await self._overflow_task
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """Queue a record; returns False when it had to be spilled because the queue is full"""
+        try:
+            self.queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            self._overflow.append(record)
+            if self._overflow_task is None:
+                self._overflow_task = asyncio.create_task(self._spill_overflow())
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "spill_files": len(self._spill_files())
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_replay = loop.time()
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = await asyncio.wait_for(self.queue.get(), self.replay_interval)
+            except asyncio.TimeoutError:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                batch.append(item)
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    try:
+                        if timeout > 0:
+                            item = await asyncio.wait_for(self.queue.get(), timeout)
+                        else:
+                            item = self.queue.get_nowait()
+                    except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+            healthy = await self._write(batch) if batch else True
+            if healthy and loop.time() >= next_replay:
+                next_replay = loop.time() + self.replay_interval
+                await self._replay()
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        """Insert one batch; returns False when Mongo failed and records were spilled"""
+        started = time.perf_counter()
+        written = batch
+        healthy = True
+        try:
+            await asyncio.wait_for(self.collection.insert_many(batch, ordered=False), self.write_timeout)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            failed = {error["index"] for error in errors if error.get("code") != _DUPLICATE_KEY}
+            written = [record for index, record in enumerate(batch) if index not in failed]
+            await self._spill([batch[index] for index in sorted(failed)])
+            healthy = not failed
+        except Exception as e:
+            # Timed out or failed outright; replay upserts by id, so records
+            # that did reach Mongo are not duplicated
+            logger.error(f"Failed to write {len(batch)} audit records, spilling to disk: {e}")
+            await self._spill(batch)
+            return False
+        finally:
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["last_flush_ms"] = (time.perf_counter() - started) * 1000
+
+        self._stats["written"] += len(written)
+        await self._after_write(written)
+        return healthy
+
+    async def _after_write(self, records: List[Dict[str, Any]]):
+        if self.after_write and records:
+            try:
+                await self.after_write(records)
+            except Exception as e:
+                logger.error(f"Audit post-write hook failed: {e}")
+
+    async def _spill_overflow(self):
+        """Spill records that arrived while the queue was full"""
+        while self._overflow:
+            records, self._overflow = self._overflow, []
+            await self._spill(records)
+        self._overflow_task = None
+
+    async def _spill(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        async with self._spill_lock:
+            await asyncio.to_thread(self._append_spill, records)
+
+    def _append_spill(self, records: List[Dict[str, Any]]):
+        """Append records to this worker's spill file and fsync it"""
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._spill_path, "a", encoding="utf-8") as spill:
+                for record in records:
+                    record.pop("_id", None)
+                    spill.write(json_util.dumps(record) + "\n")
+                spill.flush()
+                os.fsync(spill.fileno())
+            self._stats["spilled"] += len(records)
+        except OSError as e:
+            logger.critical(f"Lost {len(records)} audit records, spill to {self._spill_path} failed: {e}")
+
+    def _spill_files(self) -> List[Path]:
+        if not self.spill_dir.is_dir():
+            return []
+        return sorted(self.spill_dir.glob("audit-spill-*.jsonl*"))
+
+    @staticmethod
+    def _owner(path: Path) -> Optional[int]:
+        """Pid of the worker a spill file belongs to: its claimer, else its writer"""
+        match = _SPILL_NAME.match(path.name)
+        if not match:
+            return None
+        return int(match.group(2) or match.group(1))
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _claim(self, path: Path) -> Optional[Path]:
+        """Rename a spill file to a name owned by this worker; None if another worker got it first"""
+        base = path.name.split(".jsonl")[0] + ".jsonl"
+        claimed = path.with_name(f"{base}.{os.getpid()}.{time.time_ns()}.replaying")
+        try:
+            path.rename(claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    async def _replay(self):
+        """Upsert spilled records; a file is removed only once all of it is stored"""
+        pid = os.getpid()
+        for path in self._spill_files():
+            owner = self._owner(path)
+            if owner is None or (owner != pid and self._alive(owner)):
+                # Another live worker is appending to or replaying it
+                continue
+            try:
+                if path.suffix != ".replaying" or owner != pid:
+                    # New spills go to a fresh file while this one is replayed
+                    async with self._spill_lock:
+                        path = self._claim(path)
+                    if path is None:
+                        continue
+                records = await asyncio.to_thread(self._read_spill, path)
+                for start in range(0, len(records), self.batch_size):
+                    chunk = records[start:start + self.batch_size]
+                    result = await asyncio.wait_for(self.collection.bulk_write([
+                        UpdateOne({"id": record["id"]}, {"$setOnInsert": record}, upsert=True)
+                        for record in chunk
+                    ], ordered=False), self.write_timeout)
+                    await self._after_write([chunk[index] for index in result.upserted_ids])
+                    self._stats["replayed"] += result.upserted_count
+                path.unlink()
+            except Exception as e:
+                logger.error(f"Failed to replay audit spill file {path}: {e}")
+                return
+
+    @staticmethod
+    def _read_spill(path: Path) -> List[Dict[str, Any]]:
+        records = []
+        with open(path, encoding="utf-8") as spill:
+            for line in spill:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json_util.loads(line, json_options=_SPILL_JSON_OPTIONS))
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    logger.error(f"Skipping unreadable audit spill line in {path}")
+        return records
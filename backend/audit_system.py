@@ -3,35 +3,47 @@ from typing import Dict, Any, Optional, List
 from pydantic import BaseModel, Field
 import uuid
 import json
+import logging
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from audit_archive import AuditArchive, as_utc, field_key
+from audit_sink import AuditSink
+from pagination import decode_cursor, keyset_query, keyset_sort, next_cursor
+from search_index import SEARCH_FIELD, matches as matches_search, search_query, search_tokens
+from serialization import convert_objectids_to_strings
 
-# Utility function to convert ObjectIds and datetime objects to strings
-def convert_objectids_to_strings(data):
-    """Recursively convert MongoDB ObjectIds and datetime objects to strings for JSON serialization"""
-    from datetime import datetime, date
-    
-    if isinstance(data, list):
-        return [convert_objectids_to_strings(item) for item in data]
-    elif isinstance(data, dict):
-        converted = {}
-        for key, value in data.items():
-            if hasattr(value, '__class__') and value.__class__.__name__ == 'ObjectId':
-                converted[key] = str(value)
-            elif isinstance(value, datetime):
-                converted[key] = value.isoformat()
-            elif isinstance(value, date):
-                converted[key] = value.isoformat()
-            elif isinstance(value, (dict, list)):
-                converted[key] = convert_objectids_to_strings(value)
-            else:
-                converted[key] = value
-        return converted
-    elif isinstance(data, datetime):
-        return data.isoformat()
-    elif isinstance(data, date):
-        return data.isoformat()
-    else:
-        return data
+logger = logging.getLogger(__name__)
+
+# Hourly audit activity buckets are kept this long for rolling windows
+AUDIT_ROLLUP_RETENTION_DAYS = 8
+
+# Daily buckets (per action and severity) feed the longer-range statistics
+AUDIT_DAILY_ROLLUP_RETENTION_DAYS = 400
+
+# "sync" awaits every insert; "async" queues records for the batched AuditSink
+AUDIT_WRITE_MODES = ("sync", "async")
+
+# Severities that are always written synchronously, whatever the write mode
+SYNC_SEVERITIES = frozenset({"critical"})
+
+# (collection, keys, options) for every audit index; also registered in db_indexes
+AUDIT_INDEXES = [
+    # Spill replay upserts by id, and a retried batch must not store a record twice
+    ("audit_logs", "id", {"unique": True}),
+    ("audit_logs", "timestamp", {}),
+    ("audit_logs", "user_id", {}),
+    ("audit_logs", "action", {}),
+    ("audit_logs", "entity_type", {}),
+    ("audit_logs", "entity_id", {}),
+    ("audit_logs", "severity", {}),
+    ("audit_logs", [("action", 1), ("timestamp", -1)], {}),
+    ("audit_logs", [("user_id", 1), ("timestamp", -1)], {}),
+    ("audit_logs", [("timestamp", -1), ("id", -1)], {}),
+    # Hourly and daily rollup buckets expire after their retention windows
+    ("audit_rollups", "hour", {"expireAfterSeconds": AUDIT_ROLLUP_RETENTION_DAYS * 24 * 3600}),
+    ("audit_rollups", "day", {"expireAfterSeconds": AUDIT_DAILY_ROLLUP_RETENTION_DAYS * 24 * 3600}),
+    ("audit_archives", "month", {}),
+]
 
 class AuditAction:
     # User actions
@@ -104,11 +116,61 @@ class AuditFilter(BaseModel):
     search_term: Optional[str] = None
     limit: int = 50
     offset: int = 0
+    cursor: Optional[str] = None  # continuation token; replaces offset when set
 
 class AuditSystem:
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        write_mode: str = "sync",
+        spill_dir: str = "audit_spill",
+        archive_dir: Optional[str] = None,
+        hot_months: int = 3,
+        archive_interval: float = 24 * 3600,
+        archive_max_months: int = 12,
+        read_db: Optional[AsyncIOMotorDatabase] = None,
+        **sink_options
+    ):
+        if write_mode not in AUDIT_WRITE_MODES:
+            raise ValueError(f"Unknown audit write mode: {write_mode}")
         self.db = db
         self.collection = db.audit_logs
+        # Log queries; may read from secondaries
+        self.reads = read_db.audit_logs if read_db is not None else self.collection
+        # Pre-aggregated counters: one "totals" document plus hourly and daily buckets
+        self.rollups = db.audit_rollups
+        self.write_mode = write_mode
+        self.sink: Optional[AuditSink] = None
+        if write_mode == "async":
+            self.sink = AuditSink(self.collection, spill_dir, after_write=self._record_rollups, **sink_options)
+        # Months older than hot_months are compacted into compressed archives
+        self.archive: Optional[AuditArchive] = None
+        if archive_dir:
+            self.archive = AuditArchive(
+                db,
+                archive_dir,
+                hot_months=hot_months,
+                compact_interval=archive_interval,
+                max_search_months=archive_max_months
+            )
+    
+    async def start(self):
+        if self.sink:
+            await self.sink.start()
+        if self.archive:
+            await self.archive.start()
+    
+    async def stop(self):
+        """Write queued records before shutdown"""
+        if self.archive:
+            await self.archive.stop()
+        if self.sink:
+            await self.sink.stop()
+    
+    def writer_stats(self) -> Dict[str, Any]:
+        if not self.sink:
+            return {"write_mode": self.write_mode}
+        return {"write_mode": self.write_mode, **self.sink.stats()}
         
     async def log_action(
         self,
@@ -148,10 +210,80 @@ class AuditSystem:
             severity=severity
         )
         
+        record = audit_record.model_dump()
+        record[SEARCH_FIELD] = search_tokens("audit_logs", record)
+        
+        # Queue for the batched writer unless the event must be durable before returning
+        if self.sink and self.sink.running and severity not in SYNC_SEVERITIES:
+            self.sink.submit(record)
+            return audit_record.id
+        
         # Insert as immutable record
-        result = await self.collection.insert_one(audit_record.model_dump())
+        await self.collection.insert_one(record)
+        await self._record_rollups([record])
         return audit_record.id
     
+    @staticmethod
+    def _rollup_key(value: Optional[str]) -> str:
+        """Make an action/severity name safe to use as a field name"""
+        return field_key(value)
+    
+    @staticmethod
+    def _hour_bucket(timestamp: datetime) -> datetime:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    
+    @staticmethod
+    def _day_bucket(timestamp: datetime) -> datetime:
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    async def _record_rollups(self, records: List[Dict[str, Any]]):
+        """Increment the totals, hourly and daily counters for a batch of stored audit records"""
+        increments: Dict[str, int] = {"total": len(records)}
+        latest: Dict[str, datetime] = {}
+        # Keys replace "." in action names; the original name is kept for display
+        names: Dict[str, str] = {}
+        hours: Dict[datetime, int] = {}
+        days: Dict[datetime, Dict[str, int]] = {}
+        for record in records:
+            action_key = self._rollup_key(record.get("action"))
+            severity_key = self._rollup_key(record.get("severity"))
+            count_field = f"actions.{action_key}.count"
+            severity_field = f"severity.{severity_key}"
+            increments[count_field] = increments.get(count_field, 0) + 1
+            increments[severity_field] = increments.get(severity_field, 0) + 1
+            names[f"actions.{action_key}.name"] = str(record.get("action") or "unknown")
+            latest_field = f"actions.{action_key}.latest"
+            if latest_field not in latest or record["timestamp"] > latest[latest_field]:
+                latest[latest_field] = record["timestamp"]
+            hour = self._hour_bucket(record["timestamp"])
+            hours[hour] = hours.get(hour, 0) + 1
+            day = days.setdefault(self._day_bucket(record["timestamp"]), {"count": 0})
+            for field in ("count", count_field, severity_field):
+                day[field] = day.get(field, 0) + 1
+        
+        operations = [UpdateOne({"_id": "totals"}, {"$inc": increments, "$max": latest, "$set": names}, upsert=True)]
+        operations.extend(
+            UpdateOne(
+                {"_id": hour.strftime("%Y-%m-%dT%H")},
+                {"$inc": {"count": count}, "$setOnInsert": {"hour": hour}},
+                upsert=True
+            )
+            for hour, count in hours.items()
+        )
+        operations.extend(
+            UpdateOne(
+                {"_id": day.strftime("day:%Y-%m-%d")},
+                {"$inc": counts, "$setOnInsert": {"day": day}},
+                upsert=True
+            )
+            for day, counts in days.items()
+        )
+        try:
+            await self.rollups.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # The audit record itself is stored; rebuild_statistics() repairs counters
+            logger.error(f"Failed to update audit rollups: {e}")
+    
     def _sanitize_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Remove sensitive fields from audit logs"""
         sensitive_fields = {"password", "token", "secret", "key", "card_number", "cvv"}
@@ -173,6 +305,19 @@ class AuditSystem:
         user_role: str = "admin"
     ) -> List[Dict[str, Any]]:
         """Get audit logs with filtering and searching"""
+        page = await self.get_audit_logs_page(filters, user_role)
+        return page["logs"]
+    
+    async def get_audit_logs_page(
+        self,
+        filters: AuditFilter,
+        user_role: str = "admin"
+    ) -> Dict[str, Any]:
+        """Get one page of audit logs plus the cursor for the next page.
+        
+        Pages are ordered by (timestamp, id) descending; passing next_cursor
+        back as filters.cursor continues with an index seek instead of a skip.
+        """
         
         # Build MongoDB query
         query = {}
@@ -199,13 +344,9 @@ class AuditSystem:
                 date_filter["$lte"] = filters.end_date
             query["timestamp"] = date_filter
             
-        # Text search across multiple fields
-        if filters.search_term:
-            query["$or"] = [
-                {"action": {"$regex": filters.search_term, "$options": "i"}},
-                {"entity_type": {"$regex": filters.search_term, "$options": "i"}},
-                {"metadata.description": {"$regex": filters.search_term, "$options": "i"}}
-            ]
+        # Prefix search across action, entity type and description (admins only)
+        if filters.search_term and user_role == "admin":
+            query.update(search_query(filters.search_term))
         
         # Role-based filtering
         if user_role != "admin":
@@ -215,69 +356,217 @@ class AuditSystem:
                 {"target_user_id": filters.user_id}
             ]
             
-        # Execute query with pagination
-        cursor = self.collection.find(query)
-        cursor = cursor.sort("timestamp", -1)  # Most recent first
-        cursor = cursor.skip(filters.offset).limit(filters.limit)
+        # Execute query with pagination, most recent first
+        position = decode_cursor(filters.cursor) if filters.cursor else None
+        cursor = self.reads.find(keyset_query(query, "timestamp", -1, position), {SEARCH_FIELD: 0})
+        cursor = cursor.sort(keyset_sort("timestamp", -1))
+        if position is None:
+            cursor = cursor.skip(filters.offset)
+        cursor = cursor.limit(filters.limit)
         
         results = await cursor.to_list(None)
         
+        # Older matches continue in the archived months. Reading archives is
+        # costly, so other roles only get it for a bounded date range
+        if self.archive and len(results) < filters.limit and (user_role == "admin" or filters.start_date):
+            skip = 0
+            if position is None and not results and filters.offset:
+                skip = max(0, filters.offset - await self.reads.count_documents(query))
+            end = filters.end_date
+            if position and (end is None or as_utc(position[0]) < as_utc(end)):
+                end = position[0]
+            archived = await self.archive.search(
+                self._record_filter(filters, user_role, position),
+                filters.limit - len(results),
+                skip=skip,
+                start=filters.start_date,
+                end=end,
+                where={
+                    "users": [user_id for user_id in (filters.user_id, filters.target_user_id) if user_id],
+                    "action": filters.action,
+                    "entity_type": filters.entity_type,
+                    "severity": filters.severity,
+                    "entity_id": filters.entity_id,
+                    "search": filters.search_term if user_role == "admin" else None
+                }
+            )
+            for record in archived:
+                record.pop(SEARCH_FIELD, None)
+            results += archived
+        
+        logs_next_cursor = next_cursor(results, "timestamp", filters.limit)
+        
         # Convert MongoDB ObjectIds to strings for JSON serialization
         results = convert_objectids_to_strings(results)
         
-        return results
+        return {"logs": results, "next_cursor": logs_next_cursor}
     
-    async def get_audit_statistics(self) -> Dict[str, Any]:
-        """Get audit statistics for admin dashboard"""
+    @staticmethod
+    def _record_filter(filters: AuditFilter, user_role: str, position: Optional[List[Any]]):
+        """Python equivalent of the get_audit_logs_page query, for archived records"""
+        equals = {
+            field: getattr(filters, field)
+            for field in ("user_id", "target_user_id", "action", "entity_type", "entity_id", "severity")
+            if getattr(filters, field)
+        }
+        search = filters.search_term if user_role == "admin" else None
+        after = (as_utc(position[0]), position[1]) if position else None
         
-        pipeline = [
-            {
-                "$group": {
-                    "_id": "$action",
-                    "count": {"$sum": 1},
-                    "latest": {"$max": "$timestamp"}
-                }
-            },
-            {"$sort": {"count": -1}}
-        ]
+        def matches(record: Dict[str, Any]) -> bool:
+            if any(record.get(field) != value for field, value in equals.items()):
+                return False
+            if user_role != "admin" and filters.user_id not in (record.get("user_id"), record.get("target_user_id")):
+                return False
+            timestamp = as_utc(record["timestamp"])
+            if filters.start_date and timestamp < as_utc(filters.start_date):
+                return False
+            if filters.end_date and timestamp > as_utc(filters.end_date):
+                return False
+            if after and (timestamp, record.get("id")) >= after:
+                return False
+            # Records archived before search tokens existed are tokenized on the fly
+            if search and not matches_search(record.get(SEARCH_FIELD) or search_tokens("audit_logs", record), search):
+                return False
+            return True
         
-        action_stats = await self.collection.aggregate(pipeline).to_list(None)
+        return matches
+    
+    async def get_audit_statistics(self) -> Dict[str, Any]:
+        """Get audit statistics for admin dashboard from the pre-aggregated rollups"""
         
-        # Get severity distribution
-        severity_pipeline = [
-            {
-                "$group": {
-                    "_id": "$severity",
-                    "count": {"$sum": 1}
-                }
-            }
-        ]
+        totals = await self.rollups.find_one({"_id": "totals"})
+        if totals is None:
+            totals = await self.rebuild_statistics()
         
-        severity_stats = await self.collection.aggregate(severity_pipeline).to_list(None)
+        action_stats = sorted(
+            (
+                {"_id": stats.get("name", action), "count": stats.get("count", 0), "latest": stats.get("latest")}
+                for action, stats in totals.get("actions", {}).items()
+            ),
+            key=lambda item: item["count"],
+            reverse=True
+        )
+        severity_stats = [
+            {"_id": severity, "count": count}
+            for severity, count in totals.get("severity", {}).items()
+        ]
         
-        # Get total count
-        total_logs = await self.collection.count_documents({})
+        # Recent activity (last 24 hours, at hourly granularity)
+        recent_cutoff = self._hour_bucket(datetime.now(timezone.utc) - timedelta(hours=24))
+        recent_buckets = await self.rollups.find(
+            {"hour": {"$gt": recent_cutoff}},
+            {"count": 1}
+        ).to_list(None)
+        recent_activity = sum(bucket.get("count", 0) for bucket in recent_buckets)
         
-        # Get recent activity (last 24 hours)
-        recent_cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
-        recent_activity = await self.collection.count_documents({
-            "timestamp": {"$gte": recent_cutoff}
-        })
+        # Daily activity for the last 30 days
+        daily_cutoff = self._day_bucket(datetime.now(timezone.utc) - timedelta(days=30))
+        daily_buckets = await self.rollups.find(
+            {"day": {"$gt": daily_cutoff}},
+            {"count": 1, "day": 1}
+        ).sort("day", 1).to_list(None)
+        daily_activity = [
+            {"date": bucket["day"].strftime("%Y-%m-%d"), "count": bucket.get("count", 0)}
+            for bucket in daily_buckets
+        ]
         
         return {
-            "total_audit_logs": total_logs,
+            "total_audit_logs": totals.get("total", 0),
             "recent_activity_24h": recent_activity,
+            "daily_activity": daily_activity,
             "action_distribution": action_stats,
             "severity_distribution": severity_stats
         }
     
+    async def rebuild_statistics(self) -> Dict[str, Any]:
+        """Recompute the rollups from audit_logs and the archive manifests (initial backfill or repair)"""
+        
+        # Read from the primary: the totals written here replace the live
+        # counters, so they must include every record already counted
+        action_stats = await self.collection.aggregate([
+            {"$group": {"_id": "$action", "count": {"$sum": 1}, "latest": {"$max": "$timestamp"}}}
+        ]).to_list(None)
+        severity_stats = await self.collection.aggregate([
+            {"$group": {"_id": "$severity", "count": {"$sum": 1}}}
+        ]).to_list(None)
+        
+        archived = await self.archive.totals() if self.archive else {"actions": {}, "severity": {}}
+        actions = archived["actions"]
+        for item in action_stats:
+            key = self._rollup_key(item["_id"])
+            name = str(item["_id"] or "unknown")
+            if key in actions:
+                actions[key] = {"name": name, "count": actions[key]["count"] + item["count"], "latest": max(actions[key]["latest"], item["latest"])}
+            else:
+                actions[key] = {"name": name, "count": item["count"], "latest": item["latest"]}
+        severity = archived["severity"]
+        for item in severity_stats:
+            key = self._rollup_key(item["_id"])
+            severity[key] = severity.get(key, 0) + item["count"]
+        
+        totals = {
+            "_id": "totals",
+            "total": sum(action["count"] for action in actions.values()),
+            "actions": actions,
+            "severity": severity,
+            "rebuilt_at": datetime.now(timezone.utc)
+        }
+        await self.rollups.replace_one({"_id": "totals"}, totals, upsert=True)
+        
+        retention_cutoff = datetime.now(timezone.utc) - timedelta(days=AUDIT_ROLLUP_RETENTION_DAYS)
+        hourly = await self.collection.aggregate([
+            {"$match": {"timestamp": {"$gte": retention_cutoff}}},
+            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%dT%H", "date": "$timestamp"}}, "count": {"$sum": 1}}}
+        ]).to_list(None)
+        if hourly:
+            await self.rollups.bulk_write([
+                UpdateOne(
+                    {"_id": bucket["_id"]},
+                    {"$set": {
+                        "count": bucket["count"],
+                        "hour": datetime.strptime(bucket["_id"], "%Y-%m-%dT%H").replace(tzinfo=timezone.utc)
+                    }},
+                    upsert=True
+                )
+                for bucket in hourly
+            ], ordered=False)
+        
+        # Daily buckets for the days still in the hot collection
+        daily_cutoff = datetime.now(timezone.utc) - timedelta(days=AUDIT_DAILY_ROLLUP_RETENTION_DAYS)
+        daily = await self.collection.aggregate([
+            {"$match": {"timestamp": {"$gte": daily_cutoff}}},
+            {"$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                    "action": "$action",
+                    "severity": "$severity"
+                },
+                "count": {"$sum": 1}
+            }}
+        ]).to_list(None)
+        days: Dict[str, Dict[str, int]] = {}
+        for bucket in daily:
+            counts = days.setdefault(bucket["_id"]["day"], {"count": 0})
+            action_field = f"actions.{self._rollup_key(bucket['_id'].get('action'))}.count"
+            severity_field = f"severity.{self._rollup_key(bucket['_id'].get('severity'))}"
+            for field in ("count", action_field, severity_field):
+                counts[field] = counts.get(field, 0) + bucket["count"]
+        if days:
+            await self.rollups.bulk_write([
+                UpdateOne(
+                    {"_id": f"day:{day}"},
+                    {"$set": {
+                        **counts,
+                        "day": datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+                    }},
+                    upsert=True
+                )
+                for day, counts in days.items()
+            ], ordered=False)
+        
+        return totals
+    
     async def ensure_indexes(self):
         """Create indexes for efficient querying"""
-        await self.collection.create_index("timestamp")
-        await self.collection.create_index("user_id")
-        await self.collection.create_index("action")
-        await self.collection.create_index("entity_type")
-        await self.collection.create_index("entity_id")
-        await self.collection.create_index("severity")
-        await self.collection.create_index([("action", 1), ("timestamp", -1)])
-        await self.collection.create_index([("user_id", 1), ("timestamp", -1)])
+        for collection, keys, options in AUDIT_INDEXES:
+            await self.db[collection].create_index(keys, **options)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Serialization micro-benchmark
+Compares the previous recursive ObjectId/datetime conversion + JSON encoding
+with the shared serialization layer on synthetic ride documents.
+
+Usage: python bench_serialization.py [--documents 5000] [--repeat 5]
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from serialization import ORJSON_AVAILABLE, convert_objectids_to_strings, dumps
+
+def legacy_convert(data):
+    """The converter previously duplicated in server.py, audit_system.py and admin_crud.py"""
+    from datetime import datetime, date
+
+    if isinstance(data, list):
+        return [legacy_convert(item) for item in data]
+    elif isinstance(data, dict):
+        converted = {}
+        for key, value in data.items():
+            if hasattr(value, '__class__') and value.__class__.__name__ == 'ObjectId':
+                converted[key] = str(value)
+            elif isinstance(value, datetime):
+                converted[key] = value.isoformat()
+            elif isinstance(value, date):
+                converted[key] = value.isoformat()
+            elif isinstance(value, (dict, list)):
+                converted[key] = legacy_convert(value)
+            else:
+                converted[key] = value
+        return converted
+    elif isinstance(data, datetime):
+        return data.isoformat()
+    elif isinstance(data, date):
+        return data.isoformat()
+    else:
+        return data
+
+def make_documents(count):
+    """Ride match documents shaped like the ones returned by /admin/rides"""
+    now = datetime.now(timezone.utc)
+    documents = []
+    for i in range(count):
+        documents.append({
+            "_id": ObjectId(),
+            "id": str(uuid.uuid4()),
+            "ride_request_id": str(uuid.uuid4()),
+            "rider_id": str(uuid.uuid4()),
+            "driver_id": str(uuid.uuid4()),
+            "status": "completed",
+            "pickup_location": {"latitude": 52.52 + i * 1e-5, "longitude": 13.40, "address": f"Street {i}"},
+            "dropoff_location": {"latitude": 52.50, "longitude": 13.38 + i * 1e-5, "address": f"Avenue {i}"},
+            "vehicle_type": "economy",
+            "estimated_fare": 12.5 + i % 7,
+            "accepted_at": now - timedelta(minutes=30),
+            "completed_at": now,
+            "rating": 5,
+            "comment": None
+        })
+    return documents
+
+def legacy_pipeline(documents):
+    # Previous response path: convert, then FastAPI's jsonable_encoder, then json.dumps
+    return json.dumps(jsonable_encoder(legacy_convert(documents))).encode()
+
+def shared_convert_pipeline(documents):
+    # Endpoints still returning converted dicts through FastAPI
+    return json.dumps(jsonable_encoder(convert_objectids_to_strings(documents))).encode()
+
+def direct_pipeline(documents):
+    # Endpoints returning FastJSONResponse with raw documents
+    return dumps(documents)
+
+def measure(label, func, documents, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(documents)
+        timings.append((time.perf_counter() - start) * 1000)
+    return label, statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = make_documents(args.documents)
+    assert json.loads(legacy_pipeline(documents[:50])) == json.loads(direct_pipeline(documents[:50]))
+
+    print(f"Serializing {args.documents} ride documents (median of {args.repeat} runs, orjson={'yes' if ORJSON_AVAILABLE else 'no'})")
+    results = [
+        measure("legacy convert + jsonable_encoder + json", legacy_pipeline, documents, args.repeat),
+        measure("shared convert + jsonable_encoder + json", shared_convert_pipeline, documents, args.repeat),
+        measure("FastJSONResponse dumps (raw documents)", direct_pipeline, documents, args.repeat),
+    ]
+    baseline = results[0][1]
+    for label, median_ms in results:
+        print(f"  {label:<45} {median_ms:9.1f} ms  ({baseline / median_ms:5.1f}x)")
+
+if __name__ == "__main__":
+    main()
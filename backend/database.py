@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+MongoDB client construction, read routing and connection pool metrics.
+
+One AsyncIOMotorClient per process, built from MONGO_* settings:
+
+    MONGO_MAX_POOL_SIZE                   connections per server (100)
+    MONGO_MIN_POOL_SIZE                   connections kept open (0)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS           max wait for a free connection (unset: wait for the operation timeout)
+    MONGO_MAX_IDLE_TIME_MS                close connections idle this long (unset: never)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS     (30000)
+    MONGO_COMPRESSORS                     e.g. "zstd,snappy,zlib" (unset: no compression)
+    MONGO_ANALYTICS_READ_PREFERENCE       read preference of analytics_db (secondaryPreferred)
+    MONGO_ANALYTICS_MAX_STALENESS_SECONDS skip secondaries lagging more than this (unset: no limit, min 90)
+
+get_database() is the primary handle for the request path. Heavy admin
+listings, exports and statistics use get_analytics_database(), the same
+pool with a secondary read preference. pool_metrics records how long
+operations wait to check out a connection.
+"""
+
+from typing import Any, Dict, Mapping, Optional
+from collections import deque
+import os
+import threading
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+# Read preference modes accepted by MONGO_ANALYTICS_READ_PREFERENCE
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Environment variable -> client option (all integers)
+_INT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+}
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool listener tracking checkout wait times.
+
+    pymongo calls listeners from the threads Motor runs operations on, and
+    a checkout starts and completes on the same thread, so the start time
+    is kept thread-local. Wait percentiles cover the last `window` checkouts.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._waits = deque(maxlen=window)
+        self._counts = {
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checked_out": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "pools_cleared": 0
+        }
+        self._failure_reasons: Dict[str, int] = {}
+        self._max_wait_ms = 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _waited_ms(self) -> Optional[float]:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return None if started is None else (time.perf_counter() - started) * 1000
+
+    def connection_checked_out(self, event):
+        waited = self._waited_ms()
+        with self._lock:
+            self._counts["checkouts"] += 1
+            self._counts["checked_out"] += 1
+            if waited is not None:
+                self._waits.append(waited)
+                self._max_wait_ms = max(self._max_wait_ms, waited)
+
+    def connection_check_out_failed(self, event):
+        self._waited_ms()
+        reason = str(event.reason)
+        with self._lock:
+            self._counts["checkout_failures"] += 1
+            self._failure_reasons[reason] = self._failure_reasons.get(reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._counts["checked_out"] -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self._counts["connections_created"] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._counts["connections_closed"] += 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._counts["pools_cleared"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            counts = dict(self._counts)
+            reasons = dict(self._failure_reasons)
+            max_wait = self._max_wait_ms
+
+        def percentile(fraction: float) -> float:
+            return round(waits[min(len(waits) - 1, int(len(waits) * fraction))], 3) if waits else 0.0
+
+        return {
+            **counts,
+            "open_connections": counts["connections_created"] - counts["connections_closed"],
+            "checkout_failure_reasons": reasons,
+            "wait_ms": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(max_wait, 3),
+                "window": len(waits)
+            }
+        }
+
+pool_metrics = PoolMetrics()
+
+def client_options(env: Mapping[str, str] = os.environ) -> Dict[str, Any]:
+    """Client keyword arguments from MONGO_* settings; unset settings keep the driver defaults"""
+    options: Dict[str, Any] = {}
+    for variable, option in _INT_OPTIONS.items():
+        if env.get(variable):
+            options[option] = int(env[variable])
+    if env.get("MONGO_COMPRESSORS"):
+        # The driver skips compressors whose package is missing (zstandard, python-snappy)
+        options["compressors"] = env["MONGO_COMPRESSORS"]
+    return options
+
+def analytics_read_preference(env: Mapping[str, str] = os.environ):
+    mode = env.get("MONGO_ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    max_staleness = env.get("MONGO_ANALYTICS_MAX_STALENESS_SECONDS")
+    return READ_PREFERENCES[mode](max_staleness=int(max_staleness) if max_staleness else -1)
+
+_client: Optional[AsyncIOMotorClient] = None
+_client_lock = threading.Lock()
+
+def get_client() -> AsyncIOMotorClient:
+    """The process-wide client; created on first use from MONGO_URL and client_options()"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AsyncIOMotorClient(
+                os.environ['MONGO_URL'],
+                event_listeners=[pool_metrics],
+                **client_options()
+            )
+        return _client
+
+def get_database(name: Optional[str] = None) -> AsyncIOMotorDatabase:
+    return get_client()[name or os.environ['DB_NAME']]
+
+def get_analytics_database(name: Optional[str] = None) -> AsyncIOMotorDatabase:
+    """Same pool, reading from secondaries per MONGO_ANALYTICS_READ_PREFERENCE"""
+    return get_client().get_database(name or os.environ['DB_NAME'], read_preference=analytics_read_preference())
+
+def pool_stats() -> Dict[str, Any]:
+    """Pool configuration and checkout metrics for the observability endpoint"""
+    options = get_client().options.pool_options
+    return {
+        "max_pool_size": options.max_pool_size,
+        "min_pool_size": options.min_pool_size,
+        "wait_queue_timeout_ms": options.wait_queue_timeout * 1000 if options.wait_queue_timeout else None,
+        "compressors": client_options().get("compressors"),
+        "analytics_read_preference": analytics_read_preference().mongos_mode,
+        **pool_metrics.stats()
+    }
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
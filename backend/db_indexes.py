@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Declarative index registry for the hot collections.
+
+The server applies the registry in the background on startup; creating an
+index that already exists is a no-op, so this is safe on every boot. Run
+directly to apply it or to compare it with the live database:
+
+    python db_indexes.py apply
+    python db_indexes.py report [--json]
+
+The report lists registered indexes that are missing, indexes that exist
+but are not registered, and indexes that $indexStats shows have not served
+a single operation since the server started tracking them.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import logging
+
+from audit_system import AUDIT_INDEXES
+from geo_fields import GEO_INDEXES
+from search_index import SEARCH_INDEXES
+
+logger = logging.getLogger(__name__)
+
+IndexKeys = Union[str, List[Tuple[str, Any]]]
+
+# (collection, keys, options), grouped by the query shapes they serve
+INDEXES: List[Tuple[str, IndexKeys, Dict[str, Any]]] = [
+    # Auth and user lookups, online driver counts, keyset listing
+    ("users", "id", {}),
+    ("users", "email", {}),
+    ("users", [("role", 1), ("is_online", 1)], {}),
+    ("users", [("created_at", -1), ("id", -1)], {}),
+
+    # Pending request expiry, per-rider and per-status windows, admin listing
+    ("ride_requests", "id", {}),
+    ("ride_requests", [("status", 1), ("expires_at", 1)], {}),
+    ("ride_requests", [("rider_id", 1), ("created_at", -1), ("id", -1)], {}),
+    ("ride_requests", [("status", 1), ("created_at", -1), ("id", -1)], {}),
+    ("ride_requests", [("created_at", -1), ("id", -1)], {}),
+
+    # Active ride checks, per-rider/per-driver windows (their prefixes cover
+    # plain rider_id/driver_id filters), admin listing
+    ("ride_matches", "id", {}),
+    ("ride_matches", [("driver_id", 1), ("status", 1)], {}),
+    ("ride_matches", [("rider_id", 1), ("created_at", -1), ("id", -1)], {}),
+    ("ride_matches", [("driver_id", 1), ("created_at", -1), ("id", -1)], {}),
+    ("ride_matches", [("created_at", -1), ("id", -1)], {}),
+
+    # Undelivered replay, per-user and admin keyset listings, conversation threads
+    ("notifications", [("user_id", 1), ("delivered", 1), ("created_at", -1)], {}),
+    ("notifications", [("user_id", 1), ("created_at", -1), ("id", -1)], {}),
+    ("notifications", [("created_at", -1), ("id", -1)], {}),
+    ("notifications", [("conversation_thread", 1), ("created_at", -1)], {}),
+
+    # Rating recounts, ratings left by a user, per-ride joins
+    ("ratings", "rated_id", {}),
+    ("ratings", "rater_id", {}),
+    ("ratings", [("ride_id", 1), ("rater_id", 1)], {}),
+
+    # Balance checks and the admin balance listing
+    ("user_balances", "user_id", {}),
+    ("user_balances", [("balance", -1), ("user_id", -1)], {}),
+    ("user_balances", [("updated_at", -1), ("user_id", -1)], {}),
+    ("balance_transactions", [("user_id", 1), ("created_at", -1)], {}),
+
+    # Checkout status polling and the admin payment listing
+    ("payment_transactions", "session_id", {}),
+    ("payments", [("created_at", -1), ("id", -1)], {}),
+
+    *GEO_INDEXES,
+    *SEARCH_INDEXES,
+    *AUDIT_INDEXES,
+]
+
+def key_pattern(keys: IndexKeys) -> Tuple[Tuple[str, Any], ...]:
+    """Normalized key pattern, comparable with index_information() output"""
+    if isinstance(keys, str):
+        keys = [(keys, 1)]
+    return tuple((field, int(direction) if isinstance(direction, float) else direction) for field, direction in keys)
+
+async def apply_indexes(db, indexes: Sequence[Tuple[str, IndexKeys, Dict[str, Any]]] = INDEXES) -> Dict[str, Any]:
+    """Create every registered index; one failure (e.g. conflicting options) does not stop the rest"""
+    applied = 0
+    failed = []
+    for collection, keys, options in indexes:
+        try:
+            await db[collection].create_index(keys, **options)
+            applied += 1
+        except Exception as e:
+            logger.error(f"Failed to create index {collection} {key_pattern(keys)}: {e}")
+            failed.append({"collection": collection, "keys": key_pattern(keys), "error": str(e)})
+    return {"applied": applied, "failed": failed}
+
+async def index_report(db, indexes: Sequence[Tuple[str, IndexKeys, Dict[str, Any]]] = INDEXES) -> Dict[str, Any]:
+    """Compare the registry with the live indexes and their $indexStats usage"""
+    registered: Dict[str, set] = {}
+    for collection, keys, _ in indexes:
+        registered.setdefault(collection, set()).add(key_pattern(keys))
+
+    report: Dict[str, Any] = {"missing": [], "unregistered": [], "unused": []}
+    for collection in sorted(registered):
+        live = await db[collection].index_information()
+        live_patterns = {key_pattern(info["key"]): name for name, info in live.items()}
+
+        for pattern in sorted(registered[collection] - set(live_patterns), key=str):
+            report["missing"].append({"collection": collection, "keys": pattern})
+        for pattern, name in live_patterns.items():
+            if name != "_id_" and pattern not in registered[collection]:
+                report["unregistered"].append({"collection": collection, "name": name, "keys": pattern})
+
+        try:
+            async for stats in db[collection].aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                    report["unused"].append({
+                        "collection": collection,
+                        "name": stats["name"],
+                        "since": stats["accesses"]["since"]
+                    })
+        except Exception as e:
+            logger.warning(f"$indexStats unavailable for {collection}: {e}")
+    return report
+
+def _print_report(report: Dict[str, Any]):
+    sections = (
+        ("missing", "Registered but missing"),
+        ("unregistered", "Present but not registered"),
+        ("unused", "No operations recorded by $indexStats")
+    )
+    for key, title in sections:
+        print(f"{title}: {len(report[key])}")
+        for entry in report[key]:
+            label = entry.get("name") or ", ".join(f"{field}:{direction}" for field, direction in entry["keys"])
+            since = f" (since {entry['since']})" if entry.get("since") else ""
+            print(f"  {entry['collection']}.{label}{since}")
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    import asyncio
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from serialization import dumps
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("apply", "report"))
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if args.command == "apply":
+            result = asyncio.run(apply_indexes(db))
+            print(f"Applied {result['applied']} indexes, {len(result['failed'])} failed")
+            for failure in result["failed"]:
+                print(f"  {failure['collection']} {failure['keys']}: {failure['error']}")
+        else:
+            report = asyncio.run(index_report(db))
+            if args.json:
+                print(dumps(report).decode())
+            else:
+                _print_report(report)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
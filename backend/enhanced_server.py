@@ -3,7 +3,6 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, WebSocket, WebSocketDisconnect, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, timezone
@@ -21,19 +20,20 @@ from pathlib import Path
 # Import our new audit and admin systems
 from audit_system import AuditSystem, AuditAction, AuditFilter, AuditRecord
 from admin_crud import AdminCRUDOperations, AdminUserUpdate, AdminRideUpdate, AdminPaymentUpdate, DataFilter
+from database import close_client, get_analytics_database, get_database
+from search_index import SEARCH_FIELD, search_tokens
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection (shared pool, see database.py)
+db = get_database()
+analytics_db = get_analytics_database()
 
 # Initialize audit system
-audit_system = AuditSystem(db)
-admin_crud = AdminCRUDOperations(db, audit_system)
+audit_system = AuditSystem(db, read_db=analytics_db)
+admin_crud = AdminCRUDOperations(db, audit_system, read_db=analytics_db)
 
 # Security setup
 security = HTTPBearer()
@@ -182,6 +182,7 @@ async def register(user_data: dict, request: Request):
     
     user_dict = user.model_dump()
     user_dict["password"] = hashed_password
+    user_dict[SEARCH_FIELD] = search_tokens("users", user_dict)
     
     await db.users.insert_one(user_dict)
     
@@ -468,7 +469,7 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    close_client()
 
 # Include router in the main app
 app.include_router(api_router)
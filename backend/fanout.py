@@ -0,0 +1,51 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-recipient delivery outcomes
+DELIVERED = "delivered"
+STORED = "stored"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+async def fan_out(
+    recipients: Iterable[str],
+    send: Callable[[str], Awaitable[Any]],
+    timeout: Optional[float] = 2.0,
+    classify: Optional[Callable[[Any], str]] = None
+) -> List[Dict[str, Any]]:
+    """Send to all recipients concurrently and report one outcome per recipient.
+
+    Each send runs under its own timeout and failures are isolated, so one slow
+    or broken recipient never delays or cancels the others. Duplicate
+    recipients are sent to once. Pass timeout=None when send must not be
+    cancelled part-way (it then has to bound its own slow steps).
+    """
+
+    async def deliver(recipient: str) -> Dict[str, Any]:
+        try:
+            if timeout is None:
+                result = await send(recipient)
+            else:
+                result = await asyncio.wait_for(send(recipient), timeout)
+            return {"recipient": recipient, "status": classify(result) if classify else DELIVERED}
+        except asyncio.TimeoutError:
+            logger.warning(f"Fan-out to {recipient} timed out after {timeout}s")
+            return {"recipient": recipient, "status": TIMEOUT}
+        except Exception as e:
+            logger.error(f"Fan-out to {recipient} failed: {e}")
+            return {"recipient": recipient, "status": ERROR, "error": str(e)}
+
+    unique_recipients = list(dict.fromkeys(r for r in recipients if r))
+    if not unique_recipients:
+        return []
+    return list(await asyncio.gather(*(deliver(r) for r in unique_recipients)))
+
+def summarize(outcomes: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Count outcomes by status"""
+    summary = {DELIVERED: 0, STORED: 0, TIMEOUT: 0, ERROR: 0}
+    for outcome in outcomes:
+        summary[outcome["status"]] = summary.get(outcome["status"], 0) + 1
+    return summary
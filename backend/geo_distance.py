@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterable, Optional
+import math
+import os
+import numpy as np
+from geopy.distance import geodesic
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Length of one degree of latitude on the same sphere haversine_km uses
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180.0
+
+# Distance modes: fast spherical approximation or exact WGS-84 ellipsoid
+HAVERSINE = "haversine"
+GEODESIC = "geodesic"
+DEFAULT_MODE = os.environ.get("DISTANCE_MODE", HAVERSINE)
+
+def as_coordinates(points: Any) -> np.ndarray:
+    """Coerce a sequence of (lat, lon) pairs into an (N, 2) float64 array"""
+    coords = np.asarray(points, dtype=np.float64)
+    if coords.size == 0:
+        return np.empty((0, 2), dtype=np.float64)
+    return coords.reshape(-1, 2)
+
+def coordinates_from_locations(locations: Iterable[Dict[str, Any]]) -> np.ndarray:
+    """Build a coordinate array from location dicts with latitude/longitude keys"""
+    return as_coordinates([(loc["latitude"], loc["longitude"]) for loc in locations])
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Vectorized great-circle distance from one origin to many points"""
+    phi1 = np.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lons - lon)
+    a = np.sin(dphi / 2.0) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def geodesic_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Exact ellipsoidal distance from one origin to many points"""
+    origin = (lat, lon)
+    return np.fromiter(
+        (geodesic(origin, (p_lat, p_lon)).kilometers for p_lat, p_lon in zip(lats.tolist(), lons.tolist())),
+        dtype=np.float64,
+        count=len(lats)
+    )
+
+def distances_km(lat: float, lon: float, points: Any, mode: Optional[str] = None) -> np.ndarray:
+    """Distances in kilometers from (lat, lon) to every point in one call"""
+    coords = as_coordinates(points)
+    if coords.shape[0] == 0:
+        return np.empty(0, dtype=np.float64)
+    mode = mode or DEFAULT_MODE
+    if mode == GEODESIC:
+        return geodesic_km(lat, lon, coords[:, 0], coords[:, 1])
+    if mode == HAVERSINE:
+        return haversine_km(lat, lon, coords[:, 0], coords[:, 1])
+    raise ValueError(f"Unknown distance mode: {mode}")
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float, mode: Optional[str] = None) -> float:
+    """Distance in kilometers between two points"""
+    return float(distances_km(lat1, lon1, [(lat2, lon2)], mode)[0])
+
+def within_radius(lat: float, lon: float, points: Any, radius_km: float, mode: Optional[str] = None):
+    """Return (indices, distances) of points within radius_km, nearest first"""
+    distances = distances_km(lat, lon, points, mode)
+    indices = np.flatnonzero(distances <= radius_km)
+    order = indices[np.argsort(distances[indices], kind="stable")]
+    return order, distances[order]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+GeoJSON location fields and 2dsphere indexes for driver and pickup discovery.
+
+Run directly to create the indexes and backfill the GeoJSON fields for
+existing users and ride requests:
+
+    python geo_fields.py
+"""
+
+from typing import Any, Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import GEOSPHERE, UpdateOne
+
+# GeoJSON mirrors of the {latitude, longitude} location fields
+DRIVER_GEO_FIELD = "current_location_geo"
+PICKUP_GEO_FIELD = "pickup_location_geo"
+
+# (collection, keys, options) for the 2dsphere indexes; also registered in db_indexes
+GEO_INDEXES = [
+    ("users", [(DRIVER_GEO_FIELD, GEOSPHERE)], {}),
+    ("ride_requests", [(PICKUP_GEO_FIELD, GEOSPHERE)], {}),
+]
+
+def geojson_point(location: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Convert a {latitude, longitude} location into a GeoJSON point"""
+    if not location:
+        return None
+    latitude = location.get("latitude")
+    longitude = location.get("longitude")
+    if latitude is None or longitude is None:
+        return None
+    return {"type": "Point", "coordinates": [float(longitude), float(latitude)]}
+
+def geo_near_stage(
+    field: str,
+    latitude: float,
+    longitude: float,
+    query: Dict[str, Any],
+    radius_km: Optional[float] = None,
+    distance_field: str = "distance_m"
+) -> Dict[str, Any]:
+    """Build a $geoNear stage returning documents sorted by distance in meters"""
+    stage = {
+        "near": {"type": "Point", "coordinates": [float(longitude), float(latitude)]},
+        "key": field,
+        "distanceField": distance_field,
+        "spherical": True,
+        "query": query
+    }
+    if radius_km is not None:
+        stage["maxDistance"] = float(radius_km) * 1000.0
+    return {"$geoNear": stage}
+
+async def ensure_geo_indexes(db: AsyncIOMotorDatabase):
+    """Create the 2dsphere indexes used by $geoNear"""
+    for collection, keys, options in GEO_INDEXES:
+        await db[collection].create_index(keys, **options)
+
+async def _backfill(collection, source_field: str, target_field: str, batch_size: int) -> int:
+    updated = 0
+    operations = []
+    cursor = collection.find(
+        {source_field: {"$ne": None}, target_field: {"$exists": False}},
+        {"_id": 1, source_field: 1}
+    )
+    async for doc in cursor:
+        point = geojson_point(doc.get(source_field))
+        if point is None:
+            continue
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {target_field: point}}))
+        if len(operations) >= batch_size:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+    if operations:
+        result = await collection.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+    return updated
+
+async def backfill_geo_fields(db: AsyncIOMotorDatabase, batch_size: int = 500) -> Dict[str, int]:
+    """Add GeoJSON points to documents created before the fields existed"""
+    return {
+        "users": await _backfill(db.users, "current_location", DRIVER_GEO_FIELD, batch_size),
+        "ride_requests": await _backfill(db.ride_requests, "pickup_location", PICKUP_GEO_FIELD, batch_size)
+    }
+
+async def migrate(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+    """Backfill GeoJSON fields, then build the 2dsphere indexes"""
+    counts = await backfill_geo_fields(db)
+    await ensure_geo_indexes(db)
+    return counts
+
+if __name__ == "__main__":
+    import asyncio
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    counts = asyncio.run(migrate(client[os.environ['DB_NAME']]))
+    print(f"✅ GeoJSON migration complete: {counts}")
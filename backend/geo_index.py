@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Set, Tuple
+import math
+from geo_distance import KM_PER_DEGREE_LAT, within_radius
+
+class DriverGeoIndex:
+    """Process-resident grid index of online driver positions.
+
+    Drivers are bucketed into fixed-size lat/lon cells so a radius query only
+    inspects the cells overlapping the search circle instead of every driver.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.05):
+        self.cell_size_deg = cell_size_deg
+        self._lon_cells = int(round(360.0 / cell_size_deg))
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._positions: Dict[str, Tuple[float, float]] = {}
+        self._cell_of: Dict[str, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, driver_id: str) -> bool:
+        return driver_id in self._positions
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        lat_idx = int(math.floor(latitude / self.cell_size_deg))
+        lon_idx = int(math.floor((longitude + 180.0) / self.cell_size_deg)) % self._lon_cells
+        return lat_idx, lon_idx
+
+    def get(self, driver_id: str) -> Optional[Tuple[float, float]]:
+        return self._positions.get(driver_id)
+
+    def upsert(self, driver_id: str, latitude: float, longitude: float):
+        """Insert a driver or move it to a new position"""
+        cell = self._cell(latitude, longitude)
+        previous = self._cell_of.get(driver_id)
+        if previous != cell:
+            if previous is not None:
+                self._discard_from_cell(driver_id, previous)
+            self._cells.setdefault(cell, set()).add(driver_id)
+            self._cell_of[driver_id] = cell
+        self._positions[driver_id] = (latitude, longitude)
+
+    def move(self, driver_id: str, latitude: float, longitude: float) -> bool:
+        """Update the position of an indexed driver, ignoring unknown ids"""
+        if driver_id not in self._positions:
+            return False
+        self.upsert(driver_id, latitude, longitude)
+        return True
+
+    def remove(self, driver_id: str):
+        cell = self._cell_of.pop(driver_id, None)
+        if cell is not None:
+            self._discard_from_cell(driver_id, cell)
+        self._positions.pop(driver_id, None)
+
+    def clear(self):
+        self._cells.clear()
+        self._positions.clear()
+        self._cell_of.clear()
+
+    def _discard_from_cell(self, driver_id: str, cell: Tuple[int, int]):
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(driver_id)
+            if not bucket:
+                del self._cells[cell]
+
+    def _cells_in_range(self, latitude: float, longitude: float, radius_km: float):
+        """Yield the keys of all cells that may contain points within radius_km"""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        lat_lo, _ = self._cell(max(-90.0, latitude - dlat), longitude)
+        lat_hi, _ = self._cell(min(90.0, latitude + dlat), longitude)
+
+        # Longitude span widens towards the poles; use the worst case in the band
+        widest_lat = min(90.0, max(abs(latitude - dlat), abs(latitude + dlat)))
+        cos_lat = math.cos(math.radians(widest_lat))
+        if cos_lat <= 1e-9 or radius_km / (KM_PER_DEGREE_LAT * cos_lat) >= 180.0:
+            lon_indices = range(self._lon_cells)
+        else:
+            dlon = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+            _, lon_lo = self._cell(latitude, ((longitude - dlon + 180.0) % 360.0) - 180.0)
+            span = int(math.ceil(2 * dlon / self.cell_size_deg)) + 1
+            lon_indices = sorted({(lon_lo + i) % self._lon_cells for i in range(span + 1)})
+
+        for lat_idx in range(lat_lo, lat_hi + 1):
+            for lon_idx in lon_indices:
+                yield lat_idx, lon_idx
+
+    def query_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Return (driver_id, distance_km) pairs within radius, nearest first"""
+        driver_ids = []
+        coords = []
+        for cell in self._cells_in_range(latitude, longitude, radius_km):
+            bucket = self._cells.get(cell)
+            if not bucket:
+                continue
+            for driver_id in bucket:
+                driver_ids.append(driver_id)
+                coords.append(self._positions[driver_id])
+
+        if not driver_ids:
+            return []
+
+        indices, distances = within_radius(latitude, longitude, coords, radius_km)
+        if limit is not None:
+            indices, distances = indices[:limit], distances[:limit]
+        return [(driver_ids[i], float(d)) for i, d in zip(indices.tolist(), distances.tolist())]
+
+    def nearest(self, latitude: float, longitude: float, k: int, max_radius_km: float) -> List[Tuple[str, float]]:
+        """Return up to k nearest drivers within max_radius_km"""
+        return self.query_radius(latitude, longitude, max_radius_km, limit=k)
@@ -0,0 +1,180 @@
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+from pymongo import UpdateOne
+from geo_distance import distance_km
+
+logger = logging.getLogger(__name__)
+
+class LocationIngestor:
+    """Coalescing write stage for GPS pings.
+
+    Pings are accepted in memory and flushed by a background task every
+    flush_interval seconds: the latest position per user goes to the users
+    collection in one bulk_write, and history entries are appended with
+    insert_many. Pings that move less than min_move_meters from the last
+    accepted position (and change nothing else) are dropped entirely.
+    """
+
+    def __init__(
+        self,
+        users,
+        history,
+        flush_interval: float = 1.0,
+        min_move_meters: float = 10.0,
+        history_batch_size: int = 500,
+        max_history_buffer: int = 50000,
+        position_fields: Tuple[str, ...] = ("current_location",)
+    ):
+        self.users = users
+        self.history = history
+        self.flush_interval = flush_interval
+        self.min_move_km = min_move_meters / 1000.0
+        self.history_batch_size = history_batch_size
+        self.max_history_buffer = max_history_buffer
+        self.position_fields = set(position_fields)
+        # user_id -> ($set fields, time first queued since the last flush)
+        self._pending: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._history: Deque[Dict[str, Any]] = deque()
+        # user_id -> (latitude, longitude, extra fields) of the last accepted ping
+        self._last_accepted: Dict[str, Tuple[float, float, Dict[str, Any]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stats = {
+            "accepted": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "users_written": 0,
+            "history_written": 0,
+            "history_overflow": 0,
+            "failed": 0,
+            "flushes": 0,
+            "last_flush_ms": 0.0,
+            "last_flush_lag_ms": 0.0
+        }
+
+    async def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def forget(self, user_id: str):
+        """Drop the movement baseline for a user, e.g. on disconnect"""
+        self._last_accepted.pop(user_id, None)
+
+    async def settle(self, user_id: str, fields: Dict[str, Any]):
+        """Make a direct write of fields (e.g. going offline) safe against queued pings.
+
+        The user's pending entry is patched with fields so a later flush
+        cannot undo them, the movement baseline is forgotten, and a flush
+        already in flight is waited for before returning.
+        """
+        pending = self._pending.get(user_id)
+        if pending is not None:
+            pending[0].update(fields)
+        self.forget(user_id)
+        async with self._flush_lock:
+            pass
+
+    def submit(
+        self,
+        user_id: str,
+        latitude: float,
+        longitude: float,
+        fields: Dict[str, Any],
+        history_entry: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Queue a ping; returns False when it was dropped as sub-threshold.
+
+        fields is the $set document for the user. Keys other than the
+        position are compared with the last accepted ping so a status change
+        carried by a stationary ping is never dropped.
+        """
+        extra = {k: v for k, v in fields.items() if k not in self.position_fields}
+        last = self._last_accepted.get(user_id)
+        if last is not None and last[2] == extra:
+            if distance_km(last[0], last[1], latitude, longitude) < self.min_move_km:
+                self._stats["dropped"] += 1
+                return False
+        self._last_accepted[user_id] = (latitude, longitude, extra)
+
+        pending = self._pending.get(user_id)
+        if pending is None:
+            self._pending[user_id] = (dict(fields), time.monotonic())
+        else:
+            pending[0].update(fields)
+            self._stats["coalesced"] += 1
+
+        if history_entry is not None:
+            if len(self._history) >= self.max_history_buffer:
+                self._history.popleft()
+                self._stats["history_overflow"] += 1
+            self._history.append(history_entry)
+        self._stats["accepted"] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        oldest = min((queued_at for _, queued_at in self._pending.values()), default=None)
+        return {
+            **self._stats,
+            "pending_users": len(self._pending),
+            "pending_history": len(self._history),
+            "lag_ms": (now - oldest) * 1000 if oldest is not None else 0.0,
+            "flush_interval_s": self.flush_interval,
+            "min_move_meters": self.min_move_km * 1000
+        }
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending and not self._history:
+                return
+            started = time.monotonic()
+            pending, self._pending = self._pending, {}
+            history = list(self._history)
+            self._history.clear()
+
+            if pending:
+                oldest = min(queued_at for _, queued_at in pending.values())
+                self._stats["last_flush_lag_ms"] = (started - oldest) * 1000
+                operations = [UpdateOne({"id": user_id}, {"$set": fields}) for user_id, (fields, _) in pending.items()]
+                try:
+                    await self.users.bulk_write(operations, ordered=False)
+                    self._stats["users_written"] += len(operations)
+                except Exception as e:
+                    self._stats["failed"] += len(operations)
+                    logger.error(f"Failed to write {len(operations)} user locations: {e}")
+
+            for i in range(0, len(history), self.history_batch_size):
+                batch = history[i:i + self.history_batch_size]
+                try:
+                    await self.history.insert_many(batch, ordered=False)
+                    self._stats["history_written"] += len(batch)
+                except Exception as e:
+                    self._stats["failed"] += len(batch)
+                    logger.error(f"Failed to write {len(batch)} location history entries: {e}")
+
+            self._stats["flushes"] += 1
+            self._stats["last_flush_ms"] = (time.monotonic() - started) * 1000
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Location flush failed: {e}")
@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from geo_distance import within_radius
+
+class LocationStore:
+    """Array-backed store of the last known position of each connected user.
+
+    Positions live in one contiguous (capacity, 2) float64 array with an
+    id -> row index beside it, so updates and deletes are O(1) (deletes swap
+    the last row into the freed slot) and a radius query is a single
+    vectorized pass over the live rows.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._coords = np.empty((max(initial_capacity, 1), 2), dtype=np.float64)
+        self._ids: List[str] = []
+        self._slots: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._slots
+
+    def get(self, user_id: str) -> Optional[Tuple[float, float]]:
+        slot = self._slots.get(user_id)
+        if slot is None:
+            return None
+        return float(self._coords[slot, 0]), float(self._coords[slot, 1])
+
+    def update(self, user_id: str, latitude: float, longitude: float):
+        """Insert a user or overwrite their position"""
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = len(self._ids)
+            if slot == self._coords.shape[0]:
+                self._grow()
+            self._ids.append(user_id)
+            self._slots[user_id] = slot
+        self._coords[slot, 0] = latitude
+        self._coords[slot, 1] = longitude
+
+    def remove(self, user_id: str) -> bool:
+        slot = self._slots.pop(user_id, None)
+        if slot is None:
+            return False
+        last = len(self._ids) - 1
+        if slot != last:
+            # Move the last row into the freed slot to keep rows contiguous
+            moved_id = self._ids[last]
+            self._coords[slot] = self._coords[last]
+            self._ids[slot] = moved_id
+            self._slots[moved_id] = slot
+        self._ids.pop()
+        return True
+
+    def clear(self):
+        self._ids.clear()
+        self._slots.clear()
+
+    def within(self, latitude: float, longitude: float, radius_km: float, mode: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Users within radius_km as (user_id, km), nearest first"""
+        if not self._ids:
+            return []
+        indices, distances = within_radius(latitude, longitude, self._coords[:len(self._ids)], radius_km, mode)
+        return [(self._ids[i], d) for i, d in zip(indices.tolist(), distances.tolist())]
+
+    def _grow(self):
+        grown = np.empty((self._coords.shape[0] * 2, 2), dtype=np.float64)
+        grown[:self._coords.shape[0]] = self._coords
+        self._coords = grown
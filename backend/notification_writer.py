@@ -0,0 +1,136 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling the flusher to drain and exit
+_STOP = object()
+
+# Duplicate key: the record is already stored
+_DUPLICATE_KEY = 11000
+
+class NotificationWriter:
+    """Write-behind pipeline for notification records.
+
+    Records are queued by the request path and written by a background task
+    with insert_many in micro-batches. The queue is bounded, so producers
+    wait once max_queue records are pending (backpressure) instead of growing
+    memory without limit. A failed insert is retried with exponential
+    backoff; meanwhile the queue fills and producers wait, so a Mongo
+    outage slows notifications down instead of dropping them.
+    """
+
+    def __init__(
+        self,
+        collection,
+        after_write: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        max_retries: int = 5,
+        retry_backoff: float = 0.1
+    ):
+        self.collection = collection
+        self.after_write = after_write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "written": 0,
+            "failed": 0,
+            "retries": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0
+        }
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued, then stop the background task"""
+        if self._task is None:
+            return
+        await self.queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, record: Dict[str, Any]):
+        """Queue a record for writing; waits only while the queue is full"""
+        await self.queue.put(record)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "queue_depth": self.queue.qsize(), "queue_capacity": self.queue.maxsize}
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                try:
+                    if timeout > 0:
+                        item = await asyncio.wait_for(self.queue.get(), timeout)
+                    else:
+                        item = self.queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        started = time.perf_counter()
+        pending = batch
+        written: List[Dict[str, Any]] = []
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self._stats["retries"] += 1
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                try:
+                    await self.collection.insert_many(pending, ordered=False)
+                    written.extend(pending)
+                    pending = []
+                    break
+                except BulkWriteError as e:
+                    # Retry only the records that failed for a reason other
+                    # than already being stored
+                    errors = e.details.get("writeErrors", [])
+                    failed = {error["index"] for error in errors if error.get("code") != _DUPLICATE_KEY}
+                    written.extend(record for index, record in enumerate(pending) if index not in failed)
+                    pending = [pending[index] for index in sorted(failed)]
+                    if not pending:
+                        break
+                    logger.warning(f"Failed to write {len(pending)} notifications (attempt {attempt + 1}): {e}")
+                except Exception as e:
+                    logger.warning(f"Failed to write {len(pending)} notifications (attempt {attempt + 1}): {e}")
+        finally:
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["last_flush_ms"] = (time.perf_counter() - started) * 1000
+
+        if pending:
+            self._stats["failed"] += len(pending)
+            logger.error(f"Dropped {len(pending)} notifications after {self.max_retries} retries")
+        self._stats["written"] += len(written)
+
+        if self.after_write and written:
+            try:
+                await self.after_write(written)
+            except Exception as e:
+                logger.error(f"Notification post-write hook failed: {e}")
@@ -0,0 +1,115 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+import base64
+import json
+
+# Documents are ordered by (sort field, id); id breaks ties between equal sort values
+TIE_BREAK_FIELD = "id"
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, dict):
+        return {k: _encode_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(v) for v in value]
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"$dt"}:
+            return datetime.fromisoformat(value["$dt"])
+        return {k: _decode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(v) for v in value]
+    return value
+
+def encode_cursor(payload: Any) -> str:
+    """Serialize a keyset position into an opaque, URL-safe continuation token"""
+    raw = json.dumps(_encode_value(payload), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _is_position(value: Any) -> bool:
+    # Positions are compared against stored values, so only plain scalars
+    # are accepted (a dict here would be read as a query operator)
+    return isinstance(value, list) and len(value) == 2 and all(
+        v is None or isinstance(v, (str, int, float, datetime)) for v in value
+    )
+
+def decode_cursor(token: str, keys: Optional[Sequence[str]] = None) -> Any:
+    """Inverse of encode_cursor; raises ValueError for malformed tokens.
+
+    A cursor holds one keyset position, or with keys a dict of positions
+    (null once exhausted) for lists paged side by side.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = _decode_value(json.loads(raw))
+    except Exception:
+        payload = None
+    if keys is None:
+        valid = _is_position(payload)
+    else:
+        valid = isinstance(payload, dict) and set(payload) <= set(keys) and all(
+            position is None or _is_position(position) for position in payload.values()
+        )
+    if not valid:
+        raise ValueError("Invalid pagination cursor")
+    return payload
+
+def position_of(document: Dict[str, Any], sort_field: str, tie_break: str = TIE_BREAK_FIELD) -> List[Any]:
+    """Keyset position (sort value, id) of a document"""
+    return [document.get(sort_field), document.get(tie_break)]
+
+def keyset_sort(sort_field: str, direction: int, tie_break: str = TIE_BREAK_FIELD) -> List[Tuple[str, int]]:
+    return [(sort_field, direction), (tie_break, direction)]
+
+def keyset_query(
+    query: Dict[str, Any],
+    sort_field: str,
+    direction: int,
+    position: Optional[Sequence[Any]],
+    nullable: bool = False,
+    tie_break: str = TIE_BREAK_FIELD
+) -> Dict[str, Any]:
+    """Restrict query to documents strictly after position in the given order.
+
+    Set nullable when some documents lack the sort field: MongoDB sorts
+    missing/null values first, and range operators never match them.
+    tie_break names the unique field for collections without an id.
+    """
+    if not position:
+        return query
+    value, last_id = position
+    op = "$lt" if direction < 0 else "$gt"
+    clauses = [
+        {sort_field: {op: value}},
+        {sort_field: value, tie_break: {op: last_id}}
+    ]
+    if nullable:
+        if value is None and direction > 0:
+            clauses[0] = {sort_field: {"$ne": None}}
+        elif value is not None and direction < 0:
+            clauses.append({sort_field: None})
+    after = {"$or": clauses}
+    return {"$and": [query, after]} if query else after
+
+def next_position(
+    documents: List[Dict[str, Any]],
+    sort_field: str,
+    limit: int,
+    tie_break: str = TIE_BREAK_FIELD
+) -> Optional[List[Any]]:
+    """Position to continue from, or None when the page was the last one"""
+    if not documents or len(documents) < limit:
+        return None
+    return position_of(documents[-1], sort_field, tie_break)
+
+def next_cursor(
+    documents: List[Dict[str, Any]],
+    sort_field: str,
+    limit: int,
+    tie_break: str = TIE_BREAK_FIELD
+) -> Optional[str]:
+    position = next_position(documents, sort_field, limit, tie_break)
+    return encode_cursor(position) if position is not None else None
@@ -0,0 +1,165 @@
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+import os
+import socket
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+STATS_DOCUMENT_ID = "platform"
+
+# Document in platform_stats used as the reconcile lease
+_LEASE_ID = "reconcile_lease"
+
+# Counters kept on the platform stats document
+COUNTER_FIELDS = (
+    "total_users",
+    "total_drivers",
+    "total_riders",
+    "total_ride_requests",
+    "total_ride_matches",
+    "completed_rides",
+    "online_drivers",
+    "total_revenue"
+)
+
+class PlatformStats:
+    """Materialized platform counters for the admin dashboard.
+
+    Request handlers apply $inc deltas as users register, drivers go
+    online or offline and rides are requested, accepted and completed, so
+    reading the stats is a single document lookup. A periodic reconciler
+    recounts everything from the source collections (read_db, which may be
+    a secondary) to correct drift from failed increments and admin edits.
+    Workers take a lease lasting reconcile_interval, so one recount runs
+    per interval however many workers there are.
+    """
+
+    def __init__(self, db, read_db=None, reconcile_interval: float = 3600.0):
+        self.db = db
+        self.reads = read_db if read_db is not None else db
+        self.collection = db.platform_stats
+        self.reconcile_interval = reconcile_interval
+        self._task: Optional[asyncio.Task] = None
+        self._holder = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def increment(self, **deltas: float):
+        """Apply counter deltas; failures are logged and left to the reconciler"""
+        try:
+            await self.collection.update_one(
+                {"_id": STATS_DOCUMENT_ID},
+                {"$inc": deltas, "$set": {"updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to update platform stats {deltas}: {e}")
+
+    async def user_registered(self, role: str):
+        deltas = {"total_users": 1}
+        if role == "driver":
+            deltas["total_drivers"] = 1
+        elif role == "rider":
+            deltas["total_riders"] = 1
+        await self.increment(**deltas)
+
+    async def driver_status_changed(self, online: bool):
+        await self.increment(online_drivers=1 if online else -1)
+
+    async def ride_requested(self):
+        await self.increment(total_ride_requests=1)
+
+    async def ride_accepted(self):
+        await self.increment(total_ride_matches=1)
+
+    async def ride_completed(self, fare: Optional[float]):
+        await self.increment(completed_rides=1, total_revenue=float(fare or 0))
+
+    async def recount(self) -> Dict[str, Any]:
+        """Compute every counter from the source collections"""
+        users, rides, revenue = await asyncio.gather(
+            self.reads.users.aggregate([
+                {"$group": {
+                    "_id": None,
+                    "total_users": {"$sum": 1},
+                    "total_drivers": {"$sum": {"$cond": [{"$eq": ["$role", "driver"]}, 1, 0]}},
+                    "total_riders": {"$sum": {"$cond": [{"$eq": ["$role", "rider"]}, 1, 0]}},
+                    "online_drivers": {"$sum": {"$cond": [
+                        {"$and": [{"$eq": ["$role", "driver"]}, {"$eq": ["$is_online", True]}]}, 1, 0
+                    ]}}
+                }}
+            ]).to_list(1),
+            self.reads.ride_requests.count_documents({}),
+            self.reads.ride_matches.aggregate([
+                {"$group": {
+                    "_id": None,
+                    "total_ride_matches": {"$sum": 1},
+                    "completed_rides": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+                    "total_revenue": {"$sum": {"$cond": [
+                        {"$eq": ["$status", "completed"]}, {"$ifNull": ["$estimated_fare", 0]}, 0
+                    ]}}
+                }}
+            ]).to_list(1)
+        )
+        counters = {field: 0 for field in COUNTER_FIELDS}
+        for row in users + revenue:
+            counters.update({k: v for k, v in row.items() if k != "_id"})
+        counters["total_ride_requests"] = rides
+        return counters
+
+    async def reconcile(self) -> Dict[str, Any]:
+        """Overwrite the stored counters with an exact recount"""
+        counters = await self.recount()
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"_id": STATS_DOCUMENT_ID},
+            {"$set": {**counters, "updated_at": now, "reconciled_at": now}},
+            upsert=True
+        )
+        return counters
+
+    async def read(self) -> Dict[str, Any]:
+        """Current counters, reconciling first if the document does not exist yet"""
+        document = await self.collection.find_one({"_id": STATS_DOCUMENT_ID})
+        if document is None or "reconciled_at" not in document:
+            await self.reconcile()
+            document = await self.collection.find_one({"_id": STATS_DOCUMENT_ID})
+        document.pop("_id", None)
+        return document
+
+    async def _acquire_lease(self) -> bool:
+        """Claim this interval's recount; False when another worker holds it"""
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.update_one(
+                {"_id": _LEASE_ID, "expires_at": {"$lt": now}},
+                {"$set": {"holder": self._holder, "expires_at": now + timedelta(seconds=self.reconcile_interval)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def start(self):
+        if self._task is None and self.reconcile_interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                if await self._acquire_lease():
+                    await self.reconcile()
+            except Exception as e:
+                logger.error(f"Platform stats reconciliation failed: {e}")
+            await asyncio.sleep(self.reconcile_interval)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Running rating aggregates on user documents
+
+Each user carries rating_sum and rating_count next to the displayed
+average (rating), so a new rating is applied with one atomic update instead
+of re-reading every rating the user has received.
+
+Run as a script to backfill the aggregates from the ratings collection:
+
+    python rating_aggregates.py [--batch-size 500]
+"""
+
+from typing import Any, Dict, List
+from pathlib import Path
+import argparse
+import asyncio
+import logging
+import os
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+def _average() -> Dict[str, Any]:
+    return {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 1]}
+
+def add_rating_update(rating: float) -> List[Dict[str, Any]]:
+    """Update pipeline adding one rating to the running sum/count and refreshing the average"""
+    return [
+        {"$set": {
+            "rating_sum": {"$add": ["$rating_sum", rating]},
+            "rating_count": {"$add": ["$rating_count", 1]}
+        }},
+        {"$set": {"rating": _average()}}
+    ]
+
+def totals_update(rating_sum: float, rating_count: int) -> Dict[str, Any]:
+    return {"$set": {
+        "rating_sum": rating_sum,
+        "rating_count": rating_count,
+        "rating": round(rating_sum / rating_count, 1)
+    }}
+
+async def add_rating(db, user_id: str, rating: float) -> None:
+    """Apply a newly stored rating to the rated user's aggregates.
+
+    Users whose aggregates were never initialised (not backfilled yet) are
+    recomputed from their ratings once; every later rating is O(1).
+    """
+    result = await db.users.update_one(
+        {"id": user_id, "rating_count": {"$exists": True}},
+        add_rating_update(rating)
+    )
+    if result.matched_count == 0:
+        await recompute_user_rating(db, user_id)
+
+async def recompute_user_rating(db, user_id: str) -> None:
+    """Rebuild one user's aggregates from the ratings collection"""
+    totals = await db.ratings.aggregate([
+        {"$match": {"rated_id": user_id}},
+        {"$group": {"_id": None, "sum": {"$sum": "$rating"}, "count": {"$sum": 1}}}
+    ]).to_list(1)
+    if totals and totals[0]["count"]:
+        await db.users.update_one({"id": user_id}, totals_update(totals[0]["sum"], totals[0]["count"]))
+
+async def backfill(db, batch_size: int = 500) -> int:
+    """Recompute the aggregates of every rated user; returns the number of users updated"""
+    operations = []
+    updated = 0
+    async for totals in db.ratings.aggregate([
+        {"$group": {"_id": "$rated_id", "sum": {"$sum": "$rating"}, "count": {"$sum": 1}}}
+    ], allowDiskUse=True):
+        if not totals["_id"] or not totals["count"]:
+            continue
+        operations.append(UpdateOne({"id": totals["_id"]}, totals_update(totals["sum"], totals["count"])))
+        if len(operations) >= batch_size:
+            updated += (await db.users.bulk_write(operations, ordered=False)).matched_count
+            operations = []
+    if operations:
+        updated += (await db.users.bulk_write(operations, ordered=False)).matched_count
+    return updated
+
+def main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        updated = asyncio.run(backfill(client[os.environ['DB_NAME']], args.batch_size))
+        print(f"Backfilled rating aggregates for {updated} users")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from typing import Any, Dict, List, Optional, Sequence
+from geo_fields import PICKUP_GEO_FIELD
+from pagination import keyset_query, keyset_sort
+from search_index import SEARCH_FIELD
+
+# Index-only fields (search tokens, GeoJSON mirrors); projected out of
+# every response that returns whole ride documents
+HIDDEN_REQUEST_FIELDS = {SEARCH_FIELD: 0, PICKUP_GEO_FIELD: 0}
+HIDDEN_MATCH_FIELDS = {SEARCH_FIELD: 0}
+
+# /rides/unified pages both lists newest first by (created_at, id)
+RIDE_SORT_FIELD = "created_at"
+
+_LOCATION_FIELDS = ("latitude", "longitude", "address")
+
+# Only the fields the ride history screens render; place_id and any other
+# extra location/bookkeeping data stays in the database
+REQUEST_FIELDS = (
+    "id",
+    "rider_id",
+    "driver_id",
+    "status",
+    "vehicle_type",
+    "passenger_count",
+    "special_requirements",
+    "estimated_fare",
+    "estimated_duration",
+    "created_at",
+    "expires_at"
+)
+
+MATCH_FIELDS = (
+    "id",
+    "request_id",
+    "ride_request_id",
+    "rider_id",
+    "driver_id",
+    "status",
+    "vehicle_type",
+    "passenger_count",
+    "special_requirements",
+    "estimated_fare",
+    "estimated_distance_km",
+    "estimated_duration_minutes",
+    "distance_km",
+    "duration_minutes",
+    "created_at",
+    "accepted_at",
+    "started_at",
+    "completed_at"
+)
+
+def _projection(fields: Sequence[str]) -> Dict[str, Any]:
+    projection: Dict[str, Any] = {"_id": 0}
+    projection.update({field: 1 for field in fields})
+    for location in ("pickup_location", "dropoff_location"):
+        projection.update({f"{location}.{field}": 1 for field in _LOCATION_FIELDS})
+    return projection
+
+def _first(array_field: str, field: str, default: Any) -> Dict[str, Any]:
+    """Expression for field of the first joined document, or default when nothing joined"""
+    return {"$ifNull": [{"$arrayElemAt": [f"${array_field}.{field}", 0]}, default]}
+
+def _window(query: Dict[str, Any], position: Optional[Sequence[Any]], limit: int, nullable: bool) -> List[Dict[str, Any]]:
+    return [
+        {"$match": keyset_query(query, RIDE_SORT_FIELD, -1, position, nullable=nullable)},
+        {"$sort": dict(keyset_sort(RIDE_SORT_FIELD, -1))},
+        {"$limit": limit}
+    ]
+
+def requests_pipeline(query: Dict[str, Any], position: Optional[Sequence[Any]], limit: int) -> List[Dict[str, Any]]:
+    """One window of ride requests, projected to the fields the UI uses"""
+    return _window(query, position, limit, nullable=False) + [{"$project": _projection(REQUEST_FIELDS)}]
+
+def matches_pipeline(
+    query: Dict[str, Any],
+    position: Optional[Sequence[Any]],
+    limit: int,
+    counterpart: Optional[str] = None,
+    rater_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """One window of ride matches joined with their rating and, optionally,
+    the name/email of the counterpart ("rider" or "driver").
+
+    The joins run after $limit, so they only touch the ratings and users
+    belonging to the page being returned. rater_id restricts the rating to
+    the one left by that user.
+    """
+    rating_match: Dict[str, Any] = {"$expr": {"$eq": ["$ride_id", "$$ride_id"]}}
+    if rater_id:
+        rating_match["rater_id"] = rater_id
+
+    # Matches created by the direct accept path predate created_at on older data
+    pipeline = _window(query, position, limit, nullable=True)
+    pipeline.append({"$lookup": {
+        "from": "ratings",
+        "let": {"ride_id": "$id"},
+        "pipeline": [
+            {"$match": rating_match},
+            {"$project": {"_id": 0, "rating": 1, "comment": 1}},
+            {"$limit": 1}
+        ],
+        "as": "_rating"
+    }})
+
+    projection = _projection(MATCH_FIELDS)
+    projection["rating"] = _first("_rating", "rating", None)
+    projection["comment"] = _first("_rating", "comment", None)
+
+    if counterpart:
+        label = counterpart.capitalize()
+        pipeline.append({"$lookup": {
+            "from": "users",
+            "let": {"user_id": f"${counterpart}_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$id", "$$user_id"]}}},
+                {"$project": {"_id": 0, "name": 1, "email": 1}},
+                {"$limit": 1}
+            ],
+            "as": "_counterpart"
+        }})
+        projection[f"{counterpart}_name"] = _first("_counterpart", "name", f"Unknown {label}")
+        projection[f"{counterpart}_email"] = _first("_counterpart", "email", "Unknown Email")
+
+    pipeline.append({"$project": projection})
+    return pipeline
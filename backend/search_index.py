@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Prefix-token search for the admin listings and audit logs.
+
+Searchable documents carry a search_tokens array holding every prefix (up
+to MAX_PREFIX characters) of the words in their searchable fields, plus an
+exact-word marker per word. A search term becomes {search_tokens: {$all:
+[...]}}, which a multikey index answers without scanning the collection
+and without ever compiling user input as a regex. Results can be ranked by
+how many of the searched words match a whole word.
+
+Run directly to backfill the tokens of documents created before they existed:
+
+    python search_index.py [--batch-size 500]
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+from pathlib import Path
+import re
+
+from pymongo import UpdateOne
+
+SEARCH_FIELD = "search_tokens"
+
+# Computed by ranked searches: number of searched words matching a whole word
+RELEVANCE_FIELD = "relevance"
+
+# Searchable fields per collection (dotted paths)
+SEARCH_FIELDS: Dict[str, tuple] = {
+    "users": ("id", "name", "email", "phone"),
+    "ride_requests": ("id", "pickup_location.address", "dropoff_location.address"),
+    "ride_matches": ("id", "pickup_location.address", "dropoff_location.address"),
+    "payments": ("id", "transaction_id", "ride_id", "driver_id", "rider_id"),
+    "audit_logs": ("action", "entity_type", "metadata.description"),
+}
+
+# Fields whose words are also indexed joined (uuid fragments spanning a
+# hyphen, phone numbers typed without spaces); free text gets word prefixes only
+IDENTIFIER_FIELDS = ("id", "email", "phone")
+
+# Longer words are indexed (and searched) by their first MAX_PREFIX characters
+MAX_PREFIX = 16
+MAX_WORD = 64
+EXACT_MARKER = "="
+
+# (collection, keys, options); also registered in db_indexes
+SEARCH_INDEXES = [(collection, SEARCH_FIELD, {}) for collection in SEARCH_FIELDS]
+
+_WORD = re.compile(r"[^\W_]+")
+
+def words(value: Any) -> List[str]:
+    """Lowercased alphanumeric runs of a value"""
+    return _WORD.findall(str(value).lower())
+
+def _field_value(document: Dict[str, Any], path: str) -> Any:
+    value: Any = document
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _is_identifier(path: str) -> bool:
+    field = path.rsplit(".", 1)[-1]
+    return field in IDENTIFIER_FIELDS or field.endswith("_id")
+
+def search_tokens(collection: str, document: Dict[str, Any]) -> List[str]:
+    """Index tokens for a document of one of the SEARCH_FIELDS collections"""
+    tokens = set()
+    for path in SEARCH_FIELDS[collection]:
+        value = _field_value(document, path)
+        if value is None or value == "":
+            continue
+        parts = words(value)
+        # Runs joined from each word onwards, so "555 1234" and uuid
+        # fragments spanning a hyphen match too
+        joined = ["".join(parts[start:]) for start in range(len(parts) - 1)] if _is_identifier(path) else []
+        for word in parts:
+            tokens.add(EXACT_MARKER + word[:MAX_WORD])
+        for word in parts + joined:
+            tokens.update(word[:length] for length in range(1, min(len(word), MAX_PREFIX) + 1))
+    return sorted(tokens)
+
+def search_query(term: str) -> Dict[str, Any]:
+    """Filter matching documents that contain every word of term as a word prefix"""
+    prefixes = sorted({word[:MAX_PREFIX] for word in words(term)})
+    if not prefixes:
+        # Nothing searchable in the term (only punctuation): match nothing
+        return {SEARCH_FIELD: {"$in": []}}
+    return {SEARCH_FIELD: {"$all": prefixes}}
+
+def relevance_stage(term: str) -> Dict[str, Any]:
+    """$addFields stage scoring each document by the searched words it matches whole"""
+    exact = sorted({EXACT_MARKER + word[:MAX_WORD] for word in words(term)})
+    return {"$addFields": {RELEVANCE_FIELD: {
+        "$size": {"$setIntersection": [{"$ifNull": [f"${SEARCH_FIELD}", []]}, exact]}
+    }}}
+
+def matches(tokens: Iterable[str], term: str) -> bool:
+    """Python equivalent of search_query, for records outside Mongo"""
+    query = search_query(term)[SEARCH_FIELD]
+    return bool(query.get("$all")) and set(query["$all"]) <= set(tokens)
+
+async def backfill_search_tokens(db, batch_size: int = 500, collections: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """Add tokens to documents that do not have them yet"""
+    counts = {}
+    for collection in collections or SEARCH_FIELDS:
+        # {field: None} also matches missing fields and can use the index
+        projection = {"_id": 1, **{path: 1 for path in SEARCH_FIELDS[collection]}}
+        operations = []
+        updated = 0
+        async for document in db[collection].find({SEARCH_FIELD: None}, projection):
+            operations.append(UpdateOne(
+                {"_id": document["_id"]},
+                {"$set": {SEARCH_FIELD: search_tokens(collection, document)}}
+            ))
+            if len(operations) >= batch_size:
+                updated += (await db[collection].bulk_write(operations, ordered=False)).modified_count
+                operations = []
+        if operations:
+            updated += (await db[collection].bulk_write(operations, ordered=False)).modified_count
+        counts[collection] = updated
+    return counts
+
+def main():
+    import argparse
+    import asyncio
+    import os
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        counts = asyncio.run(backfill_search_tokens(client[os.environ['DB_NAME']], args.batch_size))
+        print(f"Backfilled search tokens: {counts}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from typing import Any, Callable, Dict, Union
+from datetime import date, datetime
+from decimal import Decimal
+import json
+import uuid
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+# orjson is optional; the standard library encoder is used when it is missing
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+def _isoformat(value) -> str:
+    return value.isoformat()
+
+# Exact-type dispatch for values that are not JSON-native in Mongo documents
+_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    ObjectId: str,
+    datetime: _isoformat,
+    date: _isoformat,
+    uuid.UUID: str,
+    Decimal: float,
+}
+
+_PASSTHROUGH = frozenset({str, int, float, bool, type(None)})
+
+def convert_objectids_to_strings(data: Any) -> Any:
+    """Recursively convert ObjectIds and datetimes (and other BSON values) to JSON-safe types"""
+    cls = data.__class__
+    if cls in _PASSTHROUGH:
+        return data
+    if cls is dict:
+        return {key: convert_objectids_to_strings(value) for key, value in data.items()}
+    if cls is list:
+        return [convert_objectids_to_strings(item) for item in data]
+    converter = _CONVERTERS.get(cls)
+    if converter is not None:
+        return converter(data)
+    # Subclasses (e.g. bson's SON, or datetime subclasses) take the slow path
+    if isinstance(data, dict):
+        return {key: convert_objectids_to_strings(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [convert_objectids_to_strings(item) for item in data]
+    for base, base_converter in _CONVERTERS.items():
+        if isinstance(data, base):
+            return base_converter(data)
+    return data
+
+def _default(value: Any) -> Any:
+    """Encoder hook for values the JSON encoder does not handle natively"""
+    converter = _CONVERTERS.get(value.__class__)
+    if converter is not None:
+        return converter(value)
+    for base, base_converter in _CONVERTERS.items():
+        if isinstance(value, base):
+            return base_converter(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+def dumps(data: Any) -> bytes:
+    """Encode raw Mongo documents straight to JSON bytes, no conversion pass needed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def loads(data: Union[str, bytes]) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes with dumps(); endpoints can return Mongo documents as-is"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,19 +1,16 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, WebSocket, WebSocketDisconnect, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 # Removed passlib import due to compatibility issues
 import os
 import logging
 import uuid
-import json
 import asyncio
 import time
-from geopy.distance import geodesic
 import hashlib
 import secrets
 # from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
@@ -53,56 +50,83 @@ except ImportError as e:
     print(f"Warning: Audit system not available: {e}")
     AUDIT_ENABLED = False
 
+from geo_index import DriverGeoIndex
+from location_store import LocationStore
+from user_cache import UserCache
+from user_directory import HIDDEN_USER_FIELDS, UserDirectory
+from location_ingest import LocationIngestor
+from platform_stats import PlatformStats
+from pagination import decode_cursor, encode_cursor, keyset_query, keyset_sort, next_cursor, next_position
+from rating_aggregates import add_rating
+from ride_queries import HIDDEN_MATCH_FIELDS, HIDDEN_REQUEST_FIELDS, RIDE_SORT_FIELD, matches_pipeline, requests_pipeline
+from streaming import iter_batches, ndjson_response, wants_ndjson
+from serialization import FastJSONResponse, convert_objectids_to_strings, dumps, loads
+from geo_distance import distance_km, distances_km, coordinates_from_locations
+from ws_backplane import Backplane, create_backplane
+from notification_writer import NotificationWriter
+from fanout import DELIVERED, STORED, fan_out, summarize
+from geo_fields import DRIVER_GEO_FIELD, PICKUP_GEO_FIELD, backfill_geo_fields, ensure_geo_indexes, geojson_point, geo_near_stage
+from db_indexes import apply_indexes
+from database import close_client, get_analytics_database, get_database, pool_stats
+from search_index import SEARCH_FIELD, backfill_search_tokens, search_tokens
+
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection: one pool configured by MONGO_* settings (see database.py);
+# analytics_db shares it but reads heavy admin listings from secondaries
+db = get_database()
+analytics_db = get_analytics_database()
+
+# Name/email/role summaries of users referenced by admin views, shared
+# between the admin endpoints and AdminCRUDOperations
+user_directory = UserDirectory(
+    db.users,
+    UserCache(
+        ttl_seconds=float(os.environ.get('USER_SUMMARY_CACHE_TTL_SECONDS', '60')),
+        max_entries=int(os.environ.get('USER_SUMMARY_CACHE_MAX_ENTRIES', '10000'))
+    )
+)
 
 # Initialize audit system if available
 if AUDIT_ENABLED:
-    audit_system = AuditSystem(db)
-    admin_crud = AdminCRUDOperations(db, audit_system)
+    # Audit records are batched by a background writer unless AUDIT_WRITE_MODE=sync;
+    # critical events are always written before log_action returns
+    audit_system = AuditSystem(
+        db,
+        write_mode=os.environ.get('AUDIT_WRITE_MODE', 'async'),
+        spill_dir=os.environ.get('AUDIT_SPILL_DIR', str(ROOT_DIR / 'audit_spill')),
+        # Opt-in: with AUDIT_ARCHIVE_DIR set (shared by all hosts), audit months
+        # past AUDIT_HOT_MONTHS move out of MongoDB into that directory
+        archive_dir=os.environ.get('AUDIT_ARCHIVE_DIR') or None,
+        hot_months=int(os.environ.get('AUDIT_HOT_MONTHS', '3')),
+        archive_interval=float(os.environ.get('AUDIT_ARCHIVE_INTERVAL', '86400')),
+        # Most archived months one audit log request may read
+        archive_max_months=int(os.environ.get('AUDIT_ARCHIVE_MAX_MONTHS', '12')),
+        batch_size=int(os.environ.get('AUDIT_BATCH_SIZE', '500')),
+        flush_interval=float(os.environ.get('AUDIT_FLUSH_INTERVAL', '0.2')),
+        write_timeout=float(os.environ.get('AUDIT_WRITE_TIMEOUT', '2.0')),
+        read_db=analytics_db
+    )
+    admin_crud = AdminCRUDOperations(db, audit_system, user_directory, read_db=analytics_db)
 else:
     audit_system = None
     admin_crud = None
 
+# Materialized counters behind /admin/stats
+platform_stats = PlatformStats(
+    db,
+    read_db=analytics_db,
+    reconcile_interval=float(os.environ.get('PLATFORM_STATS_RECONCILE_INTERVAL', '3600'))
+)
+
 # Security setup
 security = HTTPBearer()
 # Using a simpler hashing approach due to bcrypt compatibility issues
 import hashlib
 import secrets
 
-# Utility function to convert ObjectIds and datetime objects to strings
-def convert_objectids_to_strings(data):
-    """Recursively convert MongoDB ObjectIds and datetime objects to strings for JSON serialization"""
-    from datetime import datetime, date
-    
-    if isinstance(data, list):
-        return [convert_objectids_to_strings(item) for item in data]
-    elif isinstance(data, dict):
-        converted = {}
-        for key, value in data.items():
-            if hasattr(value, '__class__') and value.__class__.__name__ == 'ObjectId':
-                converted[key] = str(value)
-            elif isinstance(value, datetime):
-                converted[key] = value.isoformat()
-            elif isinstance(value, date):
-                converted[key] = value.isoformat()
-            elif isinstance(value, (dict, list)):
-                converted[key] = convert_objectids_to_strings(value)
-            else:
-                converted[key] = value
-        return converted
-    elif isinstance(data, datetime):
-        return data.isoformat()
-    elif isinstance(data, date):
-        return data.isoformat()
-    else:
-        return data
 JWT_SECRET = os.environ.get('JWT_SECRET')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
@@ -114,7 +138,7 @@ stripe_api_key = os.environ.get('STRIPE_API_KEY')
 google_maps_api_key = os.environ.get('GOOGLE_MAPS_API_KEY')
 
 # Create the main app
-app = FastAPI(title="MobilityHub Ride-Sharing API", version="1.0.0")
+app = FastAPI(title="MobilityHub Ride-Sharing API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # Create router with /api prefix
 api_router = APIRouter(prefix="/api")
@@ -126,6 +150,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 # Include the API router
@@ -332,6 +357,13 @@ def get_password_hash(password):
     password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
     return f"{salt}:{password_hash}"
 
+# Authenticated users cached per worker; the TTL bounds how stale a
+# suspension or profile change made through another worker can be
+user_cache: UserCache[User] = UserCache(
+    ttl_seconds=float(os.environ.get('USER_CACHE_TTL_SECONDS', '30')),
+    max_entries=int(os.environ.get('USER_CACHE_MAX_ENTRIES', '10000'))
+)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -346,14 +378,37 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise credentials_exception
     
-    user = await db.users.find_one({"id": user_id})
+    cached_user = user_cache.get(user_id)
+    if cached_user is not None:
+        return cached_user
+    
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
     if user is None:
         raise credentials_exception
-    return User(**user)
+    if user.get("status") == "suspended":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is suspended"
+        )
+    current_user = User(**user)
+    user_cache.put(user_id, current_user)
+    return current_user
+
+async def load_user(user_id: str) -> Optional[User]:
+    """User by id through the user cache, for callers without a bearer token"""
+    cached_user = user_cache.get(user_id)
+    if cached_user is not None:
+        return cached_user
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+    if user is None:
+        return None
+    loaded_user = User(**user)
+    user_cache.put(user_id, loaded_user)
+    return loaded_user
 
 def calculate_distance_km(loc1: Location, loc2: Location) -> float:
     """Calculate distance between two locations in kilometers"""
-    return geodesic((loc1.latitude, loc1.longitude), (loc2.latitude, loc2.longitude)).kilometers
+    return distance_km(loc1.latitude, loc1.longitude, loc2.latitude, loc2.longitude)
 
 def calculate_fare(distance_km: float, vehicle_type: str = VehicleType.ECONOMY) -> float:
     """Calculate ride fare based on distance and vehicle type"""
@@ -368,35 +423,79 @@ def calculate_fare(distance_km: float, vehicle_type: str = VehicleType.ECONOMY)
 
 # === WebSocket Connection Manager ===
 
+# Per-recipient timeout on the socket send (local or via the backplane);
+# the notification record is stored whether or not the send finishes
+FANOUT_TIMEOUT_SECONDS = float(os.environ.get('FANOUT_TIMEOUT_SECONDS', '2.0'))
+
+# Pending notifications are replayed on reconnect in pages of this size
+PENDING_REPLAY_BATCH_SIZE = 50
+PENDING_REPLAY_MAX_BATCHES = 10
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, backplane: Backplane):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.user_locations: Dict[str, Location] = {}
+        # Last known position of every user connected to this worker
+        self.user_locations = LocationStore()
+        # Routes messages to sockets held by other worker processes
+        self.backplane = backplane
+        self._replay_tasks = set()
 
     async def connect(self, websocket: WebSocket, user_id: str):
         await websocket.accept()
         self.active_connections[user_id] = websocket
+        await self.backplane.register(user_id)
         logger.info(f"User {user_id} connected to WebSocket")
         
-        # Send any pending notifications when user comes online
-        await self.deliver_pending_notifications(user_id)
+        # Send any pending notifications when user comes online, without
+        # holding up the receive loop
+        task = asyncio.create_task(self.deliver_pending_notifications(user_id))
+        self._replay_tasks.add(task)
+        task.add_done_callback(self._replay_tasks.discard)
 
-    def disconnect(self, user_id: str):
+    async def disconnect(self, user_id: str):
         if user_id in self.active_connections:
             del self.active_connections[user_id]
-        if user_id in self.user_locations:
-            del self.user_locations[user_id]
+        self.user_locations.remove(user_id)
+        await self.backplane.unregister(user_id)
         logger.info(f"User {user_id} disconnected from WebSocket")
 
-    async def send_personal_message(self, message: str, user_id: str, notification_type: str = "general", 
-                                  sender_id: str = None, sender_name: str = None, metadata: dict = None):
-        """Send message to user, store in database if offline"""
-        message_data = json.loads(message) if isinstance(message, str) else message
+    async def deliver_local(self, user_id: str, payload: str) -> bool:
+        """Send a pre-encoded text frame to a socket owned by this worker"""
+        websocket = self.active_connections.get(user_id)
+        if websocket is None:
+            return False
+        await websocket.send_text(payload)
+        return True
+
+    @staticmethod
+    def prepare_message(message: Union[Dict[str, Any], str, bytes], metadata: dict = None) -> Tuple[Dict[str, Any], str]:
+        """Return (message dict, encoded frame), encoding the message only once.
+        
+        message may be a dict or an already encoded JSON str/bytes. Metadata
+        is merged into a copy so a message shared by several sends is never
+        mutated.
+        """
+        if isinstance(message, (str, bytes)):
+            message_data = loads(message)
+            if not metadata:
+                return message_data, message.decode() if isinstance(message, bytes) else message
+        else:
+            message_data = message
         
         # Add metadata
         if metadata:
-            message_data.update(metadata)
-        
+            message_data = {**message_data, **metadata}
+        return message_data, dumps(message_data).decode()
+
+    async def send_personal_message(self, message: Union[Dict[str, Any], str, bytes], user_id: str, notification_type: str = "general", 
+                                  sender_id: str = None, sender_name: str = None, metadata: dict = None):
+        """Send message to user, store in database if offline"""
+        message_data, payload = self.prepare_message(message, metadata)
+        return await self.send_prepared(message_data, payload, user_id, notification_type, sender_id, sender_name)
+
+    async def send_prepared(self, message_data: Dict[str, Any], payload: str, user_id: str, notification_type: str = "general",
+                            sender_id: str = None, sender_name: str = None):
+        """Deliver an already encoded message and record the notification"""
         # Create notification record
         notification_id = str(uuid.uuid4())
         notification_record = {
@@ -415,87 +514,164 @@ class ConnectionManager:
             "is_reply": False
         }
         
-        # Try to send via WebSocket if user is online
-        if user_id in self.active_connections:
-            try:
-                await self.active_connections[user_id].send_text(json.dumps(message_data))
+        # Try to send via WebSocket if user is online, here or on another worker
+        try:
+            if user_id in self.active_connections:
+                delivery = self.deliver_local(user_id, payload)
+            else:
+                delivery = self.backplane.publish(user_id, payload)
+            delivered = await asyncio.wait_for(delivery, FANOUT_TIMEOUT_SECONDS)
+            if delivered:
                 notification_record["delivered"] = True
                 notification_record["delivered_at"] = datetime.now(timezone.utc)
                 logger.info(f"Notification delivered to online user {user_id}")
-            except Exception as e:
-                logger.error(f"Failed to deliver notification to user {user_id}: {str(e)}")
-                notification_record["delivery_attempts"] = 1
+        except asyncio.TimeoutError:
+            logger.warning(f"Notification send to user {user_id} timed out after {FANOUT_TIMEOUT_SECONDS}s")
+            notification_record["delivery_attempts"] = 1
+        except Exception as e:
+            logger.error(f"Failed to deliver notification to user {user_id}: {str(e)}")
+            notification_record["delivery_attempts"] = 1
         
-        # Store notification in database (always store for audit trail)
-        await db.notifications.insert_one(notification_record)
-        
-        # Log notification attempt in audit system
-        if AUDIT_ENABLED and audit_system:
-            await audit_system.log_action(
-                action=AuditAction.ADMIN_SYSTEM_CONFIG_CHANGED,
-                user_id=sender_id or "system",
-                entity_type="notification",
-                entity_id=notification_id,
-                target_user_id=user_id,
-                metadata={
-                    "notification_type": notification_type,
-                    "delivered": notification_record["delivered"],
-                    "message": message_data.get("message", ""),
-                    "sender_name": sender_name
-                }
-            )
+        # Store notification in database (always store for audit trail); the
+        # write and its audit entry happen in the background
+        await notification_writer.submit(notification_record)
         
         return notification_record
 
     async def deliver_pending_notifications(self, user_id: str):
-        """Deliver pending notifications when user comes online"""
+        """Replay undelivered notifications in batched frames when user comes online"""
         try:
-            # Get pending notifications for this user
-            pending_notifications = await db.notifications.find({
-                "user_id": user_id,
-                "delivered": False
-            }).sort("created_at", 1).to_list(50)  # Limit to 50 most recent
-            
-            if pending_notifications:
+            # Each page is marked delivered before the next is read, so the
+            # delivered flag alone moves the replay forward; an older record
+            # that lands late (write-behind queue, clock skew) is still picked up
+            for _ in range(PENDING_REPLAY_MAX_BATCHES):
+                pending_notifications = await db.notifications.find(
+                    {"user_id": user_id, "delivered": False},
+                    {"_id": 0, "id": 1, "data": 1, "created_at": 1}
+                ).sort([("created_at", 1), ("id", 1)]).to_list(PENDING_REPLAY_BATCH_SIZE)
+                
+                if not pending_notifications:
+                    break
+                
+                notification_ids = [notification["id"] for notification in pending_notifications]
                 logger.info(f"Delivering {len(pending_notifications)} pending notifications to user {user_id}")
                 
-                for notification in pending_notifications:
-                    try:
-                        # Send the notification
-                        await self.active_connections[user_id].send_text(json.dumps(notification["data"]))
-                        
-                        # Mark as delivered
-                        await db.notifications.update_one(
-                            {"id": notification["id"]},
-                            {
-                                "$set": {
-                                    "delivered": True,
-                                    "delivered_at": datetime.now(timezone.utc)
-                                }
-                            }
-                        )
-                        
-                        logger.info(f"Delivered pending notification {notification['id']} to user {user_id}")
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to deliver pending notification {notification['id']}: {str(e)}")
-                        
-                        # Increment delivery attempts
-                        await db.notifications.update_one(
-                            {"id": notification["id"]},
-                            {"$inc": {"delivery_attempts": 1}}
-                        )
+                try:
+                    # Send the whole page as one frame
+                    await self.active_connections[user_id].send_text(dumps({
+                        "type": "notification_batch",
+                        "notifications": [notification["data"] for notification in pending_notifications]
+                    }).decode())
+                except Exception as e:
+                    logger.error(f"Failed to deliver pending notifications to user {user_id}: {str(e)}")
+                    await db.notifications.update_many(
+                        {"id": {"$in": notification_ids}},
+                        {"$inc": {"delivery_attempts": 1}}
+                    )
+                    break
+                
+                # Mark the page as delivered
+                await db.notifications.update_many(
+                    {"id": {"$in": notification_ids}},
+                    {"$set": {"delivered": True, "delivered_at": datetime.now(timezone.utc)}}
+                )
+                
+                if len(pending_notifications) < PENDING_REPLAY_BATCH_SIZE:
+                    break
                         
         except Exception as e:
             logger.error(f"Error delivering pending notifications to user {user_id}: {str(e)}")
 
-    async def broadcast_nearby(self, message: str, location: Location, radius_km: float = 5.0):
+    async def send_many(self, message: Union[Dict[str, Any], str, bytes], user_ids: List[str], metadata: dict = None, **kwargs) -> List[Dict[str, Any]]:
+        """Send the same message to several users concurrently with per-recipient outcomes"""
+        # Encode once for every recipient
+        message_data, payload = self.prepare_message(message, metadata)
+        return await fan_out(
+            user_ids,
+            lambda user_id: self.send_prepared(message_data, payload, user_id, **kwargs),
+            # send_prepared bounds the socket send itself; cancelling it here
+            # could drop the notification record
+            timeout=None,
+            classify=lambda record: DELIVERED if record["delivered"] else STORED
+        )
+
+    async def broadcast_nearby(self, message: Union[Dict[str, Any], str, bytes], location: Location, radius_km: float = 5.0) -> List[Dict[str, Any]]:
         """Broadcast message to users within radius"""
-        for user_id, user_location in self.user_locations.items():
-            if calculate_distance_km(location, user_location) <= radius_km:
-                await self.send_personal_message(message, user_id)
+        nearby = self.user_locations.within(location.latitude, location.longitude, radius_km)
+        return await self.send_many(message, [user_id for user_id, _ in nearby])
+
+manager = ConnectionManager(create_backplane())
+
+async def audit_notifications(records: List[Dict[str, Any]]):
+    """Log stored notifications in the audit system"""
+    if not (AUDIT_ENABLED and audit_system):
+        return
+    for record in records:
+        await audit_system.log_action(
+            action=AuditAction.ADMIN_SYSTEM_CONFIG_CHANGED,
+            user_id=record["sender_id"] or "system",
+            entity_type="notification",
+            entity_id=record["id"],
+            target_user_id=record["user_id"],
+            metadata={
+                "notification_type": record["type"],
+                "delivered": record["delivered"],
+                "message": record["message"],
+                "sender_name": record["sender_name"]
+            }
+        )
+
+# Write-behind storage for notification records
+notification_writer = NotificationWriter(
+    db.notifications,
+    after_write=audit_notifications,
+    max_queue=int(os.environ.get('NOTIFICATION_QUEUE_SIZE', '10000')),
+    batch_size=int(os.environ.get('NOTIFICATION_BATCH_SIZE', '200')),
+    flush_interval=float(os.environ.get('NOTIFICATION_FLUSH_INTERVAL', '0.05')),
+    max_retries=int(os.environ.get('NOTIFICATION_MAX_RETRIES', '5'))
+)
 
-manager = ConnectionManager()
+# Driver matching runs $geoNear in MongoDB by default; "memory" uses the
+# process-local grid index instead (single worker deployments only)
+DRIVER_MATCH_RADIUS_KM = 10
+DRIVER_MATCHING_BACKEND = os.environ.get('DRIVER_MATCHING_BACKEND', 'geonear')
+driver_index = DriverGeoIndex(cell_size_deg=float(os.environ.get('DRIVER_INDEX_CELL_DEG', '0.05')))
+
+def index_driver(user: User, latitude: float, longitude: float):
+    """Keep an online driver matchable in the in-memory index (memory backend only)"""
+    if DRIVER_MATCHING_BACKEND == "memory" and user.role == UserRole.DRIVER and user.is_online:
+        driver_index.upsert(user.id, latitude, longitude)
+
+def unindex_driver(user_id: str):
+    if DRIVER_MATCHING_BACKEND == "memory":
+        driver_index.remove(user_id)
+
+# GPS pings are coalesced per user and written in batches; pings that move
+# less than LOCATION_MIN_MOVE_METERS are dropped
+location_ingestor = LocationIngestor(
+    db.users,
+    db.location_history,
+    flush_interval=float(os.environ.get('LOCATION_FLUSH_INTERVAL', '1.0')),
+    min_move_meters=float(os.environ.get('LOCATION_MIN_MOVE_METERS', '10')),
+    history_batch_size=int(os.environ.get('LOCATION_HISTORY_BATCH_SIZE', '500')),
+    position_fields=("current_location", DRIVER_GEO_FIELD)
+)
+
+async def set_online_status(user: User, online: bool) -> Optional[Dict[str, Any]]:
+    """Persist a user's online flag, moving online_drivers only on a real transition.
+
+    Returns the user's previous status document, or None if the user does not exist.
+    """
+    previous = await db.users.find_one_and_update(
+        {"id": user.id},
+        {"$set": {"is_online": online}},
+        projection={"_id": 0, "is_online": 1}
+    )
+    if previous is not None:
+        user_cache.update(user.id, is_online=online)
+        if user.role == UserRole.DRIVER and previous.get("is_online", False) != online:
+            await platform_stats.driver_status_changed(online)
+    return previous
 
 # === API ENDPOINTS ===
 
@@ -534,8 +710,10 @@ async def register(user_data: UserCreate, request: Request):
     
     user_dict = user.model_dump()
     user_dict["password"] = hashed_password
+    user_dict[SEARCH_FIELD] = search_tokens("users", user_dict)
     
     await db.users.insert_one(user_dict)
+    await platform_stats.user_registered(user.role)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -622,10 +800,7 @@ async def login(user_credentials: UserLogin, request: Request):
     user = User(**{k: v for k, v in user_doc.items() if k != "password"})
     
     # Update user online status to true on login
-    await db.users.update_one(
-        {"id": user.id},
-        {"$set": {"is_online": True}}
-    )
+    await set_online_status(user, True)
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -663,11 +838,11 @@ async def login(user_credentials: UserLogin, request: Request):
 async def logout(current_user: User = Depends(get_current_user)):
     """Logout user and set online status to false"""
     
-    # Update user online status to false on logout
-    await db.users.update_one(
-        {"id": current_user.id},
-        {"$set": {"is_online": False}}
-    )
+    # Update user online status to false on logout; a queued location ping
+    # must not put the user back online afterwards
+    await location_ingestor.settle(current_user.id, {"is_online": False})
+    await set_online_status(current_user, False)
+    unindex_driver(current_user.id)
     
     # Log logout action
     if AUDIT_ENABLED and audit_system:
@@ -711,6 +886,9 @@ async def get_driver_profile(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=404, detail="Driver profile not found")
     return DriverProfile(**profile)
 
+# Number of nearest drivers notified about a new ride request
+RIDE_REQUEST_FANOUT_WIDTH = int(os.environ.get('RIDE_REQUEST_FANOUT_WIDTH', '5'))
+
 @api_router.post("/rides/request", response_model=Dict[str, Any])
 async def create_ride_request(request_data: RideRequest, request: Request, current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.RIDER:
@@ -726,7 +904,10 @@ async def create_ride_request(request_data: RideRequest, request: Request, curre
     request_data.estimated_fare = calculate_fare(distance_km, request_data.vehicle_type)
     
     request_dict = request_data.model_dump()
+    request_dict[PICKUP_GEO_FIELD] = geojson_point(request_dict["pickup_location"])
+    request_dict[SEARCH_FIELD] = search_tokens("ride_requests", request_dict)
     await db.ride_requests.insert_one(request_dict)
+    await platform_stats.ride_requested()
     
     # Log ride request creation
     if AUDIT_ENABLED and audit_system:
@@ -750,22 +931,23 @@ async def create_ride_request(request_data: RideRequest, request: Request, curre
     # Find nearby available drivers
     matches = await find_nearby_drivers(request_data)
     
-    # Notify nearby drivers via WebSocket
-    for match in matches[:5]:  # Notify top 5 matches
-        await manager.send_personal_message(
-            json.dumps({
-                "type": "ride_request",
-                "request_id": request_data.id,
-                "pickup_address": request_data.pickup_location.address,
-                "dropoff_address": request_data.dropoff_location.address,
-                "estimated_fare": request_data.estimated_fare,
-                "distance_km": distance_km
-            }),
-            match["driver_id"],
-            notification_type="ride_request",
-            sender_id=current_user.id,
-            sender_name=current_user.name
-        )
+    # Notify the nearest drivers via WebSocket concurrently
+    notification_outcomes = await manager.send_many(
+        {
+            "type": "ride_request",
+            "request_id": request_data.id,
+            "pickup_address": request_data.pickup_location.address,
+            "dropoff_address": request_data.dropoff_location.address,
+            "estimated_fare": request_data.estimated_fare,
+            "distance_km": distance_km
+        },
+        [match["driver_id"] for match in matches[:RIDE_REQUEST_FANOUT_WIDTH]],
+        notification_type="ride_request",
+        sender_id=current_user.id,
+        sender_name=current_user.name
+    )
+    notification_summary = summarize(notification_outcomes)
+    logger.info(f"Ride request {request_data.id} driver notifications: {notification_summary}")
     
     # Check if feature flag is enabled for enhanced notifications
     enhanced_notifications = feature_flags.get("realtime.status.deltaV1", False)
@@ -773,7 +955,8 @@ async def create_ride_request(request_data: RideRequest, request: Request, curre
     response_data = {
         "request_id": request_data.id,
         "estimated_fare": request_data.estimated_fare,
-        "matches_found": len(matches)
+        "matches_found": len(matches),
+        "drivers_notified": notification_summary
     }
     
     # Add notification metadata if feature flag is enabled
@@ -798,27 +981,55 @@ async def create_ride_request(request_data: RideRequest, request: Request, curre
 
 async def find_nearby_drivers(request: RideRequest) -> List[Dict[str, Any]]:
     """Find nearby available drivers for a ride request"""
-    # Get all online drivers with matching vehicle type
-    drivers = await db.users.find({
-        "role": UserRole.DRIVER,
-        "is_online": True,
-        "current_location": {"$exists": True}
-    }).to_list(None)
-    
-    matches = []
-    for driver in drivers:
-        if not driver.get("current_location"):
-            continue
-            
-        driver_location = Location(**driver["current_location"])
-        distance_km = calculate_distance_km(request.pickup_location, driver_location)
+    pickup = request.pickup_location
+    
+    if DRIVER_MATCHING_BACKEND == "memory":
+        # Candidate drivers come from the in-memory grid index, nearest first
+        candidates = driver_index.query_radius(pickup.latitude, pickup.longitude, DRIVER_MATCH_RADIUS_KM)
+        if not candidates:
+            return []
         
-        if distance_km <= 10:  # Within 10km radius
-            matches.append({
-                "driver_id": driver["id"],
+        # Confirm the candidates are still online drivers and fetch their ratings
+        drivers = await db.users.find(
+            {
+                "id": {"$in": [driver_id for driver_id, _ in candidates]},
+                "role": UserRole.DRIVER,
+                "is_online": True
+            },
+            {"_id": 0, "id": 1, "rating": 1}
+        ).to_list(None)
+        ratings = {driver["id"]: driver.get("rating", 5.0) for driver in drivers}
+        
+        matches = [
+            {
+                "driver_id": driver_id,
                 "distance_km": distance_km,
+                "rating": ratings[driver_id]
+            }
+            for driver_id, distance_km in candidates
+            if driver_id in ratings
+        ]
+    else:
+        # Let MongoDB return only online drivers within the radius, nearest first
+        drivers = await db.users.aggregate([
+            geo_near_stage(
+                DRIVER_GEO_FIELD,
+                pickup.latitude,
+                pickup.longitude,
+                query={"role": UserRole.DRIVER, "is_online": True},
+                radius_km=DRIVER_MATCH_RADIUS_KM
+            ),
+            {"$project": {"_id": 0, "id": 1, "rating": 1, "distance_m": 1}}
+        ]).to_list(None)
+        
+        matches = [
+            {
+                "driver_id": driver["id"],
+                "distance_km": driver["distance_m"] / 1000.0,
                 "rating": driver.get("rating", 5.0)
-            })
+            }
+            for driver in drivers
+        ]
     
     # Sort by distance and rating
     matches.sort(key=lambda x: (x["distance_km"], -x["rating"]))
@@ -925,17 +1136,20 @@ async def accept_ride_request(request_id: str, current_user: User = Depends(get_
     )
     
     # Save ride match
-    await db.ride_matches.insert_one(match.model_dump())
+    match_dict = match.model_dump()
+    match_dict[SEARCH_FIELD] = search_tokens("ride_matches", match_dict)
+    await db.ride_matches.insert_one(match_dict)
+    await platform_stats.ride_accepted()
     
     # Notify rider
     await manager.send_personal_message(
-        json.dumps({
+        {
             "type": "ride_accepted",
             "match_id": match.id,
             "driver_name": current_user.name,
             "driver_rating": current_user.rating,
             "estimated_arrival": "5 minutes"
-        }),
+        },
         request_obj.rider_id,
         notification_type="ride_accepted",
         sender_id=current_user.id,
@@ -997,7 +1211,7 @@ async def decline_ride_request(request_id: str, current_user: User = Depends(get
 async def get_my_rides(current_user: User = Depends(get_current_user)):
     """Get completed rides for the current user"""
     if current_user.role == UserRole.RIDER:
-        rides = await db.ride_matches.find({"rider_id": current_user.id}).to_list(None)
+        rides = await db.ride_matches.find({"rider_id": current_user.id}, HIDDEN_MATCH_FIELDS).to_list(None)
         
         # Get driver names for rider's rides
         driver_ids = set()
@@ -1039,7 +1253,7 @@ async def get_my_rides(current_user: User = Depends(get_current_user)):
                 ride["comment"] = None
                 
     elif current_user.role == UserRole.DRIVER:
-        rides = await db.ride_matches.find({"driver_id": current_user.id}).to_list(None)
+        rides = await db.ride_matches.find({"driver_id": current_user.id}, HIDDEN_MATCH_FIELDS).to_list(None)
         
         # Get rider names for driver's rides
         rider_ids = set()
@@ -1080,7 +1294,7 @@ async def get_my_rides(current_user: User = Depends(get_current_user)):
                 ride["rating"] = None
                 ride["comment"] = None
     else:
-        rides = await db.ride_matches.find({}).to_list(None)
+        rides = await db.ride_matches.find({}, HIDDEN_MATCH_FIELDS).to_list(None)
     
     return convert_objectids_to_strings(rides)
 
@@ -1089,9 +1303,9 @@ async def get_my_ride_requests(current_user: User = Depends(get_current_user)):
     """Get all ride requests and matches for the current user"""
     if current_user.role == UserRole.RIDER:
         # Get pending requests
-        pending_requests = await db.ride_requests.find({"rider_id": current_user.id}).to_list(None)
+        pending_requests = await db.ride_requests.find({"rider_id": current_user.id}, HIDDEN_REQUEST_FIELDS).to_list(None)
         # Get completed matches
-        completed_matches = await db.ride_matches.find({"rider_id": current_user.id}).to_list(None)
+        completed_matches = await db.ride_matches.find({"rider_id": current_user.id}, HIDDEN_MATCH_FIELDS).to_list(None)
         
         # Log audit event
         if AUDIT_ENABLED and audit_system:
@@ -1112,9 +1326,9 @@ async def get_my_ride_requests(current_user: User = Depends(get_current_user)):
     
     elif current_user.role == UserRole.DRIVER:
         # Get available requests (all pending)
-        available_requests = await db.ride_requests.find({"status": RideStatus.PENDING}).to_list(None)
+        available_requests = await db.ride_requests.find({"status": RideStatus.PENDING}, HIDDEN_REQUEST_FIELDS).to_list(None)
         # Get driver's completed matches
-        completed_matches = await db.ride_matches.find({"driver_id": current_user.id}).to_list(None)
+        completed_matches = await db.ride_matches.find({"driver_id": current_user.id}, HIDDEN_MATCH_FIELDS).to_list(None)
         
         # Log audit event
         if AUDIT_ENABLED and audit_system:
@@ -1135,8 +1349,8 @@ async def get_my_ride_requests(current_user: User = Depends(get_current_user)):
     
     elif current_user.role == UserRole.ADMIN:
         # Admins can see everything
-        all_requests = await db.ride_requests.find({}).to_list(None)
-        all_matches = await db.ride_matches.find({}).to_list(None)
+        all_requests = await db.ride_requests.find({}, HIDDEN_REQUEST_FIELDS).to_list(None)
+        all_matches = await db.ride_matches.find({}, HIDDEN_MATCH_FIELDS).to_list(None)
         
         return {
             "all_requests": convert_objectids_to_strings(all_requests),
@@ -1148,33 +1362,130 @@ async def get_my_ride_requests(current_user: User = Depends(get_current_user)):
     else:
         raise HTTPException(status_code=403, detail="Access denied")
 
+# /rides/unified returns windows of at most this many requests and matches;
+# page_info.next_cursor continues both lists
+UNIFIED_RIDES_PAGE_SIZE = int(os.environ.get('UNIFIED_RIDES_PAGE_SIZE', '100'))
+UNIFIED_RIDES_MAX_PAGE_SIZE = 500
+
+async def load_unified_window(
+    requests_query: Dict[str, Any],
+    matches_query: Dict[str, Any],
+    positions: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str],
+    counterpart: Optional[str] = None,
+    rater_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Fetch one window of ride requests and matches, plus both totals.
+    
+    The two lists are paged independently: the cursor holds one position per
+    collection, and a collection whose position is null is exhausted.
+    """
+    async def window(collection, pipeline, key):
+        if cursor and not positions.get(key):
+            return []
+        return await collection.aggregate(pipeline).to_list(None)
+    
+    async def total(collection, query):
+        if not query:
+            return await collection.estimated_document_count()
+        return await collection.count_documents(query)
+    
+    requests, matches, total_requests, total_matches = await asyncio.gather(
+        window(db.ride_requests, requests_pipeline(requests_query, positions.get("requests"), limit), "requests"),
+        window(db.ride_matches, matches_pipeline(matches_query, positions.get("matches"), limit, counterpart, rater_id), "matches"),
+        total(db.ride_requests, requests_query),
+        total(db.ride_matches, matches_query)
+    )
+    
+    next_positions = {
+        "requests": next_position(requests, RIDE_SORT_FIELD, limit),
+        "matches": next_position(matches, RIDE_SORT_FIELD, limit)
+    }
+    return {
+        "requests": requests,
+        "matches": matches,
+        "total_requests": total_requests,
+        "total_matches": total_matches,
+        "page_info": {
+            "limit": limit,
+            "next_cursor": encode_cursor(next_positions) if any(next_positions.values()) else None
+        }
+    }
+
 @api_router.get("/rides/unified", response_model=Dict[str, Any])
-async def get_unified_ride_data(current_user: User = Depends(get_current_user)):
-    """Unified endpoint for comprehensive ride data access based on user role"""
+async def get_unified_ride_data(
+    request: Request,
+    stream: Optional[bool] = None,
+    limit: int = UNIFIED_RIDES_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Unified endpoint for comprehensive ride data access based on user role.
+    
+    Requests and matches are returned newest first in windows of limit
+    documents, projected to the fields the UI renders; pass
+    page_info.next_cursor back as cursor for the next window. Admins can
+    request the NDJSON streaming mode with ?stream=true (or
+    Accept: application/x-ndjson).
+    """
+    
+    if current_user.role == UserRole.ADMIN and wants_ndjson(request, stream):
+        async def records():
+            counts = {"pending_requests": 0, "completed_matches": 0}
+            async for record in iter_admin_rides(counts):
+                yield record
+            
+            total_users = await db.users.count_documents({})
+            online_drivers = await db.users.count_documents({"role": UserRole.DRIVER, "is_online": True})
+            
+            if AUDIT_ENABLED and audit_system:
+                await audit_system.log_action(
+                    action=AuditAction.ADMIN_RIDE_MODIFIED,
+                    user_id=current_user.id,
+                    entity_type="unified_ride_query",
+                    entity_id=f"admin_unified_{counts['pending_requests']}_{counts['completed_matches']}",
+                    metadata={
+                        **counts,
+                        "total_users": total_users,
+                        "online_drivers": online_drivers,
+                        "streamed": True
+                    }
+                )
+            yield {
+                "type": "summary",
+                "role": "admin",
+                "statistics": {
+                    "total_pending": counts["pending_requests"],
+                    "total_completed": counts["completed_matches"],
+                    "total_rides": counts["pending_requests"] + counts["completed_matches"],
+                    "total_users": total_users,
+                    "online_drivers": online_drivers
+                }
+            }
+        
+        return ndjson_response(records())
+    
+    positions: Dict[str, Any] = {}
+    if cursor:
+        try:
+            positions = decode_cursor(cursor, keys=("requests", "matches"))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if limit < 1 or limit > UNIFIED_RIDES_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {UNIFIED_RIDES_MAX_PAGE_SIZE}")
     
     if current_user.role == UserRole.ADMIN:
-        # Admins see everything
-        pending_requests = await db.ride_requests.find({}).to_list(None)
-        completed_matches = await db.ride_matches.find({}).to_list(None)
-        
-        # Get all ratings to include in ride data
-        all_ratings = await db.ratings.find({}).to_list(None)
-        ratings_by_ride = {rating["ride_id"]: rating for rating in all_ratings}
-        
-        # Add rating information to completed matches
-        for match in completed_matches:
-            ride_id = match["id"]
-            if ride_id in ratings_by_ride:
-                rating = ratings_by_ride[ride_id]
-                match["rating"] = rating["rating"]
-                match["comment"] = rating["comment"]
-            else:
-                match["rating"] = None
-                match["comment"] = None
+        # Admins page through every ride; the NDJSON mode above exports them all
+        window = await load_unified_window({}, {}, positions, limit, cursor)
+        pending_requests = window["requests"]
+        completed_matches = window["matches"]
         
         # Get statistics
-        total_users = await db.users.count_documents({})
-        online_drivers = await db.users.count_documents({"role": UserRole.DRIVER, "is_online": True})
+        total_users, online_drivers = await asyncio.gather(
+            db.users.count_documents({}),
+            db.users.count_documents({"role": UserRole.DRIVER, "is_online": True})
+        )
         
         # Log audit event
         if AUDIT_ENABLED and audit_system:
@@ -1191,62 +1502,32 @@ async def get_unified_ride_data(current_user: User = Depends(get_current_user)):
                 }
             )
         
-        return {
+        return FastJSONResponse({
             "role": "admin",
-            "pending_requests": convert_objectids_to_strings(pending_requests),
-            "completed_matches": convert_objectids_to_strings(completed_matches),
+            "pending_requests": pending_requests,
+            "completed_matches": completed_matches,
             "statistics": {
-                "total_pending": len(pending_requests),
-                "total_completed": len(completed_matches),
-                "total_rides": len(pending_requests) + len(completed_matches),
+                "total_pending": window["total_requests"],
+                "total_completed": window["total_matches"],
+                "total_rides": window["total_requests"] + window["total_matches"],
                 "total_users": total_users,
                 "online_drivers": online_drivers
-            }
-        }
+            },
+            "page_info": window["page_info"]
+        })
     
     elif current_user.role == UserRole.RIDER:
-        # Riders see their requests and matches
-        pending_requests = await db.ride_requests.find({"rider_id": current_user.id}).to_list(None)
-        completed_matches = await db.ride_matches.find({"rider_id": current_user.id}).to_list(None)
-        
-        # Get ratings for rider's completed matches
-        rider_ratings = await db.ratings.find({"rater_id": current_user.id}).to_list(None)
-        ratings_by_ride = {rating["ride_id"]: rating for rating in rider_ratings}
-        
-        # Get driver names for completed matches
-        driver_ids = set()
-        for match in completed_matches:
-            if match.get("driver_id"):
-                driver_ids.add(match["driver_id"])
-        
-        drivers = {}
-        if driver_ids:
-            driver_cursor = db.users.find({"id": {"$in": list(driver_ids)}})
-            driver_list = await driver_cursor.to_list(None)
-            for driver in driver_list:
-                drivers[driver['id']] = {
-                    'name': driver.get('name', 'Unknown Driver'),
-                    'email': driver.get('email', 'Unknown Email')
-                }
-        
-        # Add rating information and driver names to completed matches
-        for match in completed_matches:
-            ride_id = match["id"]
-            if ride_id in ratings_by_ride:
-                rating = ratings_by_ride[ride_id]
-                match["rating"] = rating["rating"]
-                match["comment"] = rating["comment"]
-            else:
-                match["rating"] = None
-                match["comment"] = None
-            
-            # Add driver name
-            if match.get("driver_id") and match["driver_id"] in drivers:
-                match["driver_name"] = drivers[match["driver_id"]]["name"]
-                match["driver_email"] = drivers[match["driver_id"]]["email"]
-            else:
-                match["driver_name"] = "Unknown Driver"
-                match["driver_email"] = "Unknown Email"
+        # Riders see their requests and matches, with the rating they left
+        # and the driver's name joined in
+        window = await load_unified_window(
+            {"rider_id": current_user.id},
+            {"rider_id": current_user.id},
+            positions, limit, cursor,
+            counterpart="driver",
+            rater_id=current_user.id
+        )
+        pending_requests = window["requests"]
+        completed_matches = window["matches"]
         
         # Log audit event
         if AUDIT_ENABLED and audit_system:
@@ -1261,72 +1542,45 @@ async def get_unified_ride_data(current_user: User = Depends(get_current_user)):
                 }
             )
         
-        return {
+        return FastJSONResponse({
             "role": "rider",
-            "pending_requests": convert_objectids_to_strings(pending_requests),
-            "completed_matches": convert_objectids_to_strings(completed_matches),
+            "pending_requests": pending_requests,
+            "completed_matches": completed_matches,
             "statistics": {
-                "total_pending": len(pending_requests),
-                "total_completed": len(completed_matches),
-                "total_rides": len(pending_requests) + len(completed_matches)
-            }
-        }
+                "total_pending": window["total_requests"],
+                "total_completed": window["total_matches"],
+                "total_rides": window["total_requests"] + window["total_matches"]
+            },
+            "page_info": window["page_info"]
+        })
     
     elif current_user.role == UserRole.DRIVER:
-        # Drivers see available requests and their matches
-        available_requests = await db.ride_requests.find({"status": RideStatus.PENDING}).to_list(None)
-        completed_matches = await db.ride_matches.find({"driver_id": current_user.id}).to_list(None)
-        
-        # Get ratings for driver's completed matches
-        all_ratings = await db.ratings.find({}).to_list(None)
-        ratings_by_ride = {rating["ride_id"]: rating for rating in all_ratings}
-        
-        # Get rider names for completed matches
-        rider_ids = set()
-        for match in completed_matches:
-            if match.get("rider_id"):
-                rider_ids.add(match["rider_id"])
-        
-        riders = {}
-        if rider_ids:
-            rider_cursor = db.users.find({"id": {"$in": list(rider_ids)}})
-            rider_list = await rider_cursor.to_list(None)
-            for rider in rider_list:
-                riders[rider['id']] = {
-                    'name': rider.get('name', 'Unknown Rider'),
-                    'email': rider.get('email', 'Unknown Email')
-                }
-        
-        # Add rating information and rider names to completed matches
-        for match in completed_matches:
-            ride_id = match["id"]
-            if ride_id in ratings_by_ride:
-                rating = ratings_by_ride[ride_id]
-                match["rating"] = rating["rating"]
-                match["comment"] = rating["comment"]
-            else:
-                match["rating"] = None
-                match["comment"] = None
-            
-            # Add rider name
-            if match.get("rider_id") and match["rider_id"] in riders:
-                match["rider_name"] = riders[match["rider_id"]]["name"]
-                match["rider_email"] = riders[match["rider_id"]]["email"]
-            else:
-                match["rider_name"] = "Unknown Rider"
-                match["rider_email"] = "Unknown Email"
+        # Drivers see open requests and their own matches, with the ride's
+        # rating and the rider's name joined in
+        window = await load_unified_window(
+            {"status": RideStatus.PENDING},
+            {"driver_id": current_user.id},
+            positions, limit, cursor,
+            counterpart="rider"
+        )
+        available_requests = window["requests"]
+        completed_matches = window["matches"]
         
         # Get driver location for distance calculations
-        driver = await db.users.find_one({"id": current_user.id})
+        driver = await db.users.find_one(
+            {"id": current_user.id},
+            {"_id": 0, "is_online": 1, "current_location": 1}
+        )
         driver_location = driver.get("current_location") if driver else None
         
         # Calculate distances for available requests
         if driver_location:
-            for request in available_requests:
-                pickup = request["pickup_location"]
-                distance = calculate_distance_km(
-                    Location(**driver_location), Location(**pickup)
-                )
+            distances = distances_km(
+                driver_location["latitude"],
+                driver_location["longitude"],
+                coordinates_from_locations(request["pickup_location"] for request in available_requests)
+            )
+            for request, distance in zip(available_requests, distances.tolist()):
                 request["distance_to_pickup"] = round(distance, 2)
                 request["estimated_pickup_time"] = int(distance * 2)
         
@@ -1344,20 +1598,21 @@ async def get_unified_ride_data(current_user: User = Depends(get_current_user)):
                 }
             )
         
-        return {
+        return FastJSONResponse({
             "role": "driver",
-            "available_requests": convert_objectids_to_strings(available_requests),
-            "completed_matches": convert_objectids_to_strings(completed_matches),
+            "available_requests": available_requests,
+            "completed_matches": completed_matches,
             "driver_info": {
                 "is_online": driver.get("is_online", False) if driver else False,
                 "current_location": driver_location
             },
             "statistics": {
-                "total_available": len(available_requests),
-                "total_completed": len(completed_matches),
-                "total_rides": len(available_requests) + len(completed_matches)
-            }
-        }
+                "total_available": window["total_requests"],
+                "total_completed": window["total_matches"],
+                "total_rides": window["total_requests"] + window["total_matches"]
+            },
+            "page_info": window["page_info"]
+        })
     
     else:
         raise HTTPException(status_code=403, detail="Access denied")
@@ -1383,12 +1638,12 @@ async def start_ride(match_id: str, current_user: User = Depends(get_current_use
     
     # Notify rider
     await manager.send_personal_message(
-        json.dumps({
+        {
             "type": "ride_started",
             "match_id": match_id,
             "driver_name": current_user.name,
             "message": "Your ride has started! Enjoy your journey."
-        }),
+        },
         match_doc["rider_id"],
         notification_type="ride_started",
         sender_id=current_user.id,
@@ -1418,14 +1673,14 @@ async def driver_arrived(match_id: str, current_user: User = Depends(get_current
     
     # Notify rider
     await manager.send_personal_message(
-        json.dumps({
+        {
             "type": "driver_arrived",
             "match_id": match_id,
             "driver_name": current_user.name,
             "driver_phone": current_user.phone,
             "vehicle_info": getattr(current_user, 'vehicle_info', 'Standard vehicle'),
             "message": "Your driver has arrived at the pickup location"
-        }),
+        },
         match_doc["rider_id"],
         notification_type="driver_arrived",
         sender_id=current_user.id,
@@ -1463,7 +1718,7 @@ async def send_ride_message(match_id: str, message_data: dict, current_user: Use
     
     # Send real-time notification
     await manager.send_personal_message(
-        json.dumps({
+        {
             "type": "ride_message",
             "match_id": match_id,
             "sender_name": current_user.name,
@@ -1471,7 +1726,7 @@ async def send_ride_message(match_id: str, message_data: dict, current_user: Use
             "message": message_data.get("message", ""),
             "message_type": message_data.get("type", "text"),
             "sent_at": message_record["sent_at"].isoformat()
-        }),
+        },
         recipient_id
     )
     
@@ -1487,9 +1742,10 @@ async def complete_ride(match_id: str, current_user: User = Depends(get_current_
     if current_user.id not in [match_doc["driver_id"], match_doc["rider_id"]]:
         raise HTTPException(status_code=403, detail="Unauthorized to complete this ride")
     
-    # Update ride status
-    await db.ride_matches.update_one(
-        {"id": match_id},
+    # Update ride status; the status precondition makes sure a ride is
+    # counted once even when two completions race
+    result = await db.ride_matches.update_one(
+        {"id": match_id, "status": {"$ne": RideStatus.COMPLETED}},
         {
             "$set": {
                 "status": RideStatus.COMPLETED,
@@ -1497,6 +1753,8 @@ async def complete_ride(match_id: str, current_user: User = Depends(get_current_
             }
         }
     )
+    if result.modified_count:
+        await platform_stats.ride_completed(match_doc.get("estimated_fare"))
     
     return {"message": "Ride completed successfully"}
 
@@ -1538,7 +1796,7 @@ async def rate_ride(match_id: str, rating_request: RideRatingRequest, current_us
         logger.info(f"Rating inserted with ID: {result.inserted_id}")
         
         # Update user's average rating
-        await update_user_rating(rating_data.rated_id)
+        await update_user_rating(rating_data.rated_id, rating_data.rating)
         logger.info(f"Updated rating for user {rating_data.rated_id}")
         
         return {"message": "Rating submitted successfully"}
@@ -1549,36 +1807,41 @@ async def rate_ride(match_id: str, rating_request: RideRatingRequest, current_us
         logger.error(f"Error rating ride {match_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-async def update_user_rating(user_id: str):
-    """Update user's average rating based on all ratings received"""
-    ratings = await db.ratings.find({"rated_id": user_id}).to_list(None)
-    if ratings:
-        avg_rating = sum(r["rating"] for r in ratings) / len(ratings)
-        await db.users.update_one(
-            {"id": user_id},
-            {"$set": {"rating": round(avg_rating, 1)}}
-        )
+async def update_user_rating(user_id: str, rating: float):
+    """Add a new rating to the user's running rating_sum/rating_count and average"""
+    await add_rating(db, user_id, rating)
+    user_cache.invalidate(user_id)
 
 @api_router.post("/location/update", response_model=Dict[str, str])
 async def update_location(location_data: LocationUpdate, current_user: User = Depends(get_current_user)):
     location_data.user_id = current_user.id
     
-    # Update user's current location
-    await db.users.update_one(
-        {"id": current_user.id},
+    # A ping from an offline driver brings them online; count the transition
+    if current_user.role == UserRole.DRIVER and not current_user.is_online:
+        await set_online_status(current_user, True)
+    
+    # Update user's current location and location history; the ingestor
+    # coalesces pings and writes them in batches
+    location_dict = location_data.location.model_dump()
+    location_ingestor.submit(
+        current_user.id,
+        location_data.location.latitude,
+        location_data.location.longitude,
         {
-            "$set": {
-                "current_location": location_data.location.model_dump(),
-                "is_online": True
-            }
-        }
+            "current_location": location_dict,
+            DRIVER_GEO_FIELD: geojson_point(location_dict),
+            "is_online": True
+        },
+        history_entry=location_data.model_dump()
     )
     
-    # Store in location history
-    await db.location_history.insert_one(location_data.model_dump())
+    user_cache.update(current_user.id, current_location=location_data.location, is_online=True)
     
     # Update WebSocket manager
-    manager.user_locations[current_user.id] = location_data.location
+    manager.user_locations.update(current_user.id, location_data.location.latitude, location_data.location.longitude)
+    
+    # Keep the driver matching index current
+    index_driver(current_user, location_data.location.latitude, location_data.location.longitude)
     
     return {"message": "Location updated successfully"}
 
@@ -1589,16 +1852,21 @@ async def set_driver_online(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Only drivers can set online status")
     
     # Simply set online status to true
-    result = await db.users.update_one(
-        {"id": current_user.id},
-        {"$set": {"is_online": True}}
-    )
+    previous = await set_online_status(current_user, True)
     
-    if result.matched_count == 0:
+    if previous is None:
         logger.error(f"Driver {current_user.id} not found in database")
         raise HTTPException(status_code=404, detail="Driver not found")
     
-    logger.info(f"Driver {current_user.id} set to online (matched={result.matched_count}, modified={result.modified_count})")
+    logger.info(f"Driver {current_user.id} set to online (was online={previous.get('is_online', False)})")
+    
+    # Make the driver matchable at their last known location
+    if DRIVER_MATCHING_BACKEND == "memory" and current_user.current_location:
+        driver_index.upsert(
+            current_user.id,
+            current_user.current_location.latitude,
+            current_user.current_location.longitude
+        )
     
     return {"message": "Driver is now online", "status": "online"}
 
@@ -1608,18 +1876,14 @@ async def set_driver_offline(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.DRIVER:
         raise HTTPException(status_code=403, detail="Only drivers can set offline status")
     
-    # Get current status from database to ensure accuracy
-    user_doc = await db.users.find_one({"id": current_user.id})
-    current_status = user_doc.get("is_online", False) if user_doc else False
-    
     # Set online status to false
     new_status = False
+    unindex_driver(current_user.id)
+    await location_ingestor.settle(current_user.id, {"is_online": new_status})
     
-    # Update database
-    result = await db.users.update_one(
-        {"id": current_user.id},
-        {"$set": {"is_online": new_status}}
-    )
+    # Update database; the previous document gives the status we replaced
+    user_doc = await set_online_status(current_user, new_status)
+    current_status = user_doc.get("is_online", False) if user_doc else False
     
     # Verify the update
     updated_user = await db.users.find_one({"id": current_user.id})
@@ -1686,6 +1950,9 @@ async def update_driver_preferences(
 
 # === RIDE ENDPOINTS ===
 
+# Cap on the nearest pending requests returned outside the driver's radius
+ALL_PENDING_REQUESTS_LIMIT = 200
+
 @api_router.get("/rides/available", response_model=Dict[str, Any])
 async def get_available_rides(current_user: User = Depends(get_current_user)):
     """Get available rides for drivers with enhanced visibility"""
@@ -1715,42 +1982,47 @@ async def get_available_rides(current_user: User = Depends(get_current_user)):
         
         logger.info(f"Driver {current_user.id} is online and has location set, radius: {radius_km}km")
         
-        # Find pending ride requests
-        pending_requests = await db.ride_requests.find({
+        driver_location = driver["current_location"]
+        pending_query = {
             "status": RideStatus.PENDING,
             "expires_at": {"$gt": datetime.now(timezone.utc)}
-        }).to_list(None)
+        }
         
-        logger.info(f"Found {len(pending_requests)} pending ride requests")
+        # Pending requests within the driver's radius, nearest first
+        nearby_requests = await db.ride_requests.aggregate([
+            geo_near_stage(
+                PICKUP_GEO_FIELD,
+                driver_location["latitude"],
+                driver_location["longitude"],
+                query=pending_query,
+                radius_km=radius_km
+            ),
+            {"$project": HIDDEN_REQUEST_FIELDS}
+        ]).to_list(None)
+        
+        # Nearest pending requests regardless of radius, for the "all requests" view
+        pending_requests = await db.ride_requests.aggregate([
+            geo_near_stage(
+                PICKUP_GEO_FIELD,
+                driver_location["latitude"],
+                driver_location["longitude"],
+                query=pending_query
+            ),
+            {"$limit": ALL_PENDING_REQUESTS_LIMIT},
+            {"$project": HIDDEN_REQUEST_FIELDS}
+        ]).to_list(None)
         
-        available_rides = []
-        all_requests = []
-        driver_location = driver["current_location"]
+        logger.info(f"Found {len(pending_requests)} pending ride requests")
         
-        for request in pending_requests:
-            try:
-                # Calculate distance to pickup
-                pickup = request["pickup_location"]
-                distance = calculate_distance_km(
-                    Location(**driver_location), Location(**pickup)
-                )
-                
-                # Add distance info to all requests
-                ride_info = convert_objectids_to_strings(request)
-                ride_info["distance_to_pickup"] = round(distance, 2)
-                ride_info["estimated_pickup_time"] = int(distance * 2)  # 2 minutes per km estimate
-                all_requests.append(ride_info)
-                
-                # Only show rides within driver's preferred radius
-                if distance <= radius_km:
-                    available_rides.append(ride_info)
-            except Exception as e:
-                logger.error(f"Error processing ride request {request.get('id', 'unknown')}: {e}")
-                continue
+        def with_distance(request):
+            ride_info = convert_objectids_to_strings(request)
+            distance = ride_info.pop("distance_m") / 1000.0
+            ride_info["distance_to_pickup"] = round(distance, 2)
+            ride_info["estimated_pickup_time"] = int(distance * 2)  # 2 minutes per km estimate
+            return ride_info
         
-        # Sort by distance
-        available_rides.sort(key=lambda x: x["distance_to_pickup"])
-        all_requests.sort(key=lambda x: x["distance_to_pickup"])
+        available_rides = [with_distance(request) for request in nearby_requests]
+        all_requests = [with_distance(request) for request in pending_requests]
         
         logger.info(f"Returning {len(available_rides)} available rides and {len(all_requests)} total requests")
         
@@ -1767,14 +2039,14 @@ async def get_available_rides(current_user: User = Depends(get_current_user)):
             except Exception as e:
                 logger.warning(f"Failed to log audit event: {e}")
         
-        return {
+        return FastJSONResponse({
             "available_rides": available_rides,
             "all_pending_requests": all_requests,
             "total_available": len(available_rides),
             "total_pending": len(all_requests),
             "driver_location": driver_location,
             "radius_km": radius_km
-        }
+        })
         
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -1871,6 +2143,7 @@ async def update_ride_status(ride_id: str, update: RideUpdate, current_user: Use
             "rider_id": ride["rider_id"],
             "driver_id": current_user.id,
             "status": RideStatus.ACCEPTED,
+            "created_at": datetime.now(timezone.utc),
             "accepted_at": datetime.now(timezone.utc),
             "pickup_location": ride["pickup_location"],
             "dropoff_location": ride["dropoff_location"],
@@ -1878,9 +2151,11 @@ async def update_ride_status(ride_id: str, update: RideUpdate, current_user: Use
             "estimated_fare": ride["estimated_fare"],
             "passenger_count": ride["passenger_count"]
         }
+        match_data[SEARCH_FIELD] = search_tokens("ride_matches", match_data)
         
         await db.ride_matches.insert_one(match_data)
         await db.ride_requests.update_one({"id": ride_id}, {"$set": {"status": RideStatus.ACCEPTED, "driver_id": current_user.id}})
+        await platform_stats.ride_accepted()
         
         # Log audit
         if AUDIT_ENABLED and audit_system:
@@ -1948,9 +2223,10 @@ async def update_ride_status(ride_id: str, update: RideUpdate, current_user: Use
         
         completed_at = datetime.now(timezone.utc)
         
-        # Update ride status
-        await db.ride_matches.update_one(
-            {"id": ride_id, "driver_id": current_user.id},
+        # Update ride status; only one of two racing completions gets past
+        # the status precondition, so the ride is counted and paid once
+        result = await db.ride_matches.update_one(
+            {"id": ride_id, "driver_id": current_user.id, "status": RideStatus.IN_PROGRESS},
             {
                 "$set": {
                     "status": RideStatus.COMPLETED,
@@ -1959,9 +2235,12 @@ async def update_ride_status(ride_id: str, update: RideUpdate, current_user: Use
                 }
             }
         )
+        if result.modified_count == 0:
+            raise HTTPException(status_code=400, detail="Ride must be in progress to complete")
         
         # Get updated ride for payment processing
         completed_ride = await db.ride_matches.find_one({"id": ride_id})
+        await platform_stats.ride_completed(completed_ride.get("estimated_fare") if completed_ride else 0)
         
         # Create payment record
         payment_data = {
@@ -1981,6 +2260,7 @@ async def update_ride_status(ride_id: str, update: RideUpdate, current_user: Use
                 "completion_notes": update.notes
             }
         }
+        payment_data[SEARCH_FIELD] = search_tokens("payments", payment_data)
         
         await db.payments.insert_one(payment_data)
         
@@ -2053,7 +2333,7 @@ async def update_ride_status(ride_id: str, update: RideUpdate, current_user: Use
             
             # Send notification to driver about platform fee deduction
             await manager.send_personal_message(
-                json.dumps({
+                {
                     "type": "balance_transaction",
                     "transaction_id": transaction_id,
                     "amount": platform_fee,
@@ -2065,7 +2345,7 @@ async def update_ride_status(ride_id: str, update: RideUpdate, current_user: Use
                     "admin_name": "System",
                     "message": f"Platform fee deducted: Ⓣ{platform_fee:.2f}. New balance: Ⓣ{new_balance:.2f}",
                     "timestamp": processing_time.isoformat()
-                }),
+                },
                 current_user.id,
                 notification_type="balance_transaction",
                 sender_id="system",
@@ -2455,20 +2735,34 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
     try:
         while True:
             data = await websocket.receive_text()
-            message_data = json.loads(data)
+            message_data = loads(data)
             
             if message_data.get("type") == "location_update":
                 location = Location(**message_data["location"])
-                manager.user_locations[user_id] = location
+                manager.user_locations.update(user_id, location.latitude, location.longitude)
+                # Drivers who went online without a stored location join the index here
+                if DRIVER_MATCHING_BACKEND == "memory":
+                    user = await load_user(user_id)
+                    if user is not None:
+                        index_driver(user, location.latitude, location.longitude)
                 
                 # Update user location in database
-                await db.users.update_one(
-                    {"id": user_id},
-                    {"$set": {"current_location": location.model_dump()}}
+                location_dict = location.model_dump()
+                location_ingestor.submit(
+                    user_id,
+                    location.latitude,
+                    location.longitude,
+                    {"current_location": location_dict, DRIVER_GEO_FIELD: geojson_point(location_dict)}
                 )
+                user_cache.update(user_id, current_location=location)
                 
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        pass
+    finally:
+        # Also clean up when the handler fails, and drop the movement
+        # baseline so the next session's first ping is always written
+        await manager.disconnect(user_id)
+        location_ingestor.forget(user_id)
 
 # === ADMIN ENDPOINTS ===
 
@@ -2493,13 +2787,13 @@ async def admin_send_notification(
     
     # Send notification via WebSocket
     await manager.send_personal_message(
-        json.dumps({
+        {
             "type": request.notification_type,
             "message": request.message,
             "from_admin": True,
             "admin_name": current_user.name,
             "timestamp": datetime.now(timezone.utc).isoformat()
-        }),
+        },
         request.user_id,
         notification_type=request.notification_type,
         sender_id=current_user.id,
@@ -2568,23 +2862,15 @@ async def admin_notify_ride_participants(
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
     
-    sent_count = 0
-    
-    # Send to rider
+    recipients = []
     if request.target in ["rider", "both"] and rider_id:
-        await manager.send_personal_message(
-            json.dumps(notification_data),
-            rider_id
-        )
-        sent_count += 1
-    
-    # Send to driver
+        recipients.append(rider_id)
     if request.target in ["driver", "both"] and driver_id:
-        await manager.send_personal_message(
-            json.dumps(notification_data),
-            driver_id
-        )
-        sent_count += 1
+        recipients.append(driver_id)
+    
+    # Send to rider and/or driver concurrently
+    outcomes = await manager.send_many(notification_data, recipients)
+    sent_count = len(outcomes)
     
     # Log the admin action
     if AUDIT_ENABLED and audit_system:
@@ -2593,7 +2879,12 @@ async def admin_notify_ride_participants(
             user_id=current_user.id,
             entity_type="ride_notification",
             entity_id=ride_id,
-            metadata={"message": request.message, "target": request.target, "sent_count": sent_count}
+            metadata={
+                "message": request.message,
+                "target": request.target,
+                "sent_count": sent_count,
+                "outcomes": outcomes
+            }
         )
     
     return {"message": f"Notification sent to {sent_count} participant(s) successfully"}
@@ -2708,7 +2999,7 @@ async def admin_balance_transaction(
     notification_message = f"Balance {request.transaction_type}: Ⓣ{request.amount:.2f}. New balance: Ⓣ{new_balance:.2f}. {request.description}"
     
     await manager.send_personal_message(
-        json.dumps({
+        {
             "type": "balance_transaction",
             "transaction_id": transaction_id,
             "amount": request.amount,
@@ -2720,7 +3011,7 @@ async def admin_balance_transaction(
             "admin_name": current_user.name,
             "message": notification_message,
             "timestamp": datetime.now(timezone.utc).isoformat()
-        }),
+        },
         user_id,
         notification_type="balance_transaction",
         sender_id=current_user.id,
@@ -2756,41 +3047,141 @@ async def admin_balance_transaction(
         "new_balance": new_balance
     }
 
+# Balance listings sort on one of these fields with user_id breaking ties
+BALANCE_SORT_FIELDS = ("balance", "updated_at")
+
+def balances_pipeline(
+    role: Optional[str],
+    sort_by: str,
+    direction: int,
+    position: Optional[List[Any]],
+    limit: Optional[int],
+    skip: int = 0
+) -> List[Dict[str, Any]]:
+    """Balances in (sort_by, user_id) order joined with the owner's name, email and role.
+    
+    Without a role filter the window is cut before the join, so only the
+    returned rows are looked up; a role filter has to join first.
+    """
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": keyset_query({}, sort_by, direction, position, nullable=True, tie_break="user_id")},
+        {"$sort": dict(keyset_sort(sort_by, direction, tie_break="user_id"))}
+    ]
+    if skip and not role:
+        pipeline.append({"$skip": skip})
+    if limit and not role:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$lookup": {
+        "from": "users",
+        "let": {"user_id": "$user_id"},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": ["$id", "$$user_id"]}}},
+            {"$project": {"_id": 0, "name": 1, "email": 1, "role": 1}},
+            {"$limit": 1}
+        ],
+        "as": "user"
+    }})
+    if role:
+        pipeline.append({"$match": {"user.role": role}})
+        if skip:
+            pipeline.append({"$skip": skip})
+        if limit:
+            pipeline.append({"$limit": limit})
+    pipeline.append({"$project": {
+        "_id": 0,
+        "user_id": 1,
+        "balance": 1,
+        "updated_at": 1,
+        "user": {"$arrayElemAt": ["$user", 0]}
+    }})
+    return pipeline
+
+def balance_row(document: Dict[str, Any]) -> Dict[str, Any]:
+    user = document.get("user") or {}
+    return {
+        "user_id": document["user_id"],
+        "user_name": user.get("name", "Unknown"),
+        "user_email": user.get("email", "Unknown"),
+        "user_role": user.get("role", "Unknown"),
+        "balance": document.get("balance", 0.0),
+        "updated_at": document.get("updated_at")
+    }
+
 @api_router.get("/admin/balances", response_model=Dict[str, Any])
 async def get_all_user_balances(
+    request: Request,
     limit: int = 50,
     offset: int = 0,
+    sort_by: str = "balance",
+    sort_order: str = "desc",
+    role: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    stream: Optional[bool] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """Get all user balances for admin"""
+    """Get all user balances for admin.
+    
+    Balances are sorted by sort_by (balance or updated_at) and can be
+    filtered by the owner's role. Pass page_info.next_cursor back as cursor
+    for the next page; offset is still honoured when no cursor is given.
+    With ?stream=true (or Accept: application/x-ndjson) every matching
+    balance is streamed as NDJSON for export.
+    """
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
+    if sort_by not in BALANCE_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {', '.join(BALANCE_SORT_FIELDS)}")
+    if limit < 1 or limit > 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    direction = 1 if sort_order == "asc" else -1
+    
+    if wants_ndjson(request, stream):
+        async def records():
+            total = 0
+            async for document in analytics_db.user_balances.aggregate(balances_pipeline(role, sort_by, direction, None, None)):
+                # Balances whose user no longer exists are left out, as in the paged listing
+                if document.get("user"):
+                    total += 1
+                    yield {"type": "balance", "data": balance_row(document)}
+            yield {"type": "summary", "total": total}
+        
+        return ndjson_response(records())
+    
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    pipeline = balances_pipeline(role, sort_by, direction, position, limit, skip=0 if cursor else offset)
+    
+    # Page and total are fetched concurrently
+    async def total():
+        if not include_total:
+            return None
+        if not role:
+            return await analytics_db.user_balances.estimated_document_count()
+        users = analytics_db.users.find({"role": role}, {"_id": 0, "id": 1})
+        return await analytics_db.user_balances.count_documents({"user_id": {"$in": [user["id"] async for user in users]}})
+    
+    documents, total_balances = await asyncio.gather(
+        analytics_db.user_balances.aggregate(pipeline).to_list(None),
+        total()
+    )
     
-    # Get all balances with user info
-    balances = []
-    balance_cursor = db.user_balances.find().skip(offset).limit(limit)
-    
-    async for balance_doc in balance_cursor:
-        user_doc = await db.users.find_one({"id": balance_doc["user_id"]})
-        if user_doc:
-            balances.append({
-                "user_id": balance_doc["user_id"],
-                "user_name": user_doc.get("name", "Unknown"),
-                "user_email": user_doc.get("email", "Unknown"),
-                "user_role": user_doc.get("role", "Unknown"),
-                "balance": balance_doc.get("balance", 0.0),
-                "updated_at": balance_doc.get("updated_at")
-            })
-    
-    # Get total count
-    total_balances = await db.user_balances.count_documents({})
+    balances = [balance_row(document) for document in documents if document.get("user")]
     
-    return {
-        "balances": convert_objectids_to_strings(balances),
+    return FastJSONResponse({
+        "balances": balances,
         "total": total_balances,
         "limit": limit,
-        "offset": offset
-    }
+        "offset": offset,
+        "page_info": {
+            "next_cursor": next_cursor(documents, sort_by, limit, tie_break="user_id")
+        }
+    })
 
 # === USER BALANCE ENDPOINTS ===
 
@@ -2812,44 +3203,134 @@ async def get_my_balance(current_user: User = Depends(get_current_user)):
         "recent_transactions": convert_objectids_to_strings(transactions)
     }
 
+async def count_rides_by_user(user_ids: Optional[List[str]] = None) -> Dict[str, int]:
+    """Count rides per user (as rider and as driver) with one $group per collection"""
+    async def grouped(collection, field: str) -> List[Dict[str, Any]]:
+        pipeline = []
+        if user_ids is not None:
+            pipeline.append({"$match": {field: {"$in": user_ids}}})
+        pipeline.append({"$group": {"_id": f"${field}", "count": {"$sum": 1}}})
+        return await collection.aggregate(pipeline).to_list(None)
+
+    rider_counts, driver_counts = await asyncio.gather(
+        grouped(analytics_db.ride_requests, "rider_id"),
+        grouped(analytics_db.ride_matches, "driver_id")
+    )
+    counts: Dict[str, int] = {}
+    for row in rider_counts + driver_counts:
+        if row["_id"] is not None:
+            counts[row["_id"]] = counts.get(row["_id"], 0) + row["count"]
+    return counts
+
 @api_router.get("/admin/users", response_model=List[Dict[str, Any]])
-async def get_all_users(current_user: User = Depends(get_current_user)):
+async def get_all_users(
+    limit: Optional[int] = None,
+    offset: int = 0,
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """List users with ride counts.
+
+    limit/offset page through users in creation order (the total is returned
+    in the X-Total-Count header); fields is a comma separated projection,
+    e.g. "name,email,role,rides".
+    """
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
-    
-    users = await db.users.find({}, {"password": 0}).to_list(None)
-    
-    # Add ride counts for each user
-    for user in users:
-        user_id = user["id"]
-        
-        # Count rides as rider (from ride_requests)
-        rider_rides = await db.ride_requests.count_documents({"rider_id": user_id})
-        
-        # Count rides as driver (from ride_matches)
-        driver_rides = await db.ride_matches.count_documents({"driver_id": user_id})
-        
-        # Total rides for this user
-        user["rides"] = rider_rides + driver_rides
-    
-    # Convert MongoDB ObjectIds to strings for JSON serialization
-    users = convert_objectids_to_strings(users)
-    
-    return users
+    if limit is not None and (limit < 1 or limit > 1000):
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+    
+    projection: Dict[str, int] = {"_id": 0, **HIDDEN_USER_FIELDS}
+    include_rides = True
+    if fields:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        include_rides = "rides" in requested
+        projection = {"_id": 0, "id": 1}
+        projection.update({f: 1 for f in requested - {"rides", "_id", *HIDDEN_USER_FIELDS}})
+    
+    headers = None
+    cursor = analytics_db.users.find({}, projection).sort([("created_at", 1), ("id", 1)]).skip(offset)
+    if limit is not None:
+        cursor = cursor.limit(limit)
+        headers = {"X-Total-Count": str(await analytics_db.users.count_documents({}))}
+    users = await cursor.to_list(None)
+    
+    # Add ride counts; a page only counts its own users, a full listing
+    # groups each rides collection once
+    if include_rides:
+        page_ids = [user["id"] for user in users] if limit is not None else None
+        ride_counts = await count_rides_by_user(page_ids)
+        for user in users:
+            user["rides"] = ride_counts.get(user["id"], 0)
+    
+    return FastJSONResponse(users, headers=headers)
+
+# Completed matches are streamed in batches of this size, each joined with
+# its ratings in one query
+RIDE_STREAM_BATCH_SIZE = int(os.environ.get('RIDE_STREAM_BATCH_SIZE', '500'))
+
+async def iter_admin_rides(counts: Dict[str, int]):
+    """Yield every ride request and match as NDJSON records, counting them in counts"""
+    async for request in analytics_db.ride_requests.find({}, HIDDEN_REQUEST_FIELDS):
+        counts["pending_requests"] += 1
+        yield {"type": "pending_request", "data": request}
+    
+    async for batch in iter_batches(analytics_db.ride_matches.find({}, HIDDEN_MATCH_FIELDS), RIDE_STREAM_BATCH_SIZE):
+        ratings = await analytics_db.ratings.find({"ride_id": {"$in": [match["id"] for match in batch]}}).to_list(None)
+        ratings_by_ride = {rating["ride_id"]: rating for rating in ratings}
+        for match in batch:
+            rating = ratings_by_ride.get(match["id"])
+            match["rating"] = rating["rating"] if rating else None
+            match["comment"] = rating["comment"] if rating else None
+            counts["completed_matches"] += 1
+            yield {"type": "completed_match", "data": match}
 
 @api_router.get("/admin/rides", response_model=Dict[str, Any])
-async def get_all_rides(current_user: User = Depends(get_current_user)):
-    """Get all ride requests and matches for admin"""
+async def get_all_rides(
+    request: Request,
+    stream: Optional[bool] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Get all ride requests and matches for admin.
+    
+    With ?stream=true (or Accept: application/x-ndjson) rides are streamed as
+    NDJSON records followed by a final summary record.
+    """
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
+    if wants_ndjson(request, stream):
+        async def records():
+            counts = {"pending_requests": 0, "completed_matches": 0}
+            async for record in iter_admin_rides(counts):
+                yield record
+            
+            if AUDIT_ENABLED and audit_system:
+                await audit_system.log_action(
+                    action=AuditAction.ADMIN_RIDE_MODIFIED,
+                    user_id=current_user.id,
+                    entity_type="admin_ride_query",
+                    entity_id=f"admin_rides_{counts['pending_requests']}_{counts['completed_matches']}",
+                    metadata={**counts, "streamed": True}
+                )
+            yield {
+                "type": "summary",
+                "total_pending": counts["pending_requests"],
+                "total_completed": counts["completed_matches"],
+                "total_rides": counts["pending_requests"] + counts["completed_matches"]
+            }
+        
+        return ndjson_response(records())
+    
     # Get all pending requests
-    pending_requests = await db.ride_requests.find({}).to_list(None)
+    pending_requests = await analytics_db.ride_requests.find({}, HIDDEN_REQUEST_FIELDS).to_list(None)
     # Get all completed matches
-    completed_matches = await db.ride_matches.find({}).to_list(None)
+    completed_matches = await analytics_db.ride_matches.find({}, HIDDEN_MATCH_FIELDS).to_list(None)
     
     # Get all ratings to include in ride data
-    all_ratings = await db.ratings.find({}).to_list(None)
+    all_ratings = await analytics_db.ratings.find({}).to_list(None)
     ratings_by_ride = {rating["ride_id"]: rating for rating in all_ratings}
     
     # Add rating information to completed matches
@@ -2873,32 +3354,25 @@ async def get_all_rides(current_user: User = Depends(get_current_user)):
             metadata={"pending_requests": len(pending_requests), "completed_matches": len(completed_matches)}
         )
     
-    return {
-        "pending_requests": convert_objectids_to_strings(pending_requests),
-        "completed_matches": convert_objectids_to_strings(completed_matches),
+    # Raw documents are encoded directly; no conversion pass over the payload
+    return FastJSONResponse({
+        "pending_requests": pending_requests,
+        "completed_matches": completed_matches,
         "total_pending": len(pending_requests),
         "total_completed": len(completed_matches),
         "total_rides": len(pending_requests) + len(completed_matches)
-    }
+    })
 
 @api_router.get("/admin/stats", response_model=Dict[str, Any])
 async def get_platform_stats(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    total_users = await db.users.count_documents({})
-    total_drivers = await db.users.count_documents({"role": UserRole.DRIVER})
-    total_riders = await db.users.count_documents({"role": UserRole.RIDER})
+    # Counters are maintained incrementally and reconciled periodically
+    counters = await platform_stats.read()
     # Count both pending requests and completed matches for total rides
-    total_pending_requests = await db.ride_requests.count_documents({})
-    total_completed_matches = await db.ride_matches.count_documents({})
-    total_rides = total_pending_requests + total_completed_matches
-    completed_rides = await db.ride_matches.count_documents({"status": RideStatus.COMPLETED})
-    online_drivers = await db.users.count_documents({"role": UserRole.DRIVER, "is_online": True})
-    
-    # Calculate total revenue
-    completed_ride_docs = await db.ride_matches.find({"status": RideStatus.COMPLETED}).to_list(None)
-    total_revenue = sum(ride.get("estimated_fare", 0) for ride in completed_ride_docs)
+    total_rides = counters.get("total_ride_requests", 0) + counters.get("total_ride_matches", 0)
+    completed_rides = counters.get("completed_rides", 0)
     
     # Get audit statistics if available
     audit_stats = {}
@@ -2909,13 +3383,13 @@ async def get_platform_stats(current_user: User = Depends(get_current_user)):
             logger.warning(f"Failed to get audit statistics: {e}")
     
     return {
-        "total_users": total_users,
-        "total_drivers": total_drivers,
-        "total_riders": total_riders,
+        "total_users": counters.get("total_users", 0),
+        "total_drivers": counters.get("total_drivers", 0),
+        "total_riders": counters.get("total_riders", 0),
         "total_rides": total_rides,
         "completed_rides": completed_rides,
-        "online_drivers": online_drivers,
-        "total_revenue": round(total_revenue, 2),
+        "online_drivers": counters.get("online_drivers", 0),
+        "total_revenue": round(counters.get("total_revenue", 0), 2),
         "completion_rate": round((completed_rides / total_rides * 100) if total_rides > 0 else 0, 1),
         "audit_statistics": audit_stats
     }
@@ -2929,6 +3403,8 @@ async def get_users_with_filters(
     status: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     sort_by: str = "created_at",
     sort_order: str = "desc",
     current_user: User = Depends(get_current_user)
@@ -2946,6 +3422,8 @@ async def get_users_with_filters(
         status=status,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        include_total=include_total,
         sort_by=sort_by,
         sort_order=sort_order
     )
@@ -2982,7 +3460,9 @@ async def admin_update_user(
         status=status
     )
     
-    return await admin_crud.update_user(user_id, updates, current_user.id, admin_notes)
+    result = await admin_crud.update_user(user_id, updates, current_user.id, admin_notes)
+    user_cache.invalidate(user_id)
+    return result
 
 @api_router.patch("/admin/users/{user_id}/password", response_model=Dict[str, str])
 async def admin_reset_user_password(
@@ -3057,6 +3537,7 @@ async def admin_toggle_user_status(
             {"id": user_id},
             {"$set": {"is_active": is_active, "updated_at": datetime.now(timezone.utc)}}
         )
+        user_cache.invalidate(user_id)
         
         # Log the action
         if AUDIT_ENABLED:
@@ -3116,19 +3597,28 @@ async def admin_send_validation_email(
 async def get_user_notifications(
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """Get user's notification history"""
+    """Get user's notification history, newest first.
+    
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
     try:
-        notifications = await db.notifications.find(
-            {"user_id": current_user.id}
-        ).sort("created_at", -1).skip(offset).limit(limit).to_list(limit)
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        query = keyset_query({"user_id": current_user.id}, "created_at", -1, position)
+        notifications_cursor = db.notifications.find(query).sort(keyset_sort("created_at", -1))
+        if position is None:
+            notifications_cursor = notifications_cursor.skip(offset)
+        notifications = await notifications_cursor.limit(limit).to_list(limit)
         
-        # Convert ObjectId to string for JSON serialization
-        for notification in notifications:
-            notification["_id"] = str(notification["_id"])
+        notifications_next_cursor = next_cursor(notifications, "created_at", limit)
+        headers = {"X-Next-Cursor": notifications_next_cursor} if notifications_next_cursor else None
         
-        return notifications
+        return FastJSONResponse(notifications, headers=headers)
         
     except Exception as e:
         logging.error(f"Error fetching notifications for user {current_user.id}: {str(e)}")
@@ -3141,12 +3631,19 @@ async def get_all_notifications(
     user_id: Optional[str] = None,
     notification_type: Optional[str] = None,
     delivered: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     current_user: User = Depends(get_current_user)
 ):
     """Get all notifications (Admin only)"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         # Build filter
         filter_query = {}
@@ -3158,8 +3655,21 @@ async def get_all_notifications(
             filter_query["delivered"] = delivered
         
         # Get notifications
-        notifications = await db.notifications.find(filter_query).sort("created_at", -1).skip(offset).limit(limit).to_list(limit)
-        total_count = await db.notifications.count_documents(filter_query)
+        notifications_cursor = db.notifications.find(
+            keyset_query(filter_query, "created_at", -1, position)
+        ).sort(keyset_sort("created_at", -1))
+        if position is None:
+            notifications_cursor = notifications_cursor.skip(offset)
+        notifications = await notifications_cursor.limit(limit).to_list(limit)
+        
+        total_count = None
+        if include_total:
+            if filter_query:
+                total_count = await db.notifications.count_documents(filter_query)
+            else:
+                total_count = await db.notifications.estimated_document_count()
+        
+        notifications_next_cursor = next_cursor(notifications, "created_at", limit)
         
         # Convert ObjectId to string for JSON serialization
         for notification in notifications:
@@ -3169,7 +3679,8 @@ async def get_all_notifications(
             "notifications": notifications,
             "total": total_count,
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": notifications_next_cursor
         }
         
     except Exception as e:
@@ -3365,6 +3876,9 @@ async def get_conversation_thread(
         logging.error(f"Error fetching conversation thread: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch conversation thread")
 
+# Newest messages joined per listed thread; /notifications/conversation/{thread_id} has the rest
+CONVERSATION_PREVIEW_MESSAGES = 20
+
 @api_router.get("/admin/conversations", response_model=Dict[str, Any])
 async def get_all_conversations(
     limit: int = 50,
@@ -3376,71 +3890,66 @@ async def get_all_conversations(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        # Get all notifications that are part of conversations
-        notifications = await db.notifications.find({
-            "conversation_thread": {"$exists": True}
-        }).sort("created_at", -1).skip(offset).limit(limit).to_list(limit)
-        
-        # Group by conversation thread
-        conversations = {}
-        for notification in notifications:
-            thread_id = notification["conversation_thread"]
-            if thread_id not in conversations:
-                conversations[thread_id] = {
-                    "thread_id": thread_id,
-                    "participants": set(),
-                    "messages": [],
-                    "last_message_at": notification["created_at"],
-                    "message_count": 0
-                }
-            
-            conversations[thread_id]["messages"].append(notification)
-            conversations[thread_id]["participants"].add(notification["user_id"])
-            conversations[thread_id]["participants"].add(notification["sender_id"])
-            conversations[thread_id]["message_count"] += 1
+        # Threads are grouped server side and paged newest first; the page's
+        # messages are joined in the same round trip
+        result = await analytics_db.notifications.aggregate([
+            {"$match": {"conversation_thread": {"$exists": True}}},
+            {"$group": {
+                "_id": "$conversation_thread",
+                "last_message_at": {"$max": "$created_at"},
+                "message_count": {"$sum": 1},
+                "recipients": {"$addToSet": "$user_id"},
+                "senders": {"$addToSet": "$sender_id"}
+            }},
+            {"$sort": {"last_message_at": -1, "_id": -1}},
+            {"$facet": {
+                "threads": [
+                    {"$skip": offset},
+                    {"$limit": limit},
+                    {"$lookup": {
+                        "from": "notifications",
+                        "let": {"thread_id": "$_id"},
+                        "pipeline": [
+                            # Served by the (conversation_thread, created_at) index
+                            {"$match": {"$expr": {"$eq": ["$conversation_thread", "$$thread_id"]}}},
+                            {"$sort": {"created_at": -1}},
+                            {"$limit": CONVERSATION_PREVIEW_MESSAGES}
+                        ],
+                        "as": "messages"
+                    }}
+                ],
+                "total": [{"$count": "count"}]
+            }}
+        ]).to_list(1)
+        facets = result[0] if result else {"threads": [], "total": []}
+        conversation_list = facets["threads"]
         
-        # Convert to list and sort by last message
-        conversation_list = list(conversations.values())
-        conversation_list.sort(key=lambda x: x["last_message_at"], reverse=True)
+        # One lookup (usually served from the summary cache) for every participant on the page
+        users = await user_directory.summaries(
+            user_id for conv in conversation_list for user_id in conv["recipients"] + conv["senders"]
+        )
         
-        # Convert sets to lists and fetch user details for participants
         for conv in conversation_list:
-            participant_ids = list(conv["participants"])
-            participants_with_details = []
-            
-            # Fetch user details for each participant
-            for user_id in participant_ids:
-                if user_id:  # Skip None/empty user IDs
-                    user = await db.users.find_one({"id": user_id})
-                    if user:
-                        participants_with_details.append({
-                            "id": user_id,
-                            "name": user.get("name", "Unknown"),
-                            "email": user.get("email", "Unknown"),
-                            "role": user.get("role", "Unknown")
-                        })
-                    else:
-                        participants_with_details.append({
-                            "id": user_id,
-                            "name": "Unknown",
-                            "email": "Unknown",
-                            "role": "Unknown"
-                        })
-            
-            conv["participants"] = participants_with_details
-            conv["_id"] = str(conv["thread_id"])  # For React key
-            
-            # Convert ObjectIds to strings in messages
-            for message in conv["messages"]:
-                if "_id" in message:
-                    message["_id"] = str(message["_id"])
+            participant_ids = dict.fromkeys(
+                user_id for user_id in conv.pop("recipients") + conv.pop("senders") if user_id
+            )
+            conv["participants"] = [
+                {
+                    "id": user_id,
+                    "name": users.get(user_id, {}).get("name", "Unknown"),
+                    "email": users.get(user_id, {}).get("email", "Unknown"),
+                    "role": users.get(user_id, {}).get("role", "Unknown")
+                }
+                for user_id in participant_ids
+            ]
+            conv["thread_id"] = conv["_id"]  # _id doubles as the React key
         
-        return {
+        return FastJSONResponse({
             "conversations": conversation_list,
-            "total": len(conversation_list),
+            "total": facets["total"][0]["count"] if facets["total"] else 0,
             "limit": limit,
             "offset": offset
-        }
+        })
         
     except Exception as e:
         logging.error(f"Error fetching conversations: {str(e)}")
@@ -3465,11 +3974,11 @@ async def admin_send_direct_notification(
     try:
         # Send notification via WebSocket
         await manager.send_personal_message(
-            json.dumps({
+            {
                 "type": request.notification_type,
                 "message": request.message,
                 "timestamp": datetime.now(timezone.utc).isoformat()
-            }),
+            },
             request.user_id,
             notification_type=request.notification_type,
             sender_id=current_user.id,
@@ -3504,7 +4013,9 @@ async def admin_suspend_user(
     if not AUDIT_ENABLED or not admin_crud:
         raise HTTPException(status_code=503, detail="Admin CRUD system not available")
     
-    return await admin_crud.suspend_user(user_id, current_user.id, reason, duration_days)
+    result = await admin_crud.suspend_user(user_id, current_user.id, reason, duration_days)
+    user_cache.invalidate(user_id)
+    return result
 
 @api_router.get("/admin/rides/filtered", response_model=Dict[str, Any])
 async def get_rides_with_filters(
@@ -3512,6 +4023,8 @@ async def get_rides_with_filters(
     status: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     sort_by: str = "created_at",
     sort_order: str = "desc",
     current_user: User = Depends(get_current_user)
@@ -3528,6 +4041,8 @@ async def get_rides_with_filters(
         status=status,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        include_total=include_total,
         sort_by=sort_by,
         sort_order=sort_order
     )
@@ -3568,6 +4083,8 @@ async def get_payments_with_filters(
     end_date: Optional[datetime] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     sort_by: str = "created_at",
     sort_order: str = "desc",
     current_user: User = Depends(get_current_user)
@@ -3586,6 +4103,8 @@ async def get_payments_with_filters(
         end_date=end_date,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        include_total=include_total,
         sort_by=sort_by,
         sort_order=sort_order
     )
@@ -3632,9 +4151,13 @@ async def get_audit_logs(
     search: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """Get audit logs with comprehensive filtering - available to all roles for their own data"""
+    """Get audit logs with comprehensive filtering - available to all roles for their own data.
+    
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
     if not AUDIT_ENABLED or not audit_system:
         raise HTTPException(status_code=503, detail="Audit system not available")
     
@@ -3653,10 +4176,16 @@ async def get_audit_logs(
         severity=severity,
         search_term=search,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor
     )
     
-    return await audit_system.get_audit_logs(filters, current_user.role)
+    try:
+        page = await audit_system.get_audit_logs_page(filters, current_user.role)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": page["next_cursor"]} if page["next_cursor"] else None
+    return FastJSONResponse(page["logs"], headers=headers)
 
 @api_router.get("/audit/statistics", response_model=Dict[str, Any])
 async def get_audit_statistics(current_user: User = Depends(get_current_user)):
@@ -3771,6 +4300,38 @@ async def get_latency_timer():
     
     return {"P50": p50, "P95": p95}
 
+@api_router.get("/observability/notification_writer")
+async def get_notification_writer_stats():
+    """Get write-behind notification queue depth and flush statistics"""
+    return notification_writer.stats()
+
+@api_router.get("/observability/audit_writer")
+async def get_audit_writer_stats():
+    """Get batched audit writer queue depth, flush and spill statistics"""
+    if not (AUDIT_ENABLED and audit_system):
+        return {"enabled": False}
+    return audit_system.writer_stats()
+
+@api_router.get("/observability/location_ingest")
+async def get_location_ingest_stats():
+    """Get location ingestion queue depth, lag and flush statistics"""
+    return location_ingestor.stats()
+
+@api_router.get("/observability/user_cache")
+async def get_user_cache_stats():
+    """Get authenticated-user cache hit/miss statistics"""
+    return user_cache.stats()
+
+@api_router.get("/observability/mongo_pool")
+async def get_mongo_pool_stats():
+    """Get MongoDB pool settings, connection counts and checkout wait times"""
+    return pool_stats()
+
+@api_router.get("/observability/user_directory")
+async def get_user_directory_stats():
+    """Get admin user-summary cache hit/miss statistics"""
+    return user_directory.stats()
+
 # Sound Notification System for QA Enforcement Charter
 # TDD Phase 3: Implement sound notification system to make tests pass
 
@@ -3800,9 +4361,104 @@ async def get_sound_profiles():
 # Include router in the main app
 app.include_router(api_router)
 
+@app.on_event("startup")
+async def start_notification_writer():
+    await notification_writer.start()
+
+@app.on_event("startup")
+async def start_audit_writer():
+    if AUDIT_ENABLED and audit_system:
+        await audit_system.start()
+
+@app.on_event("startup")
+async def start_location_ingestor():
+    await location_ingestor.start()
+
+@app.on_event("startup")
+async def start_platform_stats():
+    await platform_stats.start()
+
+@app.on_event("startup")
+async def build_geo_indexes():
+    """Create the 2dsphere indexes before serving; $geoNear errors without them"""
+    try:
+        await ensure_geo_indexes(db)
+    except Exception as e:
+        logger.critical(f"Failed to create 2dsphere indexes, nearby searches will fail: {e}")
+
+# Background task applying the rest of the index registry; kept so it is not garbage collected
+index_bootstrap: Optional[asyncio.Task] = None
+
+async def build_indexes():
+    result = await apply_indexes(db)
+    logger.info(f"Index bootstrap finished: {result['applied']} applied, {len(result['failed'])} failed")
+    # GeoJSON points for drivers and requests stored before the fields existed;
+    # without them $geoNear cannot see those documents
+    try:
+        counts = await backfill_geo_fields(db)
+        logger.info(f"GeoJSON backfill finished: {counts}")
+    except Exception as e:
+        logger.error(f"GeoJSON backfill failed: {e}")
+    # Tokenize documents written before search tokens existed; a no-op once done
+    try:
+        counts = await backfill_search_tokens(db)
+        logger.info(f"Search token backfill finished: {counts}")
+    except Exception as e:
+        logger.error(f"Search token backfill failed: {e}")
+
+@app.on_event("startup")
+async def bootstrap_indexes():
+    """Apply the index registry (db_indexes.INDEXES) without delaying startup"""
+    global index_bootstrap
+    index_bootstrap = asyncio.create_task(build_indexes())
+
+@app.on_event("startup")
+async def start_websocket_backplane():
+    """Start receiving messages routed to sockets held by this worker"""
+    await manager.backplane.start(manager.deliver_local)
+
+@app.on_event("startup")
+async def load_driver_index():
+    """Seed the driver matching index with drivers that are already online"""
+    if DRIVER_MATCHING_BACKEND != "memory":
+        return
+    cursor = db.users.find(
+        {"role": UserRole.DRIVER, "is_online": True, "current_location": {"$exists": True}},
+        {"_id": 0, "id": 1, "current_location": 1}
+    )
+    async for driver in cursor:
+        location = driver.get("current_location")
+        if location:
+            driver_index.upsert(driver["id"], location["latitude"], location["longitude"])
+    logger.info(f"Driver index loaded with {len(driver_index)} online drivers")
+
+@app.on_event("shutdown")
+async def stop_websocket_backplane():
+    await manager.backplane.stop()
+
+@app.on_event("shutdown")
+async def stop_platform_stats():
+    await platform_stats.stop()
+
+@app.on_event("shutdown")
+async def stop_location_ingestor():
+    """Write pending locations before the database client closes"""
+    await location_ingestor.stop()
+
+@app.on_event("shutdown")
+async def stop_notification_writer():
+    """Flush queued notifications before the database client closes"""
+    await notification_writer.stop()
+
+@app.on_event("shutdown")
+async def stop_audit_writer():
+    """Write queued audit records (including those logged for flushed notifications)"""
+    if AUDIT_ENABLED and audit_system:
+        await audit_system.stop()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    close_client()
 
 if __name__ == "__main__":
     import uvicorn
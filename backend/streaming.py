@@ -0,0 +1,41 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from serialization import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def wants_ndjson(request: Request, stream: Optional[bool] = None) -> bool:
+    """Streaming is selected with ?stream=true or an Accept: application/x-ndjson header"""
+    if stream is not None:
+        return stream
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def encode_line(record: Dict[str, Any]) -> bytes:
+    return dumps(record) + b"\n"
+
+async def iter_batches(cursor, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Group documents from a Motor cursor into lists of at most batch_size"""
+    batch: List[Dict[str, Any]] = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def ndjson_chunks(records: AsyncIterator[Dict[str, Any]], chunk_records: int = 200) -> AsyncIterator[bytes]:
+    """Encode records one per line, flushing every chunk_records lines"""
+    buffer: List[bytes] = []
+    async for record in records:
+        buffer.append(encode_line(record))
+        if len(buffer) >= chunk_records:
+            yield b"".join(buffer)
+            buffer = []
+    if buffer:
+        yield b"".join(buffer)
+
+def ndjson_response(records: AsyncIterator[Dict[str, Any]], chunk_records: int = 200) -> StreamingResponse:
+    """Stream records as newline-delimited JSON; memory use stays at one chunk"""
+    return StreamingResponse(ndjson_chunks(records, chunk_records), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Unit tests for monthly audit archive partitions
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+
+import audit_archive
+from audit_archive import AuditArchive, bloom_filter, bloom_may_contain, month_bounds, part_may_match, shift_months
+from audit_system import AuditFilter, AuditSystem
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, *args):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+class FakeLogs:
+    def __init__(self, records):
+        self.records = records
+        self.deleted = []
+        self.delete_windows = []
+
+    def find(self, query, projection=None):
+        window = query["timestamp"]
+        return FakeCursor([
+            dict(record) for record in self.records
+            if window["$gte"] <= record["timestamp"] < window["$lt"]
+        ])
+
+    async def delete_many(self, query):
+        self.deleted.extend(query["id"]["$in"])
+        self.delete_windows.append(query["timestamp"])
+
+class FakeManifests:
+    def __init__(self):
+        self.documents = []
+
+    async def count_documents(self, query):
+        return sum(1 for document in self.documents if document.get("month") == query["month"])
+
+    async def insert_one(self, document):
+        self.documents.append(document)
+
+    async def distinct(self, field):
+        return sorted({document[field] for document in self.documents if field in document})
+
+    def find(self, query, projection=None):
+        matching = [document for document in self.documents if document.get("month") == query["month"]]
+        return FakeList(matching)
+
+class FakeList:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, *args):
+        return self
+
+    async def to_list(self, length):
+        return self.documents
+
+class FakeDatabase:
+    def __init__(self, records):
+        self.audit_logs = FakeLogs(records)
+        self.audit_archives = FakeManifests()
+
+def record(record_id, day, action="user_login", user_id="u1", month=6):
+    return {
+        "id": record_id,
+        "action": action,
+        "entity_type": "user",
+        "user_id": user_id,
+        "entity_id": f"e-{record_id}",
+        "severity": "info",
+        "timestamp": datetime(2026, month, day, 12, tzinfo=timezone.utc),
+        "metadata": {"description": f"{action} by {user_id}"}
+    }
+
+class TestMonths:
+    """Test suite for month arithmetic"""
+
+    def test_month_bounds_wrap_the_year(self):
+        assert month_bounds("2026-12") == (
+            datetime(2026, 12, 1, tzinfo=timezone.utc),
+            datetime(2027, 1, 1, tzinfo=timezone.utc)
+        )
+
+    def test_shift_months(self):
+        assert shift_months("2026-01", -1) == "2025-12"
+        assert shift_months("2026-10", 3) == "2027-01"
+
+    def test_cutoff_keeps_hot_months(self, tmp_path):
+        archive = AuditArchive(FakeDatabase([]), str(tmp_path), hot_months=3)
+        assert archive.cutoff(datetime(2026, 10, 17, tzinfo=timezone.utc)) == datetime(2026, 8, 1, tzinfo=timezone.utc)
+
+class TestAuditArchive:
+    """Test suite for compacting and reading archive parts"""
+
+    def test_archive_month_round_trip(self, tmp_path):
+        db = FakeDatabase([record("a", 1), record("b", 2, action="ride_query"), record("c", 3)])
+        archive = AuditArchive(db, str(tmp_path))
+        archive.compression = "gzip"
+
+        manifest = asyncio.run(archive.archive_month("2026-06"))
+
+        assert manifest["_id"] == "2026-06.000"
+        assert manifest["count"] == 3
+        assert manifest["actions"]["user_login"]["count"] == 2
+        assert manifest["actions"]["user_login"]["name"] == "user_login"
+        assert manifest["severity"] == {"info": 3}
+        assert manifest["min_timestamp"] == record("a", 1)["timestamp"]
+        assert manifest["max_timestamp"] == record("c", 3)["timestamp"]
+        assert manifest["users"] == ["u1"] and manifest["entity_types"] == ["user"]
+        assert sorted(db.audit_logs.deleted) == ["a", "b", "c"]
+        assert db.audit_logs.delete_windows == [{"$gte": datetime(2026, 6, 1, tzinfo=timezone.utc), "$lt": datetime(2026, 7, 1, tzinfo=timezone.utc)}]
+        assert not list(tmp_path.glob("*.tmp"))
+
+        found = asyncio.run(archive.search(lambda r: r["action"] == "user_login", limit=10))
+        assert [r["id"] for r in found] == ["c", "a"]
+
+    def test_search_skips_months_outside_range(self, tmp_path):
+        db = FakeDatabase([record("a", 1)])
+        archive = AuditArchive(db, str(tmp_path))
+        archive.compression = "gzip"
+        asyncio.run(archive.archive_month("2026-06"))
+
+        found = asyncio.run(archive.search(lambda r: True, limit=10, start=datetime(2026, 7, 1, tzinfo=timezone.utc)))
+        assert found == []
+
+    def test_search_does_not_read_parts_ruled_out_by_the_manifest(self, tmp_path, monkeypatch):
+        db = FakeDatabase([record("a", 1)])
+        archive = AuditArchive(db, str(tmp_path))
+        archive.compression = "gzip"
+        asyncio.run(archive.archive_month("2026-06"))
+        reads = []
+        monkeypatch.setattr(audit_archive, "_scan_archive", lambda path, predicate: reads.append(path) or [])
+
+        for where in ({"users": ["u2"]}, {"entity_id": "ride-9"}, {"search": "logout"}):
+            assert asyncio.run(archive.search(lambda r: True, limit=10, where=where)) == []
+        assert reads == []
+
+        asyncio.run(archive.search(lambda r: True, limit=10, where={"entity_id": "e-a", "search": "logi"}))
+        assert len(reads) == 1
+
+    def test_unreadable_part_is_skipped(self, tmp_path):
+        db = FakeDatabase([record("a", 1), record("b", 1, month=5)])
+        archive = AuditArchive(db, str(tmp_path))
+        archive.compression = "gzip"
+        asyncio.run(archive.archive_month("2026-05"))
+        manifest = asyncio.run(archive.archive_month("2026-06"))
+        Path(manifest["path"]).unlink()
+
+        found = asyncio.run(archive.search(lambda r: True, limit=10))
+        assert [r["id"] for r in found] == ["b"]
+
+    def test_search_reads_at_most_max_search_months(self, tmp_path):
+        db = FakeDatabase([record("a", 1), record("b", 1, month=5)])
+        archive = AuditArchive(db, str(tmp_path), max_search_months=1)
+        archive.compression = "gzip"
+        asyncio.run(archive.archive_month("2026-05"))
+        asyncio.run(archive.archive_month("2026-06"))
+
+        found = asyncio.run(archive.search(lambda r: True, limit=10))
+        assert [r["id"] for r in found] == ["a"]
+
+    def test_part_may_match(self):
+        manifest = {
+            "min_timestamp": datetime(2026, 6, 1),
+            "max_timestamp": datetime(2026, 6, 3),
+            "actions": {"user_login": {"name": "user.login"}},
+            "severity": {"info": 1},
+            "users": ["u1", "u2"],
+            "entity_types": ["user"]
+        }
+        assert part_may_match(manifest, users=["u1"], action="user.login", entity_type="user", severity="info")
+        assert not part_may_match(manifest, end=datetime(2026, 5, 31, tzinfo=timezone.utc))
+        assert not part_may_match(manifest, start=datetime(2026, 6, 4, tzinfo=timezone.utc))
+        assert not part_may_match(manifest, users=["u1", "u3"])
+        assert not part_may_match(manifest, action="ride_query")
+        assert not part_may_match(manifest, entity_type="ride")
+        # Older manifests without the summaries are always read
+        assert part_may_match({"actions": {}}, users=["u3"])
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        values = [f"e:ride-{n}" for n in range(1000)]
+        bloom = bloom_filter(values)
+        assert all(bloom_may_contain(bloom, value) for value in values)
+        false_positives = sum(bloom_may_contain(bloom, f"e:other-{n}") for n in range(1000))
+        assert false_positives < 50
+
+    def test_empty_month_writes_nothing(self, tmp_path):
+        archive = AuditArchive(FakeDatabase([]), str(tmp_path))
+        assert asyncio.run(archive.archive_month("2026-06")) is None
+        assert list(tmp_path.iterdir()) == []
+
+class TestRecordFilter:
+    """Test suite for the in-memory equivalent of the audit log query"""
+
+    def test_non_admin_sees_own_records(self):
+        matches = AuditSystem._record_filter(AuditFilter(user_id="u1"), "rider", None)
+        assert matches(record("a", 1))
+        assert not matches(record("b", 1, user_id="u2"))
+
+    def test_search_and_position(self):
+        position = [datetime(2026, 6, 2, 12), "b"]
+        matches = AuditSystem._record_filter(AuditFilter(search_term="LOGIN"), "admin", position)
+        assert matches(record("a", 1))
+        assert not matches(record("c", 3))
+        assert not matches(record("a", 1, action="ride_query"))
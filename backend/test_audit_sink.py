@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the batched audit sink and its spill-to-disk fallback
+"""
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from audit_sink import AuditSink
+from audit_system import AUDIT_INDEXES
+
+class FlakyCollection:
+    """Collection stand-in whose insert_many can be made to fail"""
+
+    def __init__(self, failing=False):
+        self.failing = failing
+        self.inserted = []
+        self.upserts = []
+
+    async def insert_many(self, documents, ordered=True):
+        if self.failing:
+            raise ConnectionError("mongo unavailable")
+        self.inserted.append(list(documents))
+
+    async def bulk_write(self, operations, ordered=True):
+        self.upserts.extend(operations)
+        return SimpleNamespace(upserted_ids={index: index for index in range(len(operations))}, upserted_count=len(operations))
+
+def record(n):
+    return {"id": f"a{n}", "action": "user_login", "timestamp": datetime(2026, 10, 17, 12, n, tzinfo=timezone.utc)}
+
+class TestAuditSink:
+    """Test suite for batching, spilling and replay"""
+
+    def test_queued_records_are_written_in_batches(self, tmp_path):
+        collection = FlakyCollection()
+        rolled_up = []
+
+        async def after_write(records):
+            rolled_up.extend(records)
+
+        async def scenario():
+            sink = AuditSink(collection, str(tmp_path), after_write=after_write, batch_size=3, flush_interval=0.01)
+            await sink.start()
+            for n in range(7):
+                sink.submit(record(n))
+            await sink.stop()
+            return sink
+
+        sink = asyncio.run(scenario())
+
+        assert [len(batch) for batch in collection.inserted] == [3, 3, 1]
+        assert len(rolled_up) == 7
+        assert sink.stats()["written"] == 7
+
+    def test_failed_batch_is_spilled_then_replayed(self, tmp_path):
+        collection = FlakyCollection(failing=True)
+
+        async def scenario():
+            sink = AuditSink(collection, str(tmp_path), batch_size=10, flush_interval=0.01)
+            await sink._write([record(1), record(2)])
+            assert sink.stats()["spill_files"] == 1
+
+            collection.failing = False
+            await sink._replay()
+            return sink
+
+        sink = asyncio.run(scenario())
+
+        assert [op._filter for op in collection.upserts] == [{"id": "a1"}, {"id": "a2"}]
+        assert collection.upserts[0]._doc["$setOnInsert"]["timestamp"] == record(1)["timestamp"]
+        assert sink.stats()["spill_files"] == 0
+        assert sink.stats()["replayed"] == 2
+
+    def test_full_queue_spills_instead_of_blocking(self, tmp_path):
+        async def scenario():
+            sink = AuditSink(FlakyCollection(), str(tmp_path), max_queue=1)
+            results = sink.submit(record(1)), sink.submit(record(2)), sink.submit(record(3))
+            # The overflow is written by the spill task, not inside submit
+            spilled_in_submit = sink.stats()["spilled"]
+            await sink.stop()
+            return sink, results, spilled_in_submit
+
+        sink, results, spilled_in_submit = asyncio.run(scenario())
+
+        assert results == (True, False, False)
+        assert spilled_in_submit == 0
+        assert sink.stats()["spilled"] == 2
+        assert sink.stats()["spill_files"] == 1
+
+    def test_replay_leaves_live_workers_files_alone(self, tmp_path, monkeypatch):
+        collection = FlakyCollection()
+        other = tmp_path / "audit-spill-1001.jsonl"
+        claimed = tmp_path / "audit-spill-1002.jsonl.1003.5.replaying"
+        exited = tmp_path / "audit-spill-1004.jsonl"
+        for path in (other, claimed, exited):
+            path.write_text('{"id": "%s"}\n' % path.name)
+        monkeypatch.setattr(AuditSink, "_alive", staticmethod(lambda pid: pid != 1004))
+
+        sink = AuditSink(collection, str(tmp_path))
+        asyncio.run(sink._replay())
+
+        assert [op._filter for op in collection.upserts] == [{"id": "audit-spill-1004.jsonl"}]
+        assert sorted(path.name for path in tmp_path.iterdir()) == [other.name, claimed.name]
+
+    def test_claim_renames_to_this_worker(self, tmp_path):
+        path = tmp_path / "audit-spill-1001.jsonl"
+        path.write_text("")
+        sink = AuditSink(FlakyCollection(), str(tmp_path))
+
+        claimed = sink._claim(path)
+
+        assert AuditSink._owner(claimed) == os.getpid()
+        assert claimed.name.startswith("audit-spill-1001.jsonl.") and claimed.suffix == ".replaying"
+        # A second worker racing for the same file loses
+        assert sink._claim(path) is None
+
+    def test_record_id_index_is_unique(self):
+        assert ("audit_logs", "id", {"unique": True}) in AUDIT_INDEXES
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Unit tests for MongoDB client configuration and pool metrics
+"""
+
+import threading
+
+import pytest
+
+from database import PoolMetrics, analytics_read_preference, client_options
+
+class Event:
+    def __init__(self, reason=None):
+        self.address = ("localhost", 27017)
+        self.connection_id = 1
+        self.reason = reason
+
+class TestClientOptions:
+    """Test suite for reading pool settings from the environment"""
+
+    def test_defaults_leave_driver_options_alone(self):
+        assert client_options({}) == {}
+
+    def test_pool_and_compression_settings(self):
+        options = client_options({
+            "MONGO_MAX_POOL_SIZE": "200",
+            "MONGO_MIN_POOL_SIZE": "10",
+            "MONGO_WAIT_QUEUE_TIMEOUT_MS": "500",
+            "MONGO_COMPRESSORS": "zstd,snappy"
+        })
+        assert options == {"maxPoolSize": 200, "minPoolSize": 10, "waitQueueTimeoutMS": 500, "compressors": "zstd,snappy"}
+
+    def test_analytics_read_preference(self):
+        assert analytics_read_preference({}).mongos_mode == "secondaryPreferred"
+        preference = analytics_read_preference({"MONGO_ANALYTICS_READ_PREFERENCE": "nearest", "MONGO_ANALYTICS_MAX_STALENESS_SECONDS": "120"})
+        assert preference.mongos_mode == "nearest" and preference.max_staleness == 120
+        with pytest.raises(ValueError):
+            analytics_read_preference({"MONGO_ANALYTICS_READ_PREFERENCE": "anywhere"})
+
+class TestPoolMetrics:
+    """Test suite for the connection pool listener"""
+
+    def test_checkout_wait_and_connection_counts(self):
+        metrics = PoolMetrics()
+        metrics.connection_created(Event())
+        for _ in range(3):
+            metrics.connection_check_out_started(Event())
+            metrics.connection_checked_out(Event())
+        metrics.connection_checked_in(Event())
+
+        stats = metrics.stats()
+        assert stats["checkouts"] == 3
+        assert stats["checked_out"] == 2
+        assert stats["open_connections"] == 1
+        assert stats["wait_ms"]["window"] == 3
+        assert stats["wait_ms"]["p95"] <= stats["wait_ms"]["max"]
+
+    def test_failures_by_reason(self):
+        metrics = PoolMetrics()
+        metrics.connection_check_out_started(Event())
+        metrics.connection_check_out_failed(Event(reason="timeout"))
+
+        stats = metrics.stats()
+        assert stats["checkout_failures"] == 1
+        assert stats["checkout_failure_reasons"] == {"timeout": 1}
+        assert stats["wait_ms"]["window"] == 0
+
+    def test_wait_is_tracked_per_thread(self):
+        metrics = PoolMetrics()
+        metrics.connection_check_out_started(Event())
+        # A checkout completing on another thread has no start time of its own
+        worker = threading.Thread(target=metrics.connection_checked_out, args=(Event(),))
+        worker.start()
+        worker.join()
+        metrics.connection_checked_out(Event())
+
+        assert metrics.stats()["wait_ms"]["window"] == 1
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the declarative index registry
+"""
+
+import asyncio
+
+from db_indexes import INDEXES, apply_indexes, index_report, key_pattern
+
+class FakeAggregation:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+class FakeCollection:
+    def __init__(self, indexes=None, usage=None, fail_on=None):
+        self.indexes = indexes or {"_id_": {"key": [("_id", 1)]}}
+        self.usage = usage or {}
+        self.fail_on = fail_on
+        self.created = []
+
+    async def create_index(self, keys, **options):
+        if key_pattern(keys) == self.fail_on:
+            raise RuntimeError("IndexOptionsConflict")
+        self.created.append((key_pattern(keys), options))
+
+    async def index_information(self):
+        return self.indexes
+
+    def aggregate(self, pipeline):
+        return FakeAggregation([
+            {"name": name, "accesses": {"ops": ops, "since": "2026-10-17"}} for name, ops in self.usage.items()
+        ])
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+class TestDbIndexes:
+    """Test suite for applying and reporting on registered indexes"""
+
+    def test_registry_has_no_duplicates(self):
+        patterns = [(collection, key_pattern(keys)) for collection, keys, _ in INDEXES]
+
+        assert len(patterns) == len(set(patterns))
+        assert ("payment_transactions", (("session_id", 1),)) in patterns
+        # Conversation listing groups and joins messages per thread
+        assert ("notifications", (("conversation_thread", 1), ("created_at", -1))) in patterns
+
+    def test_failure_does_not_stop_the_bootstrap(self):
+        db = FakeDatabase()
+        db["users"] = FakeCollection(fail_on=(("email", 1),))
+        registry = [("users", "id", {}), ("users", "email", {}), ("users", [("role", 1), ("is_online", 1)], {})]
+
+        result = asyncio.run(apply_indexes(db, registry))
+
+        assert result["applied"] == 2
+        assert result["failed"][0]["keys"] == (("email", 1),)
+
+    def test_report_lists_missing_unregistered_and_unused(self):
+        db = FakeDatabase()
+        db["ratings"] = FakeCollection(
+            indexes={
+                "_id_": {"key": [("_id", 1)]},
+                "rated_id_1": {"key": [("rated_id", 1.0)]},
+                "comment_1": {"key": [("comment", 1)]}
+            },
+            usage={"_id_": 0, "rated_id_1": 12, "comment_1": 0}
+        )
+        registry = [("ratings", "rated_id", {}), ("ratings", "rater_id", {})]
+
+        report = asyncio.run(index_report(db, registry))
+
+        assert report["missing"] == [{"collection": "ratings", "keys": (("rater_id", 1),)}]
+        assert [entry["name"] for entry in report["unregistered"]] == ["comment_1"]
+        assert [entry["name"] for entry in report["unused"]] == ["comment_1"]
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the concurrent notification fan-out primitive
+"""
+
+import asyncio
+import time
+
+from fanout import DELIVERED, ERROR, STORED, TIMEOUT, fan_out, summarize
+
+class TestFanOut:
+    """Test suite for fan_out timeouts, error isolation and concurrency"""
+
+    def test_outcomes_are_isolated_per_recipient(self):
+        async def send(recipient):
+            if recipient == "slow":
+                await asyncio.sleep(1)
+            if recipient == "broken":
+                raise RuntimeError("socket closed")
+            return {"delivered": recipient != "offline"}
+
+        outcomes = asyncio.run(fan_out(
+            ["online", "offline", "slow", "broken"],
+            send,
+            timeout=0.05,
+            classify=lambda record: DELIVERED if record["delivered"] else STORED
+        ))
+
+        statuses = {outcome["recipient"]: outcome["status"] for outcome in outcomes}
+        assert statuses == {"online": DELIVERED, "offline": STORED, "slow": TIMEOUT, "broken": ERROR}
+        assert summarize(outcomes) == {DELIVERED: 1, STORED: 1, TIMEOUT: 1, ERROR: 1}
+
+    def test_sends_run_concurrently(self):
+        async def send(recipient):
+            await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        outcomes = asyncio.run(fan_out([f"driver_{i}" for i in range(20)], send))
+        elapsed = time.perf_counter() - started
+
+        assert len(outcomes) == 20
+        assert elapsed < 0.5
+
+    def test_duplicate_and_empty_recipients(self):
+        calls = []
+
+        async def send(recipient):
+            calls.append(recipient)
+
+        outcomes = asyncio.run(fan_out(["a", "a", None, "b"], send))
+
+        assert calls == ["a", "b"]
+        assert [outcome["recipient"] for outcome in outcomes] == ["a", "b"]
+
+    def test_without_timeout_sends_run_to_completion(self):
+        stored = []
+
+        async def send(recipient):
+            await asyncio.sleep(0.05)
+            stored.append(recipient)
+            return {"delivered": False}
+
+        outcomes = asyncio.run(fan_out(
+            ["a", "b"],
+            send,
+            timeout=None,
+            classify=lambda record: DELIVERED if record["delivered"] else STORED
+        ))
+
+        assert sorted(stored) == ["a", "b"]
+        assert summarize(outcomes)[STORED] == 2
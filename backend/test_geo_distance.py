@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the batched distance engine
+"""
+
+import numpy as np
+from geopy.distance import geodesic
+
+from geo_distance import GEODESIC, HAVERSINE, distance_km, distances_km, within_radius
+
+class TestGeoDistance:
+    """Test suite for vectorized haversine and exact geodesic modes"""
+
+    def setup_method(self):
+        self.origin = (52.52, 13.405)
+        self.points = np.array([
+            (52.53, 13.41),
+            (48.137, 11.575),
+            (52.52, 13.405),
+            (40.7128, -74.006),
+        ])
+
+    def test_haversine_close_to_geodesic(self):
+        fast = distances_km(*self.origin, self.points, mode=HAVERSINE)
+        exact = [geodesic(self.origin, tuple(p)).kilometers for p in self.points]
+
+        assert fast.shape == (4,)
+        assert np.allclose(fast, exact, rtol=0.006, atol=1e-6)
+
+    def test_geodesic_mode_is_exact(self):
+        exact = distances_km(*self.origin, self.points, mode=GEODESIC)
+        expected = [geodesic(self.origin, tuple(p)).kilometers for p in self.points]
+
+        assert np.allclose(exact, expected)
+
+    def test_empty_input(self):
+        assert distances_km(*self.origin, []).shape == (0,)
+
+    def test_scalar_distance(self):
+        assert distance_km(52.52, 13.405, 52.52, 13.405) == 0.0
+
+    def test_within_radius_orders_by_distance(self):
+        indices, distances = within_radius(*self.origin, self.points, 10)
+
+        assert indices.tolist() == [2, 0]
+        assert distances[0] <= distances[1] <= 10
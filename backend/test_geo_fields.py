@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for GeoJSON location fields
+"""
+
+import asyncio
+
+from pymongo import GEOSPHERE
+
+from geo_fields import DRIVER_GEO_FIELD, PICKUP_GEO_FIELD, ensure_geo_indexes, geo_near_stage, geojson_point
+
+class TestGeojsonPoint:
+    """Test suite for converting stored locations to GeoJSON"""
+
+    def test_point_is_longitude_first(self):
+        assert geojson_point({"latitude": 52.5, "longitude": 13.4, "address": "Berlin"}) == {
+            "type": "Point",
+            "coordinates": [13.4, 52.5]
+        }
+
+    def test_missing_coordinates(self):
+        assert geojson_point(None) is None
+        assert geojson_point({}) is None
+        assert geojson_point({"latitude": 52.5}) is None
+
+    def test_zero_is_a_coordinate(self):
+        assert geojson_point({"latitude": 0, "longitude": 0})["coordinates"] == [0.0, 0.0]
+
+class TestGeoNearStage:
+    """Test suite for building $geoNear stages"""
+
+    def test_stage_with_radius(self):
+        stage = geo_near_stage(PICKUP_GEO_FIELD, 52.5, 13.4, {"status": "pending"}, radius_km=2.5)["$geoNear"]
+        assert stage["near"] == {"type": "Point", "coordinates": [13.4, 52.5]}
+        assert stage["key"] == PICKUP_GEO_FIELD
+        assert stage["query"] == {"status": "pending"}
+        assert stage["maxDistance"] == 2500.0
+        assert stage["spherical"] is True
+        assert stage["distanceField"] == "distance_m"
+
+    def test_stage_without_radius(self):
+        stage = geo_near_stage(PICKUP_GEO_FIELD, 1, 2, {}, distance_field="meters")["$geoNear"]
+        assert "maxDistance" not in stage
+        assert stage["distanceField"] == "meters"
+
+class IndexRecorder:
+    """Database stand-in recording create_index calls per collection"""
+
+    def __init__(self):
+        self.created = []
+
+    def __getitem__(self, name):
+        recorder = self
+
+        class Collection:
+            async def create_index(self, keys, **options):
+                recorder.created.append((name, keys))
+
+        return Collection()
+
+class TestEnsureGeoIndexes:
+    """Test suite for the 2dsphere indexes built before serving"""
+
+    def test_creates_both_2dsphere_indexes(self):
+        db = IndexRecorder()
+
+        asyncio.run(ensure_geo_indexes(db))
+
+        assert db.created == [
+            ("users", [(DRIVER_GEO_FIELD, GEOSPHERE)]),
+            ("ride_requests", [(PICKUP_GEO_FIELD, GEOSPHERE)])
+        ]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the in-memory driver geo index used by ride matching
+"""
+
+import random
+
+from geo_distance import distance_km
+from geo_index import DriverGeoIndex
+
+class TestDriverGeoIndex:
+    """Test suite for DriverGeoIndex radius queries and maintenance"""
+
+    def setup_method(self):
+        self.index = DriverGeoIndex(cell_size_deg=0.05)
+
+    def test_radius_query_matches_brute_force(self):
+        rng = random.Random(42)
+        positions = {}
+        for i in range(2000):
+            lat = 52.52 + rng.uniform(-0.5, 0.5)
+            lon = 13.405 + rng.uniform(-0.5, 0.5)
+            positions[f"driver_{i}"] = (lat, lon)
+            self.index.upsert(f"driver_{i}", lat, lon)
+
+        origin = (52.52, 13.405)
+        expected = sorted(
+            driver_id for driver_id, (lat, lon) in positions.items()
+            if distance_km(origin[0], origin[1], lat, lon) <= 10
+        )
+        results = self.index.query_radius(origin[0], origin[1], 10)
+
+        assert sorted(driver_id for driver_id, _ in results) == expected
+        distances = [distance for _, distance in results]
+        assert distances == sorted(distances)
+
+    def test_driver_just_inside_radius_across_cell_edge(self):
+        # 0.05002 deg north of the equator is 5.562 km on the haversine
+        # sphere, inside the radius but in the next latitude cell
+        self.index.upsert("driver_1", 0.05002, 0.0)
+
+        assert [driver_id for driver_id, _ in self.index.query_radius(0.0, 0.0, 5.563)] == ["driver_1"]
+
+    def test_upsert_moves_driver_between_cells(self):
+        self.index.upsert("driver_1", 52.52, 13.405)
+        self.index.upsert("driver_1", 48.137, 11.575)
+
+        assert len(self.index) == 1
+        assert self.index.query_radius(52.52, 13.405, 10) == []
+        assert [d for d, _ in self.index.query_radius(48.137, 11.575, 1)] == ["driver_1"]
+
+    def test_move_ignores_unknown_driver(self):
+        assert self.index.move("driver_1", 52.52, 13.405) is False
+        assert "driver_1" not in self.index
+
+    def test_remove(self):
+        self.index.upsert("driver_1", 52.52, 13.405)
+        self.index.remove("driver_1")
+        self.index.remove("driver_1")
+
+        assert len(self.index) == 0
+        assert self.index.query_radius(52.52, 13.405, 10) == []
+
+    def test_query_across_antimeridian(self):
+        self.index.upsert("east", -17.0, 179.99)
+        self.index.upsert("west", -17.0, -179.99)
+
+        results = self.index.query_radius(-17.0, 179.999, 5)
+        assert sorted(d for d, _ in results) == ["east", "west"]
+
+    def test_nearest_limits_results(self):
+        for i in range(10):
+            self.index.upsert(f"driver_{i}", 52.52 + i * 0.001, 13.405)
+
+        nearest = self.index.nearest(52.52, 13.405, k=3, max_radius_km=10)
+        assert [d for d, _ in nearest] == ["driver_0", "driver_1", "driver_2"]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the coalescing location ingestion stage
+"""
+
+import asyncio
+
+from location_ingest import LocationIngestor
+
+class RecordingUsers:
+    """Collection stand-in that records bulk_write operations"""
+
+    def __init__(self):
+        self.operations = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.operations.extend(operations)
+
+class RecordingHistory:
+    """Collection stand-in that records insert_many batches"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.batches.append(list(documents))
+
+def location_fields(lat, lon, **extra):
+    return {"current_location": {"latitude": lat, "longitude": lon}, **extra}
+
+class TestLocationIngestor:
+    """Test suite for coalescing, thresholding and batched flushes"""
+
+    def setup_method(self):
+        self.users = RecordingUsers()
+        self.history = RecordingHistory()
+        self.ingestor = LocationIngestor(self.users, self.history, min_move_meters=10, history_batch_size=2)
+
+    def test_coalesces_to_one_write_per_user(self):
+        for i in range(5):
+            lat = 52.52 + i * 0.001
+            self.ingestor.submit("driver_1", lat, 13.40, location_fields(lat, 13.40), history_entry={"n": i})
+        self.ingestor.submit("driver_2", 48.14, 11.58, location_fields(48.14, 11.58))
+
+        assert self.ingestor.stats()["pending_users"] == 2
+        asyncio.run(self.ingestor.flush())
+
+        assert len(self.users.operations) == 2
+        latest = self.users.operations[0]._doc["$set"]["current_location"]
+        assert latest["latitude"] == 52.52 + 4 * 0.001
+        assert [len(batch) for batch in self.history.batches] == [2, 2, 1]
+        stats = self.ingestor.stats()
+        assert stats["coalesced"] == 4
+        assert stats["pending_users"] == 0
+
+    def test_drops_sub_threshold_movement(self):
+        assert self.ingestor.submit("driver_1", 52.52, 13.40, location_fields(52.52, 13.40)) is True
+        # About 1 m north
+        assert self.ingestor.submit("driver_1", 52.52001, 13.40, location_fields(52.52001, 13.40)) is False
+        assert self.ingestor.stats()["dropped"] == 1
+
+    def test_status_change_is_not_dropped(self):
+        self.ingestor.submit("driver_1", 52.52, 13.40, location_fields(52.52, 13.40, is_online=False))
+
+        assert self.ingestor.submit("driver_1", 52.52, 13.40, location_fields(52.52, 13.40, is_online=True)) is True
+
+    def test_forget_accepts_next_ping_after_reconnect(self):
+        self.ingestor.submit("driver_1", 52.52, 13.40, location_fields(52.52, 13.40))
+        self.ingestor.forget("driver_1")
+
+        assert self.ingestor.submit("driver_1", 52.52001, 13.40, location_fields(52.52001, 13.40)) is True
+
+    def test_stop_flushes_pending(self):
+        async def scenario():
+            ingestor = LocationIngestor(self.users, self.history, flush_interval=60)
+            await ingestor.start()
+            ingestor.submit("driver_1", 52.52, 13.40, location_fields(52.52, 13.40))
+            await ingestor.stop()
+
+        asyncio.run(scenario())
+
+        assert len(self.users.operations) == 1
+
+    def test_settle_keeps_queued_ping_from_undoing_offline(self):
+        self.ingestor.submit("driver_1", 52.52, 13.40, location_fields(52.52, 13.40, is_online=True))
+
+        asyncio.run(self.ingestor.settle("driver_1", {"is_online": False}))
+        asyncio.run(self.ingestor.flush())
+
+        assert self.users.operations[0]._doc["$set"]["is_online"] is False
+        # The movement baseline is gone, so the next ping is never dropped
+        assert self.ingestor.submit("driver_1", 52.52, 13.40, location_fields(52.52, 13.40, is_online=True)) is True
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the array-backed WebSocket location store
+"""
+
+from location_store import LocationStore
+
+class TestLocationStore:
+    """Test suite for LocationStore updates, swap-deletes and radius queries"""
+
+    def test_update_overwrites_in_place(self):
+        store = LocationStore()
+        store.update("rider_1", 52.52, 13.40)
+        store.update("rider_1", 52.53, 13.41)
+
+        assert len(store) == 1
+        assert store.get("rider_1") == (52.53, 13.41)
+
+    def test_remove_keeps_remaining_rows_consistent(self):
+        store = LocationStore(initial_capacity=2)
+        for i in range(5):
+            store.update(f"user_{i}", 52.0 + i, 13.0)
+
+        assert store.remove("user_1") is True
+        assert store.remove("user_1") is False
+        assert "user_1" not in store
+        assert len(store) == 4
+        # user_4 was swapped into the freed slot
+        assert store.get("user_4") == (56.0, 13.0)
+        assert store.get("user_0") == (52.0, 13.0)
+
+    def test_within_returns_nearest_first(self):
+        store = LocationStore()
+        store.update("far", 52.60, 13.40)
+        store.update("near", 52.521, 13.401)
+        store.update("outside", 48.14, 11.58)
+
+        nearby = store.within(52.52, 13.40, 10.0)
+
+        assert [user_id for user_id, _ in nearby] == ["near", "far"]
+        assert nearby[0][1] < nearby[1][1]
+
+    def test_empty_store(self):
+        assert LocationStore().within(0.0, 0.0, 100.0) == []
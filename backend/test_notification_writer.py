@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the write-behind notification pipeline
+"""
+
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+from notification_writer import NotificationWriter
+
+class RecordingCollection:
+    """Collection stand-in that records insert_many batches"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.batches.append(list(documents))
+
+class FlakyCollection(RecordingCollection):
+    """Fails the first insert outright and one record of the second"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        if self.calls == 1:
+            raise ConnectionError("primary stepped down")
+        if self.calls == 2:
+            self.batches.append(list(documents[1:]))
+            raise BulkWriteError({"writeErrors": [{"index": 0, "code": 91}, {"index": 1, "code": 11000}]})
+        await super().insert_many(documents, ordered)
+
+class TestNotificationWriter:
+    """Test suite for NotificationWriter batching and shutdown"""
+
+    def test_batches_and_flushes_on_stop(self):
+        collection = RecordingCollection()
+        written = []
+
+        async def after_write(records):
+            written.extend(record["id"] for record in records)
+
+        async def scenario():
+            writer = NotificationWriter(collection, after_write=after_write, batch_size=10, flush_interval=0.01)
+            await writer.start()
+            for i in range(25):
+                await writer.submit({"id": i})
+            await writer.stop()
+            return writer.stats()
+
+        stats = asyncio.run(scenario())
+
+        assert sorted(written) == list(range(25))
+        assert all(len(batch) <= 10 for batch in collection.batches)
+        assert stats["written"] == 25
+        assert stats["queue_depth"] == 0
+
+    def test_bounded_queue_applies_backpressure(self):
+        async def scenario():
+            writer = NotificationWriter(RecordingCollection(), max_queue=2)
+            await writer.submit({"id": 1})
+            await writer.submit({"id": 2})
+            blocked = asyncio.create_task(writer.submit({"id": 3}))
+            await asyncio.sleep(0.01)
+            was_blocked = not blocked.done()
+
+            await writer.start()
+            await asyncio.wait_for(blocked, 1)
+            await writer.stop()
+            return was_blocked, writer.stats()["written"]
+
+        was_blocked, written = asyncio.run(scenario())
+
+        assert was_blocked
+        assert written == 3
+
+    def test_failed_insert_is_retried(self):
+        collection = FlakyCollection()
+        written = []
+
+        async def after_write(records):
+            written.extend(record["id"] for record in records)
+
+        async def scenario():
+            writer = NotificationWriter(collection, after_write=after_write, flush_interval=0.01, retry_backoff=0.001)
+            await writer.start()
+            for i in range(3):
+                await writer.submit({"id": i})
+            await writer.stop()
+            return writer.stats()
+
+        stats = asyncio.run(scenario())
+
+        # The duplicate was already stored; only record 0 is sent again
+        assert collection.batches[-1] == [{"id": 0}]
+        assert sorted(written) == [0, 1, 2]
+        assert stats["written"] == 3
+        assert stats["retries"] == 2
+        assert stats["failed"] == 0
+
+    def test_gives_up_after_max_retries(self):
+        class DownCollection:
+            async def insert_many(self, documents, ordered=True):
+                raise ConnectionError("no primary")
+
+        async def scenario():
+            writer = NotificationWriter(DownCollection(), flush_interval=0.01, max_retries=2, retry_backoff=0.001)
+            await writer.start()
+            await writer.submit({"id": 1})
+            await writer.stop()
+            return writer.stats()
+
+        stats = asyncio.run(scenario())
+
+        assert stats["failed"] == 1
+        assert stats["retries"] == 2
+        assert stats["written"] == 0
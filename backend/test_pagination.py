@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Unit tests for keyset pagination cursors
+"""
+
+from datetime import datetime
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor, keyset_query, next_cursor
+
+class TestPagination:
+    """Test suite for cursor encoding and keyset query construction"""
+
+    def test_cursor_round_trip_keeps_datetimes(self):
+        position = [datetime(2026, 10, 17, 12, 30), "log-42"]
+        token = encode_cursor(position)
+
+        assert "=" not in token
+        assert decode_cursor(token) == position
+
+    def test_invalid_cursor_raises_value_error(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_cursor_must_hold_a_position(self):
+        for payload in ({"a": 1}, [1], [1, 2, 3], [{"$ne": None}, "x"], "x"):
+            with pytest.raises(ValueError, match="Invalid pagination cursor"):
+                decode_cursor(encode_cursor(payload))
+
+    def test_named_positions(self):
+        token = encode_cursor({"requests": [3, "r1"], "matches": None})
+        assert decode_cursor(token, keys=("requests", "matches")) == {"requests": [3, "r1"], "matches": None}
+        with pytest.raises(ValueError):
+            decode_cursor(token)
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor([3, "r1"]), keys=("requests", "matches"))
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor({"other": [3, "r1"]}), keys=("requests", "matches"))
+
+    def test_keyset_query_descending(self):
+        when = datetime(2026, 10, 17)
+        query = keyset_query({"user_id": "u1"}, "created_at", -1, [when, "n9"])
+
+        assert query == {"$and": [
+            {"user_id": "u1"},
+            {"$or": [
+                {"created_at": {"$lt": when}},
+                {"created_at": when, "id": {"$lt": "n9"}}
+            ]}
+        ]}
+
+    def test_first_page_and_last_page(self):
+        assert keyset_query({}, "timestamp", 1, None) == {}
+        documents = [{"id": "a", "timestamp": 1}, {"id": "b", "timestamp": 2}]
+
+        assert decode_cursor(next_cursor(documents, "timestamp", 2)) == [2, "b"]
+        assert next_cursor(documents, "timestamp", 3) is None
+
+    def test_nullable_keyset_keeps_documents_missing_the_sort_field(self):
+        when = datetime(2026, 10, 17)
+
+        descending = keyset_query({}, "created_at", -1, [when, "m3"], nullable=True)
+        assert {"created_at": None} in descending["$or"]
+
+        ascending = keyset_query({}, "created_at", 1, [None, "m3"], nullable=True)
+        assert ascending == {"$or": [
+            {"created_at": {"$ne": None}},
+            {"created_at": None, "id": {"$gt": "m3"}}
+        ]}
+
+    def test_custom_tie_break_field(self):
+        query = keyset_query({}, "balance", -1, [12.5, "user-7"], tie_break="user_id")
+        documents = [{"user_id": "user-7", "balance": 12.5}]
+
+        assert {"balance": 12.5, "user_id": {"$lt": "user-7"}} in query["$or"]
+        assert decode_cursor(next_cursor(documents, "balance", 1, tie_break="user_id")) == [12.5, "user-7"]
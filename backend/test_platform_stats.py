@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Unit tests for materialized platform statistics and audit rollups
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+from audit_system import AuditRecord, AuditSystem
+from platform_stats import STATS_DOCUMENT_ID, PlatformStats
+
+class RecordingCollection:
+    """Collection stand-in that records update_one and bulk_write calls"""
+
+    def __init__(self):
+        self.updates = []
+        self.bulk = []
+
+    async def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update, upsert))
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk.append(operations)
+
+class LeaseCollection(RecordingCollection):
+    """Grants the reconcile lease to the first caller until it expires"""
+
+    def __init__(self):
+        super().__init__()
+        self.lease = None
+
+    async def update_one(self, query, update, upsert=False):
+        if query["_id"] == "reconcile_lease":
+            if self.lease is not None and self.lease["expires_at"] >= query["expires_at"]["$lt"]:
+                raise DuplicateKeyError("lease held")
+            self.lease = update["$set"]
+        await super().update_one(query, update, upsert)
+
+class RecordingDatabase:
+    def __init__(self):
+        self.platform_stats = RecordingCollection()
+        self.audit_logs = RecordingCollection()
+        self.audit_rollups = RecordingCollection()
+
+class TestPlatformStats:
+    """Test suite for incremental platform counters"""
+
+    def test_user_registration_increments_role_counter(self):
+        db = RecordingDatabase()
+        stats = PlatformStats(db)
+
+        asyncio.run(stats.user_registered("driver"))
+
+        query, update, upsert = db.platform_stats.updates[0]
+        assert query == {"_id": STATS_DOCUMENT_ID}
+        assert update["$inc"] == {"total_users": 1, "total_drivers": 1}
+        assert upsert is True
+
+    def test_ride_completion_adds_revenue(self):
+        db = RecordingDatabase()
+        stats = PlatformStats(db)
+
+        asyncio.run(stats.ride_completed(12.5))
+        asyncio.run(stats.ride_completed(None))
+
+        assert db.platform_stats.updates[0][1]["$inc"] == {"completed_rides": 1, "total_revenue": 12.5}
+        assert db.platform_stats.updates[1][1]["$inc"] == {"completed_rides": 1, "total_revenue": 0.0}
+
+    def test_driver_status_changes_move_online_count(self):
+        db = RecordingDatabase()
+        stats = PlatformStats(db)
+
+        asyncio.run(stats.driver_status_changed(True))
+        asyncio.run(stats.driver_status_changed(False))
+
+        assert [update["$inc"] for _, update, _ in db.platform_stats.updates] == [
+            {"online_drivers": 1}, {"online_drivers": -1}
+        ]
+
+    def test_reconcile_lease_is_held_for_the_interval(self):
+        db = RecordingDatabase()
+        db.platform_stats = LeaseCollection()
+        first = PlatformStats(db, reconcile_interval=3600)
+        second = PlatformStats(db, reconcile_interval=3600)
+        second._holder = "other:1"
+
+        assert asyncio.run(first._acquire_lease()) is True
+        assert asyncio.run(second._acquire_lease()) is False
+        assert db.platform_stats.lease["holder"] == first._holder
+
+    def test_recount_reads_from_read_db(self):
+        db = RecordingDatabase()
+        stats = PlatformStats(db, read_db="secondary")
+
+        assert stats.reads == "secondary"
+        assert stats.collection is db.platform_stats
+
+class TestAuditRollups:
+    """Test suite for the pre-aggregated audit counters"""
+
+    def test_record_updates_totals_and_hour_bucket(self):
+        db = RecordingDatabase()
+        audit = AuditSystem(db)
+        record = AuditRecord(
+            action="user.login",
+            entity_type="user",
+            severity="high",
+            timestamp=datetime(2026, 10, 17, 13, 45, tzinfo=timezone.utc)
+        )
+
+        asyncio.run(audit._record_rollups([record.model_dump()]))
+
+        totals, hourly, daily = db.audit_rollups.bulk[0]
+        assert totals._doc["$inc"] == {"total": 1, "actions.user_login.count": 1, "severity.high": 1}
+        assert totals._doc["$set"] == {"actions.user_login.name": "user.login"}
+        assert hourly._filter == {"_id": "2026-10-17T13"}
+        assert hourly._doc["$setOnInsert"]["hour"] == datetime(2026, 10, 17, 13, tzinfo=timezone.utc)
+        assert daily._filter == {"_id": "day:2026-10-17"}
+        assert daily._doc["$inc"] == {"count": 1, "actions.user_login.count": 1, "severity.high": 1}
+        assert daily._doc["$setOnInsert"]["day"] == datetime(2026, 10, 17, tzinfo=timezone.utc)
+
+    def test_batch_is_one_rollup_write(self):
+        db = RecordingDatabase()
+        audit = AuditSystem(db)
+        records = [
+            AuditRecord(action="ride_query", entity_type="ride", timestamp=datetime(2026, 10, 17, 13, minute, tzinfo=timezone.utc)).model_dump()
+            for minute in (5, 50)
+        ] + [AuditRecord(action="user_login", entity_type="user", timestamp=datetime(2026, 10, 17, 14, 1, tzinfo=timezone.utc)).model_dump()]
+
+        asyncio.run(audit._record_rollups(records))
+
+        assert len(db.audit_rollups.bulk) == 1
+        totals, *buckets = db.audit_rollups.bulk[0]
+        assert totals._doc["$inc"] == {"total": 3, "actions.ride_query.count": 2, "actions.user_login.count": 1, "severity.info": 3}
+        assert totals._doc["$max"]["actions.ride_query.latest"] == datetime(2026, 10, 17, 13, 50, tzinfo=timezone.utc)
+        assert [(op._filter["_id"], op._doc["$inc"]["count"]) for op in buckets] == [
+            ("2026-10-17T13", 2), ("2026-10-17T14", 1), ("day:2026-10-17", 3)
+        ]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Unit tests for running rating aggregates
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from rating_aggregates import add_rating, add_rating_update, totals_update
+
+class FakeAggregation:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+class FakeDatabase:
+    """Users/ratings stand-ins; users match only when they already carry rating_count"""
+
+    def __init__(self, initialised, ratings):
+        self.updates = []
+        self.initialised = initialised
+        self.ratings_received = ratings
+        self.users = SimpleNamespace(update_one=self._update_one)
+        self.ratings = SimpleNamespace(aggregate=self._aggregate)
+
+    async def _update_one(self, query, update):
+        self.updates.append((query, update))
+        if "rating_count" in query and not self.initialised:
+            return SimpleNamespace(matched_count=0)
+        return SimpleNamespace(matched_count=1)
+
+    def _aggregate(self, pipeline):
+        self.aggregated = pipeline
+        return FakeAggregation([{"_id": None, "sum": sum(self.ratings_received), "count": len(self.ratings_received)}])
+
+class TestRatingAggregates:
+    """Test suite for incremental and recomputed rating updates"""
+
+    def test_incremental_update_is_one_pipeline(self):
+        pipeline = add_rating_update(4)
+
+        assert pipeline[0]["$set"]["rating_sum"] == {"$add": ["$rating_sum", 4]}
+        assert pipeline[0]["$set"]["rating_count"] == {"$add": ["$rating_count", 1]}
+        assert "rating" in pipeline[1]["$set"]
+
+    def test_initialised_user_is_not_recomputed(self):
+        db = FakeDatabase(initialised=True, ratings=[5, 4])
+        asyncio.run(add_rating(db, "d1", 3))
+
+        assert len(db.updates) == 1
+        assert not hasattr(db, "aggregated")
+
+    def test_uninitialised_user_falls_back_to_recount(self):
+        db = FakeDatabase(initialised=False, ratings=[5, 4, 4])
+        asyncio.run(add_rating(db, "d1", 4))
+
+        assert db.updates[-1] == ({"id": "d1"}, totals_update(13, 3))
+        assert totals_update(13, 3)["$set"]["rating"] == 4.3
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Unit tests keeping index-only fields out of user and ride responses
+"""
+
+import asyncio
+import os
+
+import orjson
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+
+import server
+from geo_fields import DRIVER_GEO_FIELD, PICKUP_GEO_FIELD
+from search_index import SEARCH_FIELD
+
+INDEX_FIELDS = (SEARCH_FIELD, DRIVER_GEO_FIELD, PICKUP_GEO_FIELD)
+
+def project(document, projection):
+    """Apply an exclusion or inclusion projection like Mongo does"""
+    if not projection:
+        return dict(document)
+    if any(value for key, value in projection.items() if key != "_id"):
+        return {key: value for key, value in document.items() if projection.get(key)}
+    return {key: value for key, value in document.items() if key not in projection}
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, *args):
+        return self
+
+    def skip(self, count):
+        return self
+
+    def limit(self, count):
+        return self
+
+    async def to_list(self, length):
+        return self.documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+class FakeCollection:
+    """Returns every stored document, honouring projections and $project stages"""
+
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([project(document, projection) for document in self.documents])
+
+    async def find_one(self, query=None, projection=None):
+        return project(self.documents[0], projection) if self.documents else None
+
+    def aggregate(self, pipeline):
+        documents = [dict(document, distance_m=1000.0) for document in self.documents]
+        for stage in pipeline:
+            if "$project" in stage:
+                documents = [project(document, stage["$project"]) for document in documents]
+        return FakeCursor(documents)
+
+    async def count_documents(self, query):
+        return len(self.documents)
+
+class FakeDatabase:
+    def __init__(self, **collections):
+        self.collections = collections
+
+    def __getattr__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+LOCATION = {"latitude": 52.52, "longitude": 13.4, "address": "Main St"}
+
+def user_document(user_id, role):
+    return {
+        "id": user_id,
+        "email": f"{user_id}@example.com",
+        "name": user_id,
+        "phone": "555",
+        "role": role,
+        "password": "hash",
+        "is_online": True,
+        "current_location": LOCATION,
+        DRIVER_GEO_FIELD: {"type": "Point", "coordinates": [13.4, 52.52]},
+        SEARCH_FIELD: ["d", "d1"]
+    }
+
+def ride_request(request_id):
+    return {
+        "id": request_id,
+        "rider_id": "r1",
+        "status": "pending",
+        "pickup_location": LOCATION,
+        PICKUP_GEO_FIELD: {"type": "Point", "coordinates": [13.4, 52.52]},
+        SEARCH_FIELD: ["q", "q1"]
+    }
+
+def ride_match(match_id):
+    return {"id": match_id, "rider_id": "r1", "driver_id": "d1", "status": "completed", SEARCH_FIELD: ["m", "m1"]}
+
+def assert_clean(documents):
+    assert documents
+    for document in documents:
+        assert not set(INDEX_FIELDS) & set(document), document
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    database = FakeDatabase(
+        users=FakeCollection([user_document("d1", "driver")]),
+        ride_requests=FakeCollection([ride_request("q1")]),
+        ride_matches=FakeCollection([ride_match("m1")]),
+        ratings=FakeCollection()
+    )
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "analytics_db", database)
+    monkeypatch.setattr(server, "AUDIT_ENABLED", False)
+    return database
+
+def make_user(role):
+    return server.User(id="d1" if role == "driver" else "r1", email="u@example.com", name="U", phone="555", role=role)
+
+class TestResponseFields:
+    """Test suite for responses returning whole user and ride documents"""
+
+    def test_my_rides_and_requests(self, fake_db):
+        assert_clean(asyncio.run(server.get_my_rides(current_user=make_user("rider"))))
+        for role in ("rider", "driver", "admin"):
+            response = asyncio.run(server.get_my_ride_requests(current_user=make_user(role)))
+            for documents in response.values():
+                if isinstance(documents, list):
+                    assert_clean(documents)
+
+    def test_available_rides(self, fake_db):
+        response = asyncio.run(server.get_available_rides(current_user=make_user("driver")))
+        rides = orjson.loads(response.body)
+        assert_clean(rides["available_rides"])
+        assert_clean(rides["all_pending_requests"])
+
+    def test_admin_user_listing(self, fake_db, monkeypatch):
+        async def no_rides(user_ids):
+            return {}
+        monkeypatch.setattr(server, "count_rides_by_user", no_rides)
+
+        response = asyncio.run(server.get_all_users(current_user=make_user("admin")))
+        users = orjson.loads(response.body)
+        assert_clean(users)
+        assert "password" not in users[0]
+
+        requested = asyncio.run(server.get_all_users(fields=f"name,{SEARCH_FIELD}", current_user=make_user("admin")))
+        assert orjson.loads(requested.body) == [{"id": "d1", "name": "d1"}]
+
+    def test_admin_ride_listing_and_stream(self, fake_db):
+        async def collect():
+            counts = {"pending_requests": 0, "completed_matches": 0}
+            return [record["data"] async for record in server.iter_admin_rides(counts)]
+
+        assert_clean(asyncio.run(collect()))
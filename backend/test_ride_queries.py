@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the /rides/unified aggregation pipelines
+"""
+
+from datetime import datetime
+
+from ride_queries import matches_pipeline, requests_pipeline
+
+class TestRideQueries:
+    """Test suite for per-role ride windows"""
+
+    def test_requests_window_is_bounded_and_projected(self):
+        pipeline = requests_pipeline({"rider_id": "r1"}, None, 50)
+
+        assert pipeline[0] == {"$match": {"rider_id": "r1"}}
+        assert pipeline[1] == {"$sort": {"created_at": -1, "id": -1}}
+        assert pipeline[2] == {"$limit": 50}
+        projection = pipeline[3]["$project"]
+        assert projection["_id"] == 0
+        assert projection["pickup_location.address"] == 1
+        assert "pickup_location" not in projection
+
+    def test_joins_run_after_the_window(self):
+        pipeline = matches_pipeline({"driver_id": "d1"}, None, 20, counterpart="rider")
+        stages = [next(iter(stage)) for stage in pipeline]
+
+        assert stages == ["$match", "$sort", "$limit", "$lookup", "$lookup", "$project"]
+        assert pipeline[3]["$lookup"]["from"] == "ratings"
+        assert pipeline[4]["$lookup"]["from"] == "users"
+        projection = pipeline[-1]["$project"]
+        assert projection["rider_name"] == {"$ifNull": [{"$arrayElemAt": ["$_counterpart.name", 0]}, "Unknown Rider"]}
+        assert "_rating" not in projection
+
+    def test_rater_filter_and_continuation(self):
+        when = datetime(2026, 10, 17)
+        pipeline = matches_pipeline({"rider_id": "r1"}, [when, "m9"], 20, counterpart="driver", rater_id="r1")
+
+        rating_match = pipeline[3]["$lookup"]["pipeline"][0]["$match"]
+        assert rating_match["rater_id"] == "r1"
+        after = pipeline[0]["$match"]["$and"][1]["$or"]
+        assert {"created_at": {"$lt": when}} in after
+        assert {"created_at": None} in after
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Unit tests for prefix-token search
+"""
+
+import asyncio
+
+from search_index import SEARCH_FIELD, backfill_search_tokens, matches, relevance_stage, search_query, search_tokens
+
+class FakeBulkResult:
+    def __init__(self, count):
+        self.modified_count = count
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+        self.writes = []
+
+    def find(self, query, projection=None):
+        return FakeCursor([document for document in self.documents if document.get(SEARCH_FIELD) is None])
+
+    async def bulk_write(self, operations, ordered=True):
+        self.writes.extend(operations)
+        return FakeBulkResult(len(operations))
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+class TestSearchTokens:
+    """Test suite for tokenizing documents and search terms"""
+
+    def test_prefixes_of_every_field(self):
+        tokens = search_tokens("users", {"id": "ab-12", "name": "Jane Doe", "email": "jane.doe@example.com", "phone": "+1 555-0100"})
+        for prefix in ("j", "ja", "jane", "do", "exam", "ab", "ab12", "5550100", "=jane", "=doe"):
+            assert prefix in tokens
+        assert "=ja" not in tokens
+
+    def test_free_text_is_not_joined(self):
+        tokens = search_tokens("audit_logs", {"action": "user_login", "metadata": {"description": "Ride completed by driver"}})
+        assert "completed" in tokens and "by" in tokens
+        assert "completedby" not in tokens and "ridec" not in tokens
+
+    def test_nested_fields_and_missing_values(self):
+        tokens = search_tokens("ride_requests", {"id": "r1", "pickup_location": {"address": "Main St"}, "dropoff_location": None})
+        assert "mai" in tokens and "=st" in tokens
+
+    def test_query_is_escaped_by_construction(self):
+        assert search_query("Jane.*(") == {SEARCH_FIELD: {"$all": ["jane"]}}
+        assert search_query("(*)") == {SEARCH_FIELD: {"$in": []}}
+
+    def test_matches_requires_every_word(self):
+        tokens = search_tokens("users", {"name": "Jane Doe"})
+        assert matches(tokens, "jan do")
+        assert not matches(tokens, "jan smith")
+        assert not matches(tokens, "...")
+
+    def test_relevance_counts_whole_words(self):
+        stage = relevance_stage("Jane Do")
+        assert stage["$addFields"]["relevance"]["$size"]["$setIntersection"][1] == ["=do", "=jane"]
+
+class TestBackfill:
+    """Test suite for tokenizing existing documents"""
+
+    def test_only_untokenized_documents_are_updated(self):
+        users = FakeCollection([
+            {"_id": 1, "name": "Jane"},
+            {"_id": 2, "name": "Joe", SEARCH_FIELD: ["j"]}
+        ])
+
+        counts = asyncio.run(backfill_search_tokens({"users": users}, collections=["users"]))
+
+        assert counts == {"users": 1}
+        assert users.writes[0]._filter == {"_id": 1}
+        assert "=jane" in users.writes[0]._doc["$set"][SEARCH_FIELD]
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared BSON-to-JSON serialization layer
+"""
+
+import json
+from datetime import date, datetime, timezone
+
+from bson import ObjectId
+
+from serialization import FastJSONResponse, convert_objectids_to_strings, dumps
+
+class TestSerialization:
+    """Test suite for conversion and direct encoding of Mongo documents"""
+
+    def setup_method(self):
+        self.object_id = ObjectId()
+        self.document = {
+            "_id": self.object_id,
+            "created_at": datetime(2026, 10, 17, 12, 30, 5, 123000, tzinfo=timezone.utc),
+            "day": date(2026, 10, 17),
+            "nested": [{"_id": self.object_id, "rating": 4.5, "comment": None}],
+        }
+        self.expected = {
+            "_id": str(self.object_id),
+            "created_at": "2026-10-17T12:30:05.123000+00:00",
+            "day": "2026-10-17",
+            "nested": [{"_id": str(self.object_id), "rating": 4.5, "comment": None}],
+        }
+
+    def test_convert_handles_nested_bson_values(self):
+        assert convert_objectids_to_strings(self.document) == self.expected
+        assert convert_objectids_to_strings([self.document]) == [self.expected]
+
+    def test_dumps_matches_converted_output(self):
+        assert json.loads(dumps(self.document)) == self.expected
+
+    def test_response_class_renders_raw_documents(self):
+        response = FastJSONResponse({"rides": [self.document]})
+
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == {"rides": [self.expected]}
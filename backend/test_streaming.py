@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Unit tests for NDJSON streaming helpers
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+from streaming import iter_batches, ndjson_chunks
+
+class AsyncCursor:
+    """Async iterator stand-in for a Motor cursor"""
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+class TestStreaming:
+    """Test suite for batching and chunked NDJSON encoding"""
+
+    def test_iter_batches(self):
+        batches = asyncio.run(collect(iter_batches(AsyncCursor(range(5)), 2)))
+
+        assert batches == [[0, 1], [2, 3], [4]]
+
+    def test_chunks_contain_one_record_per_line(self):
+        async def records():
+            for i in range(5):
+                yield {"type": "completed_match", "data": {"id": i, "completed_at": datetime(2026, 10, 17)}}
+
+        chunks = asyncio.run(collect(ndjson_chunks(records(), chunk_records=2)))
+        lines = b"".join(chunks).decode().splitlines()
+
+        assert len(chunks) == 3
+        assert len(lines) == 5
+        assert json.loads(lines[0])["data"] == {"id": 0, "completed_at": "2026-10-17T00:00:00"}
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the authenticated-user cache
+"""
+
+import time
+
+from pydantic import BaseModel
+
+from user_cache import UserCache
+
+class CachedUser(BaseModel):
+    id: str
+    is_online: bool = False
+
+class TestUserCache:
+    """Test suite for UserCache expiry, eviction, invalidation and metrics"""
+
+    def test_hit_and_miss_metrics(self):
+        cache = UserCache(ttl_seconds=60)
+        assert cache.get("rider_1") is None
+        cache.put("rider_1", CachedUser(id="rider_1"))
+
+        assert cache.get("rider_1").id == "rider_1"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_entries_expire_after_ttl(self):
+        cache = UserCache(ttl_seconds=0.01)
+        cache.put("rider_1", CachedUser(id="rider_1"))
+        time.sleep(0.02)
+
+        assert cache.get("rider_1") is None
+        assert cache.stats()["expired"] == 1
+
+    def test_least_recently_used_is_evicted(self):
+        cache = UserCache(ttl_seconds=60, max_entries=2)
+        cache.put("a", CachedUser(id="a"))
+        cache.put("b", CachedUser(id="b"))
+        cache.get("a")
+        cache.put("c", CachedUser(id="c"))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_and_update(self):
+        cache = UserCache(ttl_seconds=60)
+        cache.put("driver_1", CachedUser(id="driver_1"))
+        cache.update("driver_1", is_online=True)
+        assert cache.get("driver_1").is_online is True
+
+        cache.invalidate("driver_1")
+        assert cache.get("driver_1") is None
+        # Updating an uncached user is a no-op
+        cache.update("driver_1", is_online=False)
+        assert len(cache) == 0
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the cached admin user-summary lookups
+"""
+
+import asyncio
+
+from user_directory import UserDirectory
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+class RecordingUsers:
+    """Collection stand-in that records find() filters"""
+
+    def __init__(self, users):
+        self.users = users
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        wanted = set(query["id"]["$in"])
+        return FakeCursor([dict(u) for u in self.users if u["id"] in wanted])
+
+class TestUserDirectory:
+    """Test suite for batching and caching of user summaries"""
+
+    def setup_method(self):
+        self.users = RecordingUsers([
+            {"id": "u1", "name": "Ada", "email": "ada@example.com", "role": "rider"},
+            {"id": "u2", "name": "Bo", "email": "bo@example.com", "role": "driver"}
+        ])
+        self.directory = UserDirectory(self.users)
+
+    def test_one_query_for_all_missing_ids(self):
+        found = asyncio.run(self.directory.summaries(["u1", "u2", "u1", None, "ghost"]))
+
+        assert set(found) == {"u1", "u2"}
+        assert len(self.users.queries) == 1
+        assert sorted(self.users.queries[0]["id"]["$in"]) == ["ghost", "u1", "u2"]
+
+    def test_cached_ids_skip_the_database(self):
+        asyncio.run(self.directory.summaries(["u1"]))
+        found = asyncio.run(self.directory.summaries(["u1", "u2"]))
+
+        assert found["u1"]["name"] == "Ada"
+        assert self.users.queries[1]["id"]["$in"] == ["u2"]
+        asyncio.run(self.directory.summaries(["u1", "u2"]))
+        assert len(self.users.queries) == 2
+
+    def test_invalidate_refetches(self):
+        asyncio.run(self.directory.summaries(["u1"]))
+        self.directory.invalidate("u1")
+        asyncio.run(self.directory.summaries(["u1"]))
+
+        assert len(self.users.queries) == 2
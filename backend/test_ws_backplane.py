@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Unit tests for WebSocket backplane routing between workers
+"""
+
+import asyncio
+
+import pytest
+
+from ws_backplane import Backplane, LocalBackplane, LocalHub
+
+class TestLocalBackplane:
+    """Two LocalBackplane instances on one hub stand in for two workers"""
+
+    def setup_method(self):
+        self.hub = LocalHub()
+        self.worker_a = LocalBackplane(self.hub, worker_id="a")
+        self.worker_b = LocalBackplane(self.hub, worker_id="b")
+        self.delivered = {"a": [], "b": []}
+
+    async def _start(self):
+        async def deliver_a(user_id, payload):
+            self.delivered["a"].append((user_id, payload))
+            return True
+
+        async def deliver_b(user_id, payload):
+            self.delivered["b"].append((user_id, payload))
+            return True
+
+        await self.worker_a.start(deliver_a)
+        await self.worker_b.start(deliver_b)
+
+    def test_routes_to_owning_worker(self):
+        async def scenario():
+            await self._start()
+            await self.worker_b.register("rider_1")
+            return await self.worker_a.publish("rider_1", '{"type": "ride_accepted"}')
+
+        assert asyncio.run(scenario()) is True
+        assert self.delivered["b"] == [("rider_1", '{"type": "ride_accepted"}')]
+        assert self.delivered["a"] == []
+
+    def test_unknown_user_is_not_routed(self):
+        async def scenario():
+            await self._start()
+            return await self.worker_a.publish("nobody", "{}")
+
+        assert asyncio.run(scenario()) is False
+
+    def test_unregister_keeps_newer_owner(self):
+        async def scenario():
+            await self._start()
+            await self.worker_a.register("driver_1")
+            # Driver reconnects on worker b before worker a notices the disconnect
+            await self.worker_b.register("driver_1")
+            await self.worker_a.unregister("driver_1")
+            return await self.worker_a.publish("driver_1", "{}")
+
+        assert asyncio.run(scenario()) is True
+        assert self.hub.owners == {"driver_1": "b"}
+
+    def test_stop_releases_owned_users(self):
+        async def scenario():
+            await self._start()
+            await self.worker_b.register("rider_1")
+            await self.worker_b.stop()
+            return await self.worker_a.publish("rider_1", "{}")
+
+        assert asyncio.run(scenario()) is False
+        assert self.hub.owners == {}
+
+    def test_failed_owner_delivery_is_not_reported_delivered(self):
+        async def scenario():
+            async def socket_gone(user_id, payload):
+                return False
+
+            await self.worker_a.start(socket_gone)
+            await self.worker_b.start(socket_gone)
+            await self.worker_b.register("rider_1")
+            return await self.worker_a.publish("rider_1", "{}")
+
+        assert asyncio.run(scenario()) is False
+
+    def test_backplane_is_abstract(self):
+        with pytest.raises(TypeError):
+            Backplane()
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, TypeVar
+import time
+
+T = TypeVar("T")
+
+class UserCache(Generic[T]):
+    """Per-worker TTL + LRU cache of authenticated users keyed by user id.
+
+    Entries expire ttl_seconds after they were loaded, which bounds how long
+    a change made by another worker (e.g. a suspension) can go unnoticed.
+    Writers on this worker call invalidate() so their own changes apply
+    immediately. The least recently used entry is evicted once max_entries
+    is reached.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: str) -> Optional[T]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self._stats["hits"] += 1
+        return user
+
+    def put(self, user_id: str, user: T):
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        self._entries[user_id] = (user, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def update(self, user_id: str, **fields: Any):
+        """Apply field changes to a cached pydantic user without resetting its TTL"""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            user, expires_at = entry
+            self._entries[user_id] = (user.model_copy(update=fields), expires_at)
+
+    def invalidate(self, user_id: str):
+        if self._entries.pop(user_id, None) is not None:
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,47 @@
+from typing import Any, Dict, Iterable, Optional
+from geo_fields import DRIVER_GEO_FIELD
+from search_index import SEARCH_FIELD
+from user_cache import UserCache
+
+# Never returned with a user document: the password hash and index-only fields
+HIDDEN_USER_FIELDS = {"password": 0, SEARCH_FIELD: 0, DRIVER_GEO_FIELD: 0}
+
+# Fields admin views show for a referenced user (participants, riders, drivers)
+SUMMARY_FIELDS = ("id", "name", "email", "role")
+
+class UserDirectory:
+    """Name/email/role lookups for users referenced by admin listings.
+
+    Summaries are cached per worker in a UserCache; the ids a page needs
+    that are not cached are fetched with a single $in query. Unknown ids
+    are left out of the result so callers keep their own placeholders.
+    """
+
+    def __init__(self, users, cache: Optional[UserCache] = None):
+        self.users = users
+        self.cache = cache if cache is not None else UserCache(ttl_seconds=60, max_entries=10000)
+
+    async def summaries(self, user_ids: Iterable[Optional[str]]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for user_id in set(user_ids):
+            if not user_id:
+                continue
+            summary = self.cache.get(user_id)
+            if summary is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = summary
+
+        if missing:
+            projection = {"_id": 0, **{field: 1 for field in SUMMARY_FIELDS}}
+            async for user in self.users.find({"id": {"$in": missing}}, projection):
+                self.cache.put(user["id"], user)
+                found[user["id"]] = user
+        return found
+
+    def invalidate(self, user_id: str):
+        self.cache.invalidate(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
@@ -0,0 +1,203 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Callback that delivers a payload to a socket owned by this worker
+DeliverCallback = Callable[[str, str], Awaitable[bool]]
+
+class Backplane(ABC):
+    """Routes WebSocket messages to the worker that owns the recipient's socket"""
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._deliver: Optional[DeliverCallback] = None
+
+    async def start(self, deliver: DeliverCallback):
+        self._deliver = deliver
+
+    async def stop(self):
+        self._deliver = None
+
+    @abstractmethod
+    async def register(self, user_id: str):
+        """Record that this worker owns user_id's socket"""
+
+    @abstractmethod
+    async def unregister(self, user_id: str):
+        """Forget ownership of user_id's socket if this worker still holds it"""
+
+    @abstractmethod
+    async def publish(self, user_id: str, payload: str) -> bool:
+        """Forward payload to the worker owning user_id.
+
+        True only once the owner has written it to the socket; False if
+        nobody owns it or the owner could not deliver it.
+        """
+
+class LocalHub:
+    """Shared routing table for LocalBackplane instances in the same process"""
+
+    def __init__(self):
+        self.owners: Dict[str, str] = {}
+        self.workers: Dict[str, "LocalBackplane"] = {}
+
+class LocalBackplane(Backplane):
+    """In-process backplane.
+
+    With a single worker every socket is local, so publish only ever finds
+    owners registered on another LocalBackplane sharing the same hub. Tests
+    use several instances on one hub to stand in for separate workers.
+    """
+
+    def __init__(self, hub: Optional[LocalHub] = None, worker_id: Optional[str] = None):
+        super().__init__(worker_id)
+        self.hub = hub or LocalHub()
+
+    async def start(self, deliver: DeliverCallback):
+        await super().start(deliver)
+        self.hub.workers[self.worker_id] = self
+
+    async def stop(self):
+        self.hub.workers.pop(self.worker_id, None)
+        for user_id, owner in list(self.hub.owners.items()):
+            if owner == self.worker_id:
+                del self.hub.owners[user_id]
+        await super().stop()
+
+    async def register(self, user_id: str):
+        self.hub.owners[user_id] = self.worker_id
+
+    async def unregister(self, user_id: str):
+        if self.hub.owners.get(user_id) == self.worker_id:
+            del self.hub.owners[user_id]
+
+    async def publish(self, user_id: str, payload: str) -> bool:
+        owner = self.hub.owners.get(user_id)
+        if owner is None or owner == self.worker_id:
+            return False
+        worker = self.hub.workers.get(owner)
+        if worker is None or worker._deliver is None:
+            return False
+        return await worker._deliver(user_id, payload)
+
+# Atomically delete an owner entry only if it still points at this worker
+_UNREGISTER_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+    return redis.call('HDEL', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+# Unread acks (publisher timed out) expire after this long
+_ACK_TTL_SECONDS = 60
+
+class RedisBackplane(Backplane):
+    """Cross-process backplane over Redis.
+
+    Socket ownership lives in a Redis hash (user_id -> worker_id) and every
+    worker subscribes to its own channel. Publishing looks up the owner and
+    sends the payload to that worker's channel only. The owner pushes the
+    outcome of its socket send to a per-message ack list, which publish
+    waits on for up to ack_timeout seconds; no ack counts as not delivered.
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "ws", worker_id: Optional[str] = None, ack_timeout: float = 1.0):
+        super().__init__(worker_id)
+        import redis.asyncio as aioredis
+
+        self._redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.ack_timeout = ack_timeout
+        self._owners_key = f"{prefix}:owners"
+        self._prefix = prefix
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._local_users = set()
+
+    def _channel(self, worker_id: str) -> str:
+        return f"{self._prefix}:worker:{worker_id}"
+
+    async def start(self, deliver: DeliverCallback):
+        await super().start(deliver)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self._channel(self.worker_id))
+        self._listener = asyncio.create_task(self._listen())
+        logger.info(f"WebSocket backplane worker {self.worker_id} subscribed to Redis")
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        for user_id in list(self._local_users):
+            await self.unregister(user_id)
+        if self._pubsub:
+            await self._pubsub.unsubscribe()
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self._redis.aclose()
+        await super().stop()
+
+    async def _listen(self):
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            delivered = False
+            envelope = {}
+            try:
+                envelope = json.loads(message["data"])
+                if self._deliver:
+                    delivered = await self._deliver(envelope["user_id"], envelope["payload"])
+            except Exception as e:
+                logger.error(f"Failed to deliver backplane message: {e}")
+            if envelope.get("ack"):
+                try:
+                    await self._redis.rpush(envelope["ack"], "1" if delivered else "0")
+                    await self._redis.expire(envelope["ack"], _ACK_TTL_SECONDS)
+                except Exception as e:
+                    logger.error(f"Failed to acknowledge backplane message: {e}")
+
+    async def register(self, user_id: str):
+        self._local_users.add(user_id)
+        await self._redis.hset(self._owners_key, user_id, self.worker_id)
+
+    async def unregister(self, user_id: str):
+        self._local_users.discard(user_id)
+        await self._redis.eval(_UNREGISTER_SCRIPT, 1, self._owners_key, user_id, self.worker_id)
+
+    async def publish(self, user_id: str, payload: str) -> bool:
+        owner = await self._redis.hget(self._owners_key, user_id)
+        if owner is None or owner == self.worker_id:
+            return False
+        ack_key = f"{self._prefix}:ack:{uuid.uuid4().hex}"
+        receivers = await self._redis.publish(
+            self._channel(owner),
+            json.dumps({"user_id": user_id, "payload": payload, "ack": ack_key})
+        )
+        if receivers == 0:
+            # Owner worker is gone; drop its stale entry
+            await self._redis.eval(_UNREGISTER_SCRIPT, 1, self._owners_key, user_id, owner)
+            return False
+        reply = await self._redis.blpop([ack_key], timeout=self.ack_timeout)
+        return reply is not None and reply[1] == "1"
+
+def create_backplane() -> Backplane:
+    """Build the backplane selected by WS_BACKPLANE (local or redis)"""
+    kind = os.environ.get("WS_BACKPLANE", "local")
+    if kind == "redis":
+        return RedisBackplane(
+            os.environ.get("REDIS_URL", "redis://localhost:6379/0"),
+            prefix=os.environ.get("WS_BACKPLANE_PREFIX", "ws"),
+            ack_timeout=float(os.environ.get("WS_BACKPLANE_ACK_TIMEOUT", "1.0"))
+        )
+    if kind != "local":
+        raise ValueError(f"Unknown WebSocket backplane: {kind}")
+    return LocalBackplane()
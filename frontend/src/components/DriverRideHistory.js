@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
+import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
 import {
   Table,
@@ -29,6 +30,8 @@ const DriverRideHistory = () => {
   const [rides, setRides] = useState([]);
   const [filteredRides, setFilteredRides] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
 
@@ -45,36 +48,39 @@ const DriverRideHistory = () => {
     'Content-Type': 'application/json'
   });
 
-  const fetchRides = async () => {
+  // Without a cursor the first page replaces the list; with the
+  // page_info.next_cursor of the last response the next page is appended
+  const fetchRides = async (cursor = null) => {
     try {
-      setLoading(true);
+      cursor ? setLoadingMore(true) : setLoading(true);
       // Use the unified endpoint which includes rating data
       const response = await axios.get(`${API_URL}/api/rides/unified`, {
-        headers: getAuthHeaders()
+        headers: getAuthHeaders(),
+        params: cursor ? { cursor } : {}
       });
       
       console.log('🔍 DriverRideHistory: Unified API response:', response.data);
       
       // Extract completed matches (rides) from the unified response
-      const rides = response.data.completed_matches || [];
+      const pageRides = response.data.completed_matches || [];
       
       // Debug: Check for rating data in the response
-      const ridesWithRatings = rides.filter(ride => ride.rating);
+      const ridesWithRatings = pageRides.filter(ride => ride.rating);
       console.log('🔍 Rides with ratings:', ridesWithRatings);
       
       // Sort by date (newest first)
-      const sortedRides = rides.sort((a, b) => {
+      setRides(previous => (cursor ? [...previous, ...pageRides] : pageRides).sort((a, b) => {
         const dateA = new Date(b.completed_at || b.created_at);
         const dateB = new Date(a.completed_at || a.created_at);
         return dateA - dateB;
-      });
-      
-      setRides(sortedRides);
+      }));
+      setNextCursor(response.data.page_info?.next_cursor || null);
     } catch (error) {
       console.error('Error fetching rides:', error);
       toast.error('Failed to load ride history');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -181,7 +187,7 @@ const DriverRideHistory = () => {
                 </CardDescription>
               </div>
               <button
-                onClick={fetchRides}
+                onClick={() => fetchRides()}
                 className="p-2 hover:bg-gray-100 rounded-lg transition-colors"
                 disabled={loading}
               >
@@ -329,6 +335,17 @@ const DriverRideHistory = () => {
                 </p>
               </div>
             )}
+            {!loading && nextCursor && (
+              <div className="flex justify-center mt-4">
+                <Button
+                  variant="outline"
+                  onClick={() => fetchRides(nextCursor)}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Loading...' : 'Load more rides'}
+                </Button>
+              </div>
+            )}
           </CardContent>
         </Card>
       </div>
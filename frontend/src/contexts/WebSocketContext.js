@@ -158,7 +158,12 @@ export const WebSocketProvider = ({ children }) => {
       newSocket.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
-          handleWebSocketMessage(data);
+          if (data.type === 'notification_batch') {
+            // Pending notifications replayed on reconnect arrive as one frame
+            (data.notifications || []).forEach(handleWebSocketMessage);
+          } else {
+            handleWebSocketMessage(data);
+          }
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
         }